@@ -11,9 +11,8 @@ from sqlalchemy.orm import Session
 
 from app.db.database import get_db
 from app.models.models import User  # ORM User model
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.auth.principal_cache import Principal, principal_cache
+from app.auth.hashing import pwd_context
 
 
 def get_password_hash(password: str) -> str:
@@ -24,6 +23,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# Request handlers should await password_hasher (app/auth/hashing.py) instead
+# of these blocking helpers, which remain for scripts.
+
+
 # ─────────────────────────────────────────────
 # 🔐 Config
 # ─────────────────────────────────────────────
@@ -54,15 +57,21 @@ def create_access_token(data: dict) -> str:
 def get_current_user(
     token: str = Depends(api_key_header),
     db: Session = Depends(get_db),
-) -> User:
+) -> Principal:
     if not token.startswith("Bearer "):
         raise HTTPException(
             status_code=401, detail="Invalid authorization header format"
         )
 
-    try:
-        token_value = token.replace("Bearer ", "")
-        payload = jwt.decode(token_value, SECRET_KEY, algorithms=[ALGORITHM])
+    token_value = token.replace("Bearer ", "")
+
+    def load():
+        try:
+            payload = jwt.decode(token_value, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError as e:
+            logger.error(f"JWT decode failed: {str(e)}")
+            raise HTTPException(status_code=401, detail="Token validation failed")
+
         username = payload.get("sub")
         if not username:
             raise HTTPException(status_code=401, detail="Invalid token payload")
@@ -71,18 +80,17 @@ def get_current_user(
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
-        return user
+        return Principal.from_user(user), payload.get("exp")
 
-    except JWTError as e:
-        logger.error(f"JWT decode failed: {str(e)}")
-        raise HTTPException(status_code=401, detail="Token validation failed")
+    # 🗃️ Cached per token; see app/auth/principal_cache.py for invalidation
+    return principal_cache.resolve("api_key", token_value, load)
 
 
 # ─────────────────────────────────────────────
 # 🛡️ Role-based access checker
 # ─────────────────────────────────────────────
 def require_role(required_role: str):
-    def role_checker(user: User = Depends(get_current_user)):
+    def role_checker(user: Principal = Depends(get_current_user)):
         if user.role != required_role:
             logger.warning(
                 f"Unauthorized access: user '{user.username}' attempted '{required_role}' access"
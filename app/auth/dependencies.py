@@ -3,7 +3,8 @@ from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.db.database import get_db
-from app.models.models import User
+from app.models.models import TenantGrant, User
+from app.auth.principal_cache import Principal, principal_cache
 
 # OAuth2 setup
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -15,9 +16,13 @@ ALGORITHM = "HS256"
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
-):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+) -> Principal:
+    def load():
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Token validation failed")
+
         user_id: int = payload.get("sub")
         tenant_id: str = payload.get("tenant_id")
 
@@ -33,17 +38,34 @@ def get_current_user(
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
 
-        return user
+        return Principal.from_user(user), payload.get("exp")
 
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token validation failed")
+    # Repeat requests with the same token skip the decode and the users query
+    return principal_cache.resolve("oauth2", token, load)
 
 
 # ✅ Role checker with tenant isolation support
 def require_role(required_role: str):
-    def role_checker(user: User = Depends(get_current_user)):
+    def role_checker(user: Principal = Depends(get_current_user)):
         if user.role != required_role:
             raise HTTPException(status_code=403, detail="Insufficient privileges")
         return user
 
     return role_checker
+
+
+# ✅ Cross-tenant access: own tenant, plus tenants granted in tenant_grants
+def check_tenant_access(db: Session, user: Principal, tenant_ids) -> None:
+    others = set(tenant_ids) - {user.tenant_id}
+    if not others:
+        return
+    granted = {
+        tenant_id
+        for (tenant_id,) in db.query(TenantGrant.tenant_id).filter(
+            TenantGrant.user_id == user.id, TenantGrant.tenant_id.in_(others)
+        )
+    }
+    if granted != others:
+        raise HTTPException(
+            status_code=403, detail="Not allowed to access other stores"
+        )
@@ -0,0 +1,175 @@
+# 📁 app/auth/hashing.py
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────
+# 🔐 Config
+# ─────────────────────────────────────────────
+# Raising BCRYPT_ROUNDS upgrades existing hashes on each user's next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# "thread" (bcrypt releases the GIL) or "process"
+PASSWORD_HASHING_EXECUTOR = os.getenv("PASSWORD_HASHING_EXECUTOR", "thread")
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "2"))
+# Hash/verify calls waiting or running beyond this are refused with a 503
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv("PASSWORD_HASHING_MAX_PENDING", "64"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+# Module-level so they pickle into a process pool; each returns its run time
+def _hash(password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    hashed = pwd_context.hash(password)
+    return hashed, time.perf_counter() - started
+
+
+def _verify_and_update(
+    password: str, hashed: str
+) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = time.perf_counter()
+    result = pwd_context.verify_and_update(password, hashed)
+    return result, time.perf_counter() - started
+
+
+def rehash_password(db: Session, user, new_hash: str) -> None:
+    """
+    Store a hash recomputed at the current cost (the new_hash from
+    verify_and_update). Failure is logged and never blocks the login.
+    """
+    # Read up front: after a rollback the expired user may not load again
+    username = user.username
+    try:
+        user.password_hash = new_hash
+        db.commit()
+        logger.info(f"🔁 Password hash upgraded for user '{username}'")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Password rehash failed for '{username}': {str(e)}")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated pool so a login burst queues here
+    instead of occupying the threadpool that serves sync routes. At most
+    `max_pending` calls wait or run at once; the rest fail fast.
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASHING_WORKERS,
+        max_pending: int = PASSWORD_HASHING_MAX_PENDING,
+        kind: str = PASSWORD_HASHING_EXECUTOR,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "failed": 0,
+            "queue_wait_seconds": 0.0,
+            "hash_seconds": 0.0,
+            "max_queue_wait_seconds": 0.0,
+        }
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="pwd-hash"
+                    )
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise HashingBusyError("Too many password checks in progress")
+            self._pending += 1
+
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(
+                self._get_executor(), fn, *args
+            )
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        waited = max(time.perf_counter() - submitted - run_seconds, 0.0)
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["queue_wait_seconds"] += waited
+            self._stats["hash_seconds"] += run_seconds
+            self._stats["max_queue_wait_seconds"] = max(
+                self._stats["max_queue_wait_seconds"], waited
+            )
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        (valid, new_hash). new_hash is set when the stored hash uses an
+        outdated cost and should be saved in place of the old one.
+        """
+        return await self._run(_verify_and_update, password, hashed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+        completed = stats["completed"] or 1
+        stats.update(
+            executor=self.kind,
+            workers=self.workers,
+            max_pending=self.max_pending,
+            bcrypt_rounds=BCRYPT_ROUNDS,
+            avg_queue_wait_seconds=stats["queue_wait_seconds"] / completed,
+            avg_hash_seconds=stats["hash_seconds"] / completed,
+        )
+        return stats
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
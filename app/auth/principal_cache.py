@@ -0,0 +1,163 @@
+# 📁 app/auth/principal_cache.py
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+
+from app.models.models import User
+from services.notifications import hub, notify
+
+# Workers publish user ids here when a user row changes or is deleted
+PRINCIPAL_CHANGES_CHANNEL = "principal_changes"
+
+# Upper bound on how long a role change or deletion made outside the ORM
+# (raw SQL, another service) can go unnoticed
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+
+class Principal:
+    """
+    The authenticated user as routes see it: a detached, read-only copy of
+    the fields they use. Supports attribute and item access so routes
+    written against either style keep working.
+    """
+
+    __slots__ = ("id", "username", "role", "tenant_id")
+
+    def __init__(self, id, username, role, tenant_id):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.tenant_id = tenant_id
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(user.id, user.username, user.role, user.tenant_id)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __repr__(self):
+        return (
+            f"Principal(id={self.id}, username={self.username!r}, role={self.role!r})"
+        )
+
+
+class PrincipalCache:
+    """
+    Process-wide LRU of resolved principals keyed by a hash of the bearer
+    token. An entry lives for ttl_seconds or until the token expires,
+    whichever is sooner, and is dropped as soon as any worker changes or
+    deletes the user. Within one request FastAPI's dependency cache already
+    resolves get_current_user once, including through require_role.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._subscribed = False
+
+    @staticmethod
+    def key(scheme: str, token: str) -> str:
+        # Namespaced per scheme: each validates tokens with its own secret
+        return hashlib.sha256(f"{scheme}:{token}".encode()).hexdigest()
+
+    def resolve(
+        self,
+        scheme: str,
+        token: str,
+        load: Callable[[], Tuple[Principal, Optional[float]]],
+    ) -> Principal:
+        """
+        Return the cached principal for `token`, or call `load` (which
+        validates the token and queries the user) and cache its result.
+        `load` returns the principal and the token's exp timestamp.
+        """
+        self._ensure_subscribed()
+        key = self.key(scheme, token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                self._forget(key)
+
+        principal, token_expires = load()
+        expires = now + self.ttl_seconds
+        if token_expires is not None:
+            expires = min(expires, token_expires)
+
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = (expires, principal)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._forget(next(iter(self._entries)))
+        return principal
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._forget(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _forget(self, key: str) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1].id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1].id]
+
+    def _on_change(self, payload: dict) -> None:
+        user_id = payload.get("user_id")
+        if user_id is not None:
+            self.invalidate_user(user_id)
+
+    def _ensure_subscribed(self) -> None:
+        if self._subscribed:
+            return
+        with self._lock:
+            if not self._subscribed:
+                hub.subscribe(PRINCIPAL_CHANGES_CHANNEL, self._on_change)
+                self._subscribed = True
+
+
+principal_cache = PrincipalCache()
+
+
+# ─────────────────────────────────────────────
+# 🔄 Invalidation on user writes
+# ─────────────────────────────────────────────
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    # Drop locally right away; other workers drop when the transaction commits
+    principal_cache.invalidate_user(target.id)
+    notify(connection, PRINCIPAL_CHANGES_CHANNEL, {"user_id": target.id})
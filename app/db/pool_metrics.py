@@ -0,0 +1,134 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Checkouts that wait longer than this are logged as pool pressure
+DB_POOL_SLOW_WAIT_MS = int(os.getenv("DB_POOL_SLOW_WAIT_MS", "100"))
+
+
+class PoolMetrics:
+    """Checkout counters for one pool in this worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_checkout(self, waited: float, overflow: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if overflow:
+                self.overflow_checkouts += 1
+            if waited * 1000 >= DB_POOL_SLOW_WAIT_MS:
+                self.slow_checkouts += 1
+
+    def record_timeout(self, waited: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(
+                    1000 * self.wait_seconds / (self.checkouts or 1), 3
+                ),
+                "max_wait_ms": round(1000 * self.max_wait_seconds, 3),
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout, including the wait for a free
+    connection, which pool events cannot see since they fire afterwards.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        # A recreated pool inherits the listeners along with the dispatcher
+        if kwargs.get("_dispatch") is None:
+            event.listen(self, "connect", lambda *_: self.metrics.record_connect())
+            event.listen(
+                self, "invalidate", lambda *_: self.metrics.record_invalidation()
+            )
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same one
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            waited = time.perf_counter() - started
+            self.metrics.record_timeout(waited)
+            logger.warning(
+                f"DB pool exhausted after {waited:.1f}s "
+                f"({self.checkedout()} connections checked out)"
+            )
+            raise
+        waited = time.perf_counter() - started
+        self.metrics.record_checkout(waited, overflow=self.overflow() > 0)
+        if waited * 1000 >= DB_POOL_SLOW_WAIT_MS:
+            logger.info(f"Waited {waited * 1000:.0f}ms for a DB connection")
+        return connection
+
+
+def pool_stats(engine) -> dict:
+    """Configuration, live usage and counters of an engine's pool."""
+    pool = engine.pool
+    stats = {"pid": os.getpid(), "pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        size = pool.size()
+        max_overflow = pool._max_overflow
+        stats.update(
+            pool_size=size,
+            max_overflow=max_overflow,
+            timeout_seconds=pool.timeout(),
+            recycle_seconds=pool._recycle,
+            pre_ping=pool._pre_ping,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_connections=size + max_overflow if max_overflow >= 0 else None,
+        )
+        workers = os.getenv("WEB_CONCURRENCY")
+        if workers and max_overflow >= 0:
+            stats["max_connections_all_workers"] = int(workers) * (size + max_overflow)
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
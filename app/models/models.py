@@ -11,9 +11,17 @@ from sqlalchemy import (
     ForeignKey,
     CheckConstraint,
     Boolean,
+    Index,
+    BigInteger,
+    Sequence,
+    FetchedValue,
+    Date,
+    LargeBinary,
+    UniqueConstraint,
 )
-from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import declarative_base, deferred, relationship
+from sqlalchemy.sql import text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 import uuid
 
 Base = declarative_base()
@@ -53,6 +61,24 @@ class User(Base):
     )
 
 
+# ✅ Tenant Grants (stores a user may read besides their own, e.g. regional managers)
+class TenantGrant(Base):
+    __tablename__ = "tenant_grants"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tenant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    granted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+product_change_seq = Sequence("product_change_seq", metadata=Base.metadata)
+
+
 # ✅ Products Table
 class Product(Base):
     __tablename__ = "products"
@@ -63,6 +89,29 @@ class Product(Base):
     price = Column(Numeric(10, 2), nullable=False)
     category = Column(String(100))
     stock_quantity = Column(Integer, default=0)
+    # NULL falls back to services.stock_alerts.DEFAULT_LOW_STOCK_THRESHOLD
+    low_stock_threshold = Column(Integer, nullable=True)
+    # Bumped on every write; ORM flushes and stock deltas compare-and-swap on it
+    version = Column(Integer, nullable=False, server_default="1")
+    # Monotonic across all products; a trigger bumps it on every write so
+    # readers can fetch only rows changed since a watermark
+    change_seq = Column(
+        BigInteger,
+        server_default=product_change_seq.next_value(),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+    )
+    # Writer's transaction id, set by the same trigger. change_seq values can
+    # commit out of order; readers only trust rows below the oldest running
+    # transaction (see services.catalog_feed.change_horizon)
+    change_xid = Column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+    )
+    # Set on delete; the row and its dependents are removed by a purge job
+    deleted_at = Column(DateTime, nullable=True)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
 
     tenant = relationship("Tenant", back_populates="products")
@@ -75,6 +124,49 @@ class Product(Base):
     )
     returns = relationship("Return", back_populates="product", cascade="all, delete")
 
+    __table_args__ = (
+        # Serves the low-stock fallback query for per-product thresholds
+        Index(
+            "ix_products_low_stock",
+            "tenant_id",
+            "stock_quantity",
+            postgresql_where=text(
+                "stock_quantity <= COALESCE(low_stock_threshold, 10)"
+            ),
+        ),
+        Index("ix_products_tenant_change_seq", "tenant_id", "change_seq"),
+        Index("ix_products_tenant_change_xid", "tenant_id", "change_xid", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+
+# ✅ Product Tombstones (deleted products, for the catalog change feed)
+class ProductTombstone(Base):
+    __tablename__ = "product_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, nullable=False)
+    change_seq = Column(
+        BigInteger, server_default=product_change_seq.next_value(), nullable=False
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        nullable=False,
+    )
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
+
+    __table_args__ = (
+        Index("ix_product_tombstones_tenant_change_seq", "tenant_id", "change_seq"),
+        Index(
+            "ix_product_tombstones_tenant_change_xid",
+            "tenant_id",
+            "change_xid",
+            "product_id",
+        ),
+    )
+
 
 # ✅ Sales Table
 class Sale(Base):
@@ -87,8 +179,14 @@ class Sale(Base):
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
     payment_type = Column(String, nullable=False)
+    # Set on delete; the row and its dependents are removed by a purge job
+    deleted_at = Column(DateTime, nullable=True)
 
     cashier_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Drawer the sale was rung into, if the cashier had one open
+    cashier_session_id = Column(
+        Integer, ForeignKey("cashier_sessions.id"), nullable=True, index=True
+    )
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
 
     cashier = relationship("User")
@@ -97,6 +195,20 @@ class Sale(Base):
     items = relationship("SaleItem", back_populates="sale", cascade="all, delete")
     returns = relationship("Return", back_populates="sale", cascade="all, delete")
 
+    __table_args__ = (
+        # Covers the Z-report day totals without touching the heap; only
+        # live sales, as every reader filters deleted_at IS NULL
+        Index(
+            "ix_sales_tenant_timestamp",
+            "tenant_id",
+            "timestamp",
+            postgresql_include=["payment_type", "total_amount"],
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        # Latest edit or soft delete, for the analytics data watermark
+        Index("ix_sales_tenant_updated_at", "tenant_id", "updated_at"),
+    )
+
 
 # ✅ Sale Items Table
 class SaleItem(Base):
@@ -111,6 +223,12 @@ class SaleItem(Base):
     sale = relationship("Sale", back_populates="items")
     product = relationship("Product", back_populates="sale_items")
 
+    # Batched purges look dependents up by parent id
+    __table_args__ = (
+        Index("ix_sale_items_sale_id", "sale_id"),
+        Index("ix_sale_items_product_id", "product_id"),
+    )
+
 
 # ✅ Inventory Events Table
 class InventoryEvent(Base):
@@ -120,6 +238,9 @@ class InventoryEvent(Base):
     product_id = Column(Integer, ForeignKey("products.id"))
     change = Column(Integer, nullable=False)
     reason = Column(Text)
+    # 'sale' | 'return' | 'adjustment'; reference_id points at the sale/return
+    source = Column(String(20), nullable=False, default="adjustment")
+    reference_id = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
@@ -127,6 +248,34 @@ class InventoryEvent(Base):
     product = relationship("Product", back_populates="inventory_events")
     tenant = relationship("Tenant", back_populates="inventory_events")
 
+    __table_args__ = (
+        CheckConstraint(
+            "source IN ('sale', 'return', 'adjustment')",
+            name="inventory_events_source_check",
+        ),
+        Index("ix_inventory_events_product_id_id", "product_id", "id"),
+        Index("ix_inventory_events_tenant_created_at", "tenant_id", "created_at"),
+    )
+
+
+# ✅ Stock Snapshots (periodic checkpoints of the inventory ledger)
+class StockSnapshot(Base):
+    __tablename__ = "stock_snapshots"
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+    )
+    quantity = Column(Integer, nullable=False)
+    taken_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Last ledger row folded into `quantity`
+    last_event_id = Column(Integer, nullable=False, default=0)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
+
+    __table_args__ = (
+        Index("ix_stock_snapshots_product_taken_at", "product_id", "taken_at"),
+    )
+
 
 # ✅ Returns Table
 class Return(Base):
@@ -145,6 +294,11 @@ class Return(Base):
     sale = relationship("Sale", back_populates="returns")
     tenant = relationship("Tenant", back_populates="returns")
 
+    __table_args__ = (
+        Index("ix_returns_sale_id", "sale_id"),
+        Index("ix_returns_product_id", "product_id"),
+    )
+
 
 # ✅ Cashier Sessions
 class CashierSession(Base):
@@ -163,8 +317,95 @@ class CashierSession(Base):
     cash_difference = Column(Numeric(10, 2), nullable=True)
     is_over_short = Column(Boolean, default=False)
 
+    # Running drawer totals, incremented atomically as sales/returns land
+    cash_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    card_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    sale_count = Column(Integer, nullable=False, default=0, server_default="0")
+    refund_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    refund_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # The part of refund_total handed back out of the drawer
+    cash_refund_total = Column(
+        Numeric(12, 2), nullable=False, default=0, server_default="0"
+    )
+    last_activity_at = Column(DateTime, nullable=True)
+
     notes = Column(Text)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
 
     cashier = relationship("User")
     tenant = relationship("Tenant", back_populates="cashier_sessions")
+
+    __table_args__ = (
+        # One lookup per sale: the cashier's open drawer
+        Index(
+            "ix_cashier_sessions_open",
+            "cashier_id",
+            "tenant_id",
+            postgresql_where=text("closed_at IS NULL"),
+        ),
+    )
+
+
+# ✅ Frozen Z-Reports (closed business days)
+class ZReportSnapshot(Base):
+    __tablename__ = "zreport_snapshots"
+
+    id = Column(Integer, primary_key=True)
+    report_date = Column(Date, nullable=False)
+    report = Column(JSONB, nullable=False)
+    csv = Column(Text, nullable=False)
+    pdf = Column(LargeBinary, nullable=True)  # rendered on first request
+    frozen_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Set by triggers when a late write lands on report_date
+    stale = Column(Boolean, nullable=False, default=False, server_default="false")
+    # Bumped by the same triggers; a freeze only clears `stale` if unchanged
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "report_date", name="uq_zreport_snapshots_tenant_date"
+        ),
+    )
+
+
+# ✅ Background Jobs (reports, exports, imports; run by scripts/job_worker.py)
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    priority = Column(Integer, nullable=False, default=0)  # higher runs first
+    params = Column(JSONB, nullable=False, default=dict)
+    # Payloads load only when read, so status polling stays cheap
+    input_data = deferred(Column(LargeBinary, nullable=True))  # e.g. an upload
+    progress = Column(Integer, nullable=False, default=0)  # percent
+    progress_message = Column(String(255), nullable=True)
+    result = Column(JSONB, nullable=True)
+    result_data = deferred(Column(LargeBinary, nullable=True))
+    result_media_type = Column(String(100), nullable=True)
+    result_filename = Column(String(255), nullable=True)
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker = Column(String(100), nullable=True)
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # last sign of life while running
+    finished_at = Column(DateTime, nullable=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('queued', 'running', 'done', 'failed')",
+            name="jobs_status_check",
+        ),
+        # Workers claim from the queued rows only, best priority first
+        Index(
+            "ix_jobs_queued",
+            text("priority DESC"),
+            "id",
+            postgresql_where=text("status = 'queued'"),
+        ),
+    )
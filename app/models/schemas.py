@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import datetime, date
 from pydantic import BaseModel
 from decimal import Decimal
@@ -46,6 +46,7 @@ class ProductCreate(BaseModel):
     price: float
     category: str
     stock_quantity: int
+    low_stock_threshold: Optional[int] = None
     tenant_id: Optional[UUID] = None
 
 
@@ -56,11 +57,44 @@ class ProductOut(BaseModel):
     price: float
     category: str
     stock_quantity: int
+    low_stock_threshold: Optional[int] = None
+    version: int = 1
     tenant_id: Optional[UUID] = None
 
     model_config = {"from_attributes": True}
 
 
+class ProductUpdate(BaseModel):
+    # Stock is changed through inventory events, not edits
+    name: Optional[str] = None
+    sku: Optional[str] = None
+    price: Optional[float] = None
+    category: Optional[str] = None
+    low_stock_threshold: Optional[int] = None
+    version: int  # version the edit was based on
+
+
+class ProductChangesOut(BaseModel):
+    watermark: str
+    has_more: bool
+    columns: List[str]
+    rows: List[list]
+    deleted: List[int]
+
+
+class CatalogImportError(BaseModel):
+    line: int
+    sku: str
+    error: str
+
+
+class CatalogImportResult(BaseModel):
+    rows_read: int
+    inserted: int
+    updated: int
+    errors: List[CatalogImportError]
+
+
 class InventoryEventIn(BaseModel):
     product_id: int
     change: int
@@ -72,12 +106,31 @@ class InventoryEventOut(BaseModel):
     product_id: int
     change: int
     reason: Optional[str]
+    source: str = "adjustment"
+    reference_id: Optional[int] = None
     created_at: datetime
     tenant_id: Optional[UUID] = None
 
     model_config = {"from_attributes": True}
 
 
+class StockLevelOut(BaseModel):
+    product_id: int
+    name: str
+    quantity: int
+
+
+class ShrinkReportRow(BaseModel):
+    product_id: int
+    name: str
+    opening_stock: int
+    sold: int
+    returned: int
+    received: int
+    shrink: int
+    closing_stock: int
+
+
 # --------------------
 # 💰 Sales & Items
 # --------------------
@@ -300,7 +353,56 @@ class CashierSessionOut(BaseModel):
     system_cash_total: Optional[Decimal]
     cash_difference: Optional[Decimal]
     is_over_short: Optional[bool]
+    cash_total: Decimal = Decimal("0")
+    card_total: Decimal = Decimal("0")
+    sale_count: int = 0
+    refund_total: Decimal = Decimal("0")
+    refund_count: int = 0
+    cash_refund_total: Decimal = Decimal("0")
+    last_activity_at: Optional[datetime] = None
     notes: Optional[str]
     tenant_id: Optional[UUID] = None
 
     model_config = {"from_attributes": True}
+
+
+# --------------------
+# 🗑️ Purge Jobs
+# --------------------
+
+
+class PurgeJobOut(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    status: str
+    rows_deleted: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+# --------------------
+# 🕒 Background Jobs
+# --------------------
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    priority: int
+    progress: int
+    progress_message: Optional[str] = None
+    result: Optional[Any] = None
+    has_file: bool = False
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
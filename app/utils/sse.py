@@ -0,0 +1,56 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from services.notifications import hub
+
+# Comment line sent when idle so proxies keep the stream open
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Stream already-formatted events, unbuffered by proxies."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def channel_stream(
+    request: Request,
+    channel: str,
+    snapshot: Callable[[], Any],
+    transform: Callable[[dict], Optional[Tuple[str, Any]]],
+) -> StreamingResponse:
+    """
+    Server-Sent Events response: one "snapshot" event built by `snapshot`
+    (run in the threadpool), then one event per notification on `channel`
+    that `transform` maps to (event, data); None skips the notification.
+    Subscribes before the snapshot so nothing falls in between.
+    """
+
+    async def events():
+        with hub.queue(channel) as notifications:
+            yield sse_event("snapshot", await run_in_threadpool(snapshot))
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(
+                        notifications.get(), timeout=SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                event = transform(payload)
+                if event is not None:
+                    yield sse_event(*event)
+
+    return sse_response(events())
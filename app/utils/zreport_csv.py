@@ -1,13 +1,14 @@
 import csv
 from io import StringIO
-from typing import List
+from typing import List, TextIO
 from datetime import date
 from decimal import Decimal
 
 from schemas.manager_closeout import SessionSummary, TopSeller
 
 
-def generate_zreport_csv(
+def write_zreport_csv(
+    out: TextIO,
     report_date: date,
     total_sales: Decimal,
     total_cash: Decimal,
@@ -15,9 +16,9 @@ def generate_zreport_csv(
     total_returns: Decimal,
     sessions: List[SessionSummary],
     top_sellers: List[TopSeller],
-) -> str:
-    output = StringIO()
-    writer = csv.writer(output)
+) -> None:
+    """Write the Z-report CSV row by row to any text stream."""
+    writer = csv.writer(out)
 
     writer.writerow(["Z-Report Summary"])
     writer.writerow(["Date", report_date])
@@ -63,4 +64,25 @@ def generate_zreport_csv(
     for p in top_sellers:
         writer.writerow([p.product_id, p.name, p.units_sold])
 
+
+def generate_zreport_csv(
+    report_date: date,
+    total_sales: Decimal,
+    total_cash: Decimal,
+    total_card: Decimal,
+    total_returns: Decimal,
+    sessions: List[SessionSummary],
+    top_sellers: List[TopSeller],
+) -> str:
+    output = StringIO()
+    write_zreport_csv(
+        output,
+        report_date,
+        total_sales,
+        total_cash,
+        total_card,
+        total_returns,
+        sessions,
+        top_sellers,
+    )
     return output.getvalue()
@@ -5,12 +5,14 @@
 # ────────────────
 import os
 import logging
+from contextlib import asynccontextmanager
 
 # ────────────────
 # Third-party packages
 # ────────────────
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 # ────────────────
 # Internal imports
@@ -18,6 +20,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.logging_config import logger
 from app.db.database import engine
 from app.models.models import Base
+from services.langchain_agent import warm_up as warm_up_ai
 
 # ────────────────
 # Route imports
@@ -33,6 +36,8 @@ from routes.returns import router as returns_router
 from routes.cashier_session import router as cashier_session_router
 from routes.manager_closeout import router as manager_closeout_router
 from routes.ai import router as ai_router
+from routes.jobs import router as jobs_router
+from routes.metrics import router as metrics_router
 
 # ─────────────────────────────
 # Logging Setup
@@ -52,10 +57,19 @@ logger = logging.getLogger(__name__)
 # ─────────────────────────────
 # Base.metadata.create_all(bind=engine)  # Enable for local dev if needed
 
+
 # ─────────────────────────────
 # FastAPI Initialization
 # ─────────────────────────────
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the AI agent after boot, off the request path
+    warm_up_ai()
+    yield
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Anchor POS API",
     description="Backend API for Anchor POS and Analytics Platform",
     version="1.0.0",
@@ -70,6 +84,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger payloads (catalog sync, snapshots); SSE streams are exempt
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 # Health Check Route
 @app.get("/", tags=["Health"])
@@ -95,5 +112,7 @@ app.include_router(
 app.include_router(
     manager_closeout_router, prefix="/api/manager_closeouts", tags=["Manager Closeouts"]
 )
+app.include_router(jobs_router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(metrics_router, prefix="/api/metrics", tags=["Metrics"])
 
 logger.info("✅ FastAPI app initialized and routers registered.")
@@ -0,0 +1,74 @@
+"""Product tombstones for the catalog change feed
+
+Revision ID: 1b6f92d8e0a4
+Revises: e8d35b1f4c72
+Create Date: 2026-10-19 15:18:09.447103
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1b6f92d8e0a4"
+down_revision: Union[str, Sequence[str], None] = "e8d35b1f4c72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "product_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "change_seq",
+            sa.BigInteger(),
+            nullable=False,
+            server_default=sa.text("nextval('product_change_seq')"),
+        ),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_product_tombstones_tenant_change_seq",
+        "product_tombstones",
+        ["tenant_id", "change_seq"],
+        unique=False,
+    )
+
+    op.execute(
+        """
+        CREATE FUNCTION products_record_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO product_tombstones (product_id, deleted_at, tenant_id)
+            VALUES (OLD.id, now() AT TIME ZONE 'utc', OLD.tenant_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER products_record_tombstone
+        AFTER DELETE ON products
+        FOR EACH ROW EXECUTE FUNCTION products_record_tombstone()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER products_record_tombstone ON products")
+    op.execute("DROP FUNCTION products_record_tombstone()")
+    op.drop_index(
+        "ix_product_tombstones_tenant_change_seq", table_name="product_tombstones"
+    )
+    op.drop_table("product_tombstones")
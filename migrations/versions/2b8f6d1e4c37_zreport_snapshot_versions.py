@@ -0,0 +1,94 @@
+"""Version Z-report snapshots and narrow the cashier session trigger
+
+Revision ID: 2b8f6d1e4c37
+Revises: 9d3f5b7e2a41
+Create Date: 2026-10-20 14:02:17.530961
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2b8f6d1e4c37"
+down_revision: Union[str, Sequence[str], None] = "9d3f5b7e2a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Session columns the Z-report shows; the running drawer totals are
+# updated on every sale and are not among them
+SESSION_REPORT_COLUMNS = (
+    "cashier_id",
+    "opened_at",
+    "closed_at",
+    "opening_cash",
+    "closing_cash",
+    "system_cash_total",
+    "cash_difference",
+    "is_over_short",
+    "tenant_id",
+)
+
+
+def _mark_stale_function(set_clause: str, condition: str) -> str:
+    return f"""
+        CREATE OR REPLACE FUNCTION zreport_mark_stale() RETURNS trigger AS $$
+        DECLARE
+            affected record;
+        BEGIN
+            FOR affected IN
+                SELECT (to_jsonb(r) ->> 'tenant_id')::uuid AS tenant_id,
+                       (to_jsonb(r) ->> TG_ARGV[0])::timestamp::date AS day
+                FROM (SELECT NEW AS r WHERE TG_OP <> 'DELETE'
+                      UNION ALL
+                      SELECT OLD WHERE TG_OP <> 'INSERT') changed(r)
+            LOOP
+                UPDATE zreport_snapshots
+                SET {set_clause}
+                WHERE tenant_id = affected.tenant_id
+                  AND report_date = affected.day{condition};
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "zreport_snapshots",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Every late write bumps the version, stale or not, so a freeze that
+    # started before the write cannot mark its result fresh
+    op.execute(_mark_stale_function("stale = true, version = version + 1", ""))
+
+    op.execute("DROP TRIGGER cashier_sessions_zreport_mark_stale ON cashier_sessions")
+    op.execute(
+        f"""
+        CREATE TRIGGER cashier_sessions_zreport_mark_stale
+        AFTER INSERT OR DELETE OR UPDATE OF {", ".join(SESSION_REPORT_COLUMNS)}
+        ON cashier_sessions
+        FOR EACH ROW EXECUTE FUNCTION zreport_mark_stale('opened_at')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER cashier_sessions_zreport_mark_stale ON cashier_sessions")
+    op.execute(
+        """
+        CREATE TRIGGER cashier_sessions_zreport_mark_stale
+        AFTER INSERT OR UPDATE OR DELETE ON cashier_sessions
+        FOR EACH ROW EXECUTE FUNCTION zreport_mark_stale('opened_at')
+        """
+    )
+    op.execute(
+        _mark_stale_function("stale = true", "\n                  AND NOT stale")
+    )
+    op.drop_column("zreport_snapshots", "version")
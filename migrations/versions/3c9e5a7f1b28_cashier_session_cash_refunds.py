@@ -0,0 +1,43 @@
+"""Track refunds paid out of the drawer separately
+
+Revision ID: 3c9e5a7f1b28
+Revises: 8f4c2a6e1d93
+Create Date: 2026-10-21 09:14:52.306187
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9e5a7f1b28"
+down_revision: Union[str, Sequence[str], None] = "8f4c2a6e1d93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "cashier_sessions",
+        sa.Column(
+            "cash_refund_total", sa.Numeric(12, 2), nullable=False, server_default="0"
+        ),
+    )
+    # Refunds were not recorded with their tender; drawers still open keep
+    # expecting what they expected before, every refund paid in cash
+    op.execute(
+        """
+        UPDATE cashier_sessions
+        SET cash_refund_total = refund_total
+        WHERE closed_at IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("cashier_sessions", "cash_refund_total")
@@ -0,0 +1,35 @@
+"""Add keyset index for the inventory snapshot
+
+Revision ID: 3f1c8a2d9b47
+Revises: ce5deaa2ffbe
+Create Date: 2026-10-19 09:12:04.118230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c8a2d9b47"
+down_revision: Union[str, Sequence[str], None] = "ce5deaa2ffbe"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Matches the (category, name, id) ordering used by the snapshot cursor
+    op.create_index(
+        "ix_products_tenant_snapshot_order",
+        "products",
+        ["tenant_id", sa.text("coalesce(category, '')"), "name", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_tenant_snapshot_order", table_name="products")
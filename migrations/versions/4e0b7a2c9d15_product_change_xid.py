@@ -0,0 +1,83 @@
+"""Writer transaction id on product changes
+
+Revision ID: 4e0b7a2c9d15
+Revises: b3e9d4a7c1f6
+Create Date: 2026-10-20 09:12:44.208117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4e0b7a2c9d15"
+down_revision: Union[str, Sequence[str], None] = "b3e9d4a7c1f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# change_seq is drawn when a row is written, not when it commits, so a
+# lower value can become visible after a higher one was already read. The
+# writer's transaction id lets readers stop below the oldest transaction
+# still in flight (pg_snapshot_xmin), past which nothing can appear late.
+CURRENT_XID = sa.text("pg_current_xact_id()::text::bigint")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("products", "product_tombstones"):
+        op.add_column(
+            table,
+            sa.Column(
+                "change_xid",
+                sa.BigInteger(),
+                nullable=False,
+                server_default=CURRENT_XID,
+            ),
+        )
+    op.create_index(
+        "ix_products_tenant_change_xid",
+        "products",
+        ["tenant_id", "change_xid", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_product_tombstones_tenant_change_xid",
+        "product_tombstones",
+        ["tenant_id", "change_xid", "product_id"],
+        unique=False,
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION products_bump_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := nextval('product_change_seq');
+            NEW.change_xid := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION products_bump_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := nextval('product_change_seq');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.drop_index(
+        "ix_product_tombstones_tenant_change_xid", table_name="product_tombstones"
+    )
+    op.drop_index("ix_products_tenant_change_xid", table_name="products")
+    op.drop_column("product_tombstones", "change_xid")
+    op.drop_column("products", "change_xid")
@@ -0,0 +1,32 @@
+"""Add optimistic-concurrency version to products
+
+Revision ID: 5a9e07c3d21b
+Revises: c47d1e9f2a60
+Create Date: 2026-10-19 12:41:53.270118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a9e07c3d21b"
+down_revision: Union[str, Sequence[str], None] = "c47d1e9f2a60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "products",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("products", "version")
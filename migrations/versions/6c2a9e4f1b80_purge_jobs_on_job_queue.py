@@ -0,0 +1,82 @@
+"""Run purges on the background job queue
+
+Revision ID: 6c2a9e4f1b80
+Revises: 4e0b7a2c9d15
+Create Date: 2026-10-20 10:03:27.915460
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6c2a9e4f1b80"
+down_revision: Union[str, Sequence[str], None] = "4e0b7a2c9d15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Unfinished purges carry over as queued jobs; purging is idempotent
+    op.execute(
+        """
+        INSERT INTO jobs (
+            kind, status, priority, params, progress, attempts,
+            requested_by, created_at, tenant_id
+        )
+        SELECT 'purge', 'queued', -10,
+               jsonb_build_object('entity', entity, 'entity_id', entity_id),
+               0, 0, requested_by, created_at, tenant_id
+        FROM purge_jobs
+        WHERE status <> 'done'
+        ORDER BY id
+        """
+    )
+    op.drop_table("purge_jobs")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table(
+        "purge_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("rows_deleted", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("requested_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.CheckConstraint(
+            "entity IN ('product', 'sale')", name="purge_jobs_entity_check"
+        ),
+        sa.CheckConstraint(
+            "status IN ('queued', 'running', 'done', 'failed')",
+            name="purge_jobs_status_check",
+        ),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        """
+        INSERT INTO purge_jobs (
+            entity, entity_id, status, rows_deleted, requested_by,
+            created_at, tenant_id
+        )
+        SELECT params->>'entity', (params->>'entity_id')::int, 'queued', 0,
+               requested_by, created_at, tenant_id
+        FROM jobs
+        WHERE kind = 'purge' AND status IN ('queued', 'running', 'failed')
+        ORDER BY id
+        """
+    )
+    op.execute("DELETE FROM jobs WHERE kind = 'purge'")
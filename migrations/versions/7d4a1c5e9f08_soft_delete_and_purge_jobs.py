@@ -0,0 +1,68 @@
+"""Soft delete for products and sales, background purge jobs
+
+Revision ID: 7d4a1c5e9f08
+Revises: 1b6f92d8e0a4
+Create Date: 2026-10-19 16:02:41.518230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d4a1c5e9f08"
+down_revision: Union[str, Sequence[str], None] = "1b6f92d8e0a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("products", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.add_column("sales", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+
+    op.create_table(
+        "purge_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("rows_deleted", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("requested_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.CheckConstraint(
+            "entity IN ('product', 'sale')", name="purge_jobs_entity_check"
+        ),
+        sa.CheckConstraint(
+            "status IN ('queued', 'running', 'done', 'failed')",
+            name="purge_jobs_status_check",
+        ),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # Each purge batch selects dependents by parent id
+    op.create_index("ix_sale_items_sale_id", "sale_items", ["sale_id"])
+    op.create_index("ix_sale_items_product_id", "sale_items", ["product_id"])
+    op.create_index("ix_returns_sale_id", "returns", ["sale_id"])
+    op.create_index("ix_returns_product_id", "returns", ["product_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_returns_product_id", table_name="returns")
+    op.drop_index("ix_returns_sale_id", table_name="returns")
+    op.drop_index("ix_sale_items_product_id", table_name="sale_items")
+    op.drop_index("ix_sale_items_sale_id", table_name="sale_items")
+    op.drop_table("purge_jobs")
+    op.drop_column("sales", "deleted_at")
+    op.drop_column("products", "deleted_at")
@@ -0,0 +1,87 @@
+"""Stock ledger sources and periodic stock snapshots
+
+Revision ID: 8b2e4f6a1c93
+Revises: 3f1c8a2d9b47
+Create Date: 2026-10-19 10:02:41.532871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b2e4f6a1c93"
+down_revision: Union[str, Sequence[str], None] = "3f1c8a2d9b47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "inventory_events",
+        sa.Column(
+            "source",
+            sa.String(length=20),
+            nullable=False,
+            server_default="adjustment",
+        ),
+    )
+    op.add_column(
+        "inventory_events", sa.Column("reference_id", sa.Integer(), nullable=True)
+    )
+    op.create_check_constraint(
+        "inventory_events_source_check",
+        "inventory_events",
+        "source IN ('sale', 'return', 'adjustment')",
+    )
+    op.create_index(
+        "ix_inventory_events_product_id_id",
+        "inventory_events",
+        ["product_id", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_inventory_events_tenant_created_at",
+        "inventory_events",
+        ["tenant_id", "created_at"],
+        unique=False,
+    )
+
+    op.create_table(
+        "stock_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("taken_at", sa.DateTime(), nullable=False),
+        sa.Column("last_event_id", sa.Integer(), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_stock_snapshots_product_taken_at",
+        "stock_snapshots",
+        ["product_id", "taken_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_stock_snapshots_product_taken_at", table_name="stock_snapshots")
+    op.drop_table("stock_snapshots")
+    op.drop_index(
+        "ix_inventory_events_tenant_created_at", table_name="inventory_events"
+    )
+    op.drop_index("ix_inventory_events_product_id_id", table_name="inventory_events")
+    op.drop_constraint(
+        "inventory_events_source_check", "inventory_events", type_="check"
+    )
+    op.drop_column("inventory_events", "reference_id")
+    op.drop_column("inventory_events", "source")
@@ -0,0 +1,28 @@
+"""Index sales by latest update for the analytics watermark
+
+Revision ID: 8f4c2a6e1d93
+Revises: 7e1a3c5b9d62
+Create Date: 2026-10-20 16:37:05.114872
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8f4c2a6e1d93"
+down_revision: Union[str, Sequence[str], None] = "7e1a3c5b9d62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_sales_tenant_updated_at", "sales", ["tenant_id", "updated_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sales_tenant_updated_at", table_name="sales")
@@ -0,0 +1,44 @@
+"""Limit the sales day-totals index to live rows
+
+Revision ID: 9d3f5b7e2a41
+Revises: 6c2a9e4f1b80
+Create Date: 2026-10-20 11:26:51.384020
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d3f5b7e2a41"
+down_revision: Union[str, Sequence[str], None] = "6c2a9e4f1b80"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every day-totals query filters deleted_at IS NULL, which the covering
+    # index could not answer without visiting the heap
+    op.drop_index("ix_sales_tenant_timestamp", table_name="sales")
+    op.create_index(
+        "ix_sales_tenant_timestamp",
+        "sales",
+        ["tenant_id", "timestamp"],
+        postgresql_include=["payment_type", "total_amount"],
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sales_tenant_timestamp", table_name="sales")
+    op.create_index(
+        "ix_sales_tenant_timestamp",
+        "sales",
+        ["tenant_id", "timestamp"],
+        postgresql_include=["payment_type", "total_amount"],
+    )
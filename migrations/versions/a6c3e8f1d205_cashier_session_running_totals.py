@@ -0,0 +1,108 @@
+"""Running totals on cashier sessions
+
+Revision ID: a6c3e8f1d205
+Revises: 7d4a1c5e9f08
+Create Date: 2026-10-19 16:47:12.904318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a6c3e8f1d205"
+down_revision: Union[str, Sequence[str], None] = "7d4a1c5e9f08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, type_ in (
+        ("cash_total", sa.Numeric(12, 2)),
+        ("card_total", sa.Numeric(12, 2)),
+        ("sale_count", sa.Integer()),
+        ("refund_total", sa.Numeric(12, 2)),
+        ("refund_count", sa.Integer()),
+    ):
+        op.add_column(
+            "cashier_sessions",
+            sa.Column(name, type_, nullable=False, server_default="0"),
+        )
+    op.add_column(
+        "cashier_sessions", sa.Column("last_activity_at", sa.DateTime(), nullable=True)
+    )
+    op.create_index(
+        "ix_cashier_sessions_open",
+        "cashier_sessions",
+        ["cashier_id", "tenant_id"],
+        postgresql_where=sa.text("closed_at IS NULL"),
+    )
+
+    op.add_column("sales", sa.Column("cashier_session_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "sales_cashier_session_id_fkey",
+        "sales",
+        "cashier_sessions",
+        ["cashier_session_id"],
+        ["id"],
+    )
+    op.create_index(
+        op.f("ix_sales_cashier_session_id"), "sales", ["cashier_session_id"]
+    )
+
+    # Attach existing sales to the drawer that was open when they were rung
+    op.execute(
+        """
+        UPDATE sales s
+        SET cashier_session_id = cs.id
+        FROM cashier_sessions cs
+        WHERE s.cashier_id = cs.cashier_id
+          AND s.tenant_id = cs.tenant_id
+          AND s.timestamp >= cs.opened_at
+          AND s.timestamp <= COALESCE(cs.closed_at, now() AT TIME ZONE 'utc')
+          AND s.deleted_at IS NULL
+        """
+    )
+    op.execute(
+        """
+        UPDATE cashier_sessions cs
+        SET cash_total = t.cash_total,
+            card_total = t.card_total,
+            sale_count = t.sale_count,
+            last_activity_at = t.last_sale_at
+        FROM (
+            SELECT cashier_session_id,
+                   COALESCE(SUM(total_amount) FILTER (WHERE payment_type = 'cash'), 0)
+                       AS cash_total,
+                   COALESCE(SUM(total_amount) FILTER (WHERE payment_type = 'card'), 0)
+                       AS card_total,
+                   COUNT(*) AS sale_count,
+                   MAX(timestamp) AS last_sale_at
+            FROM sales
+            WHERE cashier_session_id IS NOT NULL
+            GROUP BY cashier_session_id
+        ) t
+        WHERE t.cashier_session_id = cs.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_sales_cashier_session_id"), table_name="sales")
+    op.drop_constraint("sales_cashier_session_id_fkey", "sales", type_="foreignkey")
+    op.drop_column("sales", "cashier_session_id")
+    op.drop_index("ix_cashier_sessions_open", table_name="cashier_sessions")
+    for name in (
+        "last_activity_at",
+        "refund_count",
+        "refund_total",
+        "sale_count",
+        "card_total",
+        "cash_total",
+    ):
+        op.drop_column("cashier_sessions", name)
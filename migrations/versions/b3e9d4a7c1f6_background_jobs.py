@@ -0,0 +1,68 @@
+"""Background job queue
+
+Revision ID: b3e9d4a7c1f6
+Revises: f5b8c2e7a914
+Create Date: 2026-10-19 18:41:07.335102
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3e9d4a7c1f6"
+down_revision: Union[str, Sequence[str], None] = "f5b8c2e7a914"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("params", postgresql.JSONB(), nullable=False),
+        sa.Column("input_data", sa.LargeBinary(), nullable=True),
+        sa.Column("progress", sa.Integer(), nullable=False),
+        sa.Column("progress_message", sa.String(length=255), nullable=True),
+        sa.Column("result", postgresql.JSONB(), nullable=True),
+        sa.Column("result_data", sa.LargeBinary(), nullable=True),
+        sa.Column("result_media_type", sa.String(length=100), nullable=True),
+        sa.Column("result_filename", sa.String(length=255), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("worker", sa.String(length=100), nullable=True),
+        sa.Column("requested_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.CheckConstraint(
+            "status IN ('queued', 'running', 'done', 'failed')",
+            name="jobs_status_check",
+        ),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Claim order for workers; small because finished jobs fall out of it
+    op.create_index(
+        "ix_jobs_queued",
+        "jobs",
+        [sa.text("priority DESC"), "id"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_jobs_queued", table_name="jobs")
+    op.drop_table("jobs")
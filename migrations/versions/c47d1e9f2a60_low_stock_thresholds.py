@@ -0,0 +1,39 @@
+"""Per-product low-stock thresholds and partial index
+
+Revision ID: c47d1e9f2a60
+Revises: 8b2e4f6a1c93
+Create Date: 2026-10-19 11:20:16.904415
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c47d1e9f2a60"
+down_revision: Union[str, Sequence[str], None] = "8b2e4f6a1c93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "products", sa.Column("low_stock_threshold", sa.Integer(), nullable=True)
+    )
+    op.create_index(
+        "ix_products_low_stock",
+        "products",
+        ["tenant_id", "stock_quantity"],
+        unique=False,
+        postgresql_where=sa.text("stock_quantity <= COALESCE(low_stock_threshold, 10)"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_low_stock", table_name="products")
+    op.drop_column("products", "low_stock_threshold")
@@ -0,0 +1,33 @@
+"""Covering index for per-day sales totals
+
+Revision ID: d2f7b9a4c613
+Revises: a6c3e8f1d205
+Create Date: 2026-10-19 17:21:05.337914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2f7b9a4c613"
+down_revision: Union[str, Sequence[str], None] = "a6c3e8f1d205"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_sales_tenant_timestamp",
+        "sales",
+        ["tenant_id", "timestamp"],
+        postgresql_include=["payment_type", "total_amount"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sales_tenant_timestamp", table_name="sales")
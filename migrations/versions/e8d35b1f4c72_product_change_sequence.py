@@ -0,0 +1,104 @@
+"""Product change sequence and catalog change notifications
+
+Revision ID: e8d35b1f4c72
+Revises: 5a9e07c3d21b
+Create Date: 2026-10-19 14:05:37.661904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8d35b1f4c72"
+down_revision: Union[str, Sequence[str], None] = "5a9e07c3d21b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE SEQUENCE product_change_seq")
+    op.add_column(
+        "products",
+        sa.Column(
+            "change_seq",
+            sa.BigInteger(),
+            nullable=False,
+            server_default=sa.text("nextval('product_change_seq')"),
+        ),
+    )
+    op.create_index(
+        "ix_products_tenant_change_seq",
+        "products",
+        ["tenant_id", "change_seq"],
+        unique=False,
+    )
+
+    # Every write, whichever path it comes from (ORM, Core updates, COPY
+    # imports), moves the row past all existing watermarks...
+    op.execute(
+        """
+        CREATE FUNCTION products_bump_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := nextval('product_change_seq');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER products_bump_change_seq
+        BEFORE UPDATE ON products
+        FOR EACH ROW EXECUTE FUNCTION products_bump_change_seq()
+        """
+    )
+
+    # ...and tells every worker's catalog cache once the transaction commits
+    op.execute(
+        """
+        CREATE FUNCTION products_notify_change() RETURNS trigger AS $$
+        DECLARE
+            changed products%ROWTYPE;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+            PERFORM pg_notify(
+                'catalog_changes',
+                json_build_object(
+                    'op', TG_OP,
+                    'tenant_id', changed.tenant_id,
+                    'product_id', changed.id,
+                    'change_seq', changed.change_seq
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER products_notify_change
+        AFTER INSERT OR UPDATE OR DELETE ON products
+        FOR EACH ROW EXECUTE FUNCTION products_notify_change()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER products_notify_change ON products")
+    op.execute("DROP FUNCTION products_notify_change()")
+    op.execute("DROP TRIGGER products_bump_change_seq ON products")
+    op.execute("DROP FUNCTION products_bump_change_seq()")
+    op.drop_index("ix_products_tenant_change_seq", table_name="products")
+    op.drop_column("products", "change_seq")
+    op.execute("DROP SEQUENCE product_change_seq")
@@ -0,0 +1,93 @@
+"""Frozen Z-report snapshots with late-write invalidation
+
+Revision ID: f5b8c2e7a914
+Revises: d2f7b9a4c613
+Create Date: 2026-10-19 17:58:44.160927
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f5b8c2e7a914"
+down_revision: Union[str, Sequence[str], None] = "d2f7b9a4c613"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables feeding the Z-report and the column that places a row on a day
+STALE_TRIGGERS = {
+    "sales": "timestamp",
+    "returns": "timestamp",
+    "cashier_sessions": "opened_at",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "zreport_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("report_date", sa.Date(), nullable=False),
+        sa.Column("report", postgresql.JSONB(), nullable=False),
+        sa.Column("csv", sa.Text(), nullable=False),
+        sa.Column("pdf", sa.LargeBinary(), nullable=True),
+        sa.Column("frozen_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "stale", sa.Boolean(), nullable=False, server_default=sa.text("false")
+        ),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "tenant_id", "report_date", name="uq_zreport_snapshots_tenant_date"
+        ),
+    )
+
+    # A write placing a row on an already-frozen day marks that day's
+    # snapshot stale; writes for today match no snapshot and cost one
+    # index probe. TG_ARGV[0] names the row's date column.
+    op.execute(
+        """
+        CREATE FUNCTION zreport_mark_stale() RETURNS trigger AS $$
+        DECLARE
+            affected record;
+        BEGIN
+            FOR affected IN
+                SELECT (to_jsonb(r) ->> 'tenant_id')::uuid AS tenant_id,
+                       (to_jsonb(r) ->> TG_ARGV[0])::timestamp::date AS day
+                FROM (SELECT NEW AS r WHERE TG_OP <> 'DELETE'
+                      UNION ALL
+                      SELECT OLD WHERE TG_OP <> 'INSERT') changed(r)
+            LOOP
+                UPDATE zreport_snapshots
+                SET stale = true
+                WHERE tenant_id = affected.tenant_id
+                  AND report_date = affected.day
+                  AND NOT stale;
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    for table, column in STALE_TRIGGERS.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_zreport_mark_stale
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION zreport_mark_stale('{column}')
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in STALE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_zreport_mark_stale ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS zreport_mark_stale()")
+    op.drop_table("zreport_snapshots")
@@ -1,19 +1,24 @@
 # routes/ai.py
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import os
+from typing import Tuple
+import asyncio
 import json
 import logging
-from openai import OpenAI
 
-from app.db.database import get_db
-from services.langchain_agent import run_sql_agent
-from services.ai_functions import (
-    get_top_margin_products,
-    get_top_category,
+from app.db.database import SessionLocal, get_db
+from app.utils.sse import SSE_HEARTBEAT_SECONDS, sse_event, sse_response
+from services.ai_cache import answer_cache
+from services.analytics_queries import data_watermark
+from services.langchain_agent import (
+    OPENAI_CHAT_MODEL,
+    ask_sql_agent,
+    get_async_openai_client,
 )
+from services.ai_functions import call_ai_function, function_definitions
 from app.auth.dependencies import get_current_user
 
 router = APIRouter()
@@ -25,26 +30,68 @@ class AiPrompt(BaseModel):
     mode: str = "auto"  # Options: "sql" | "function" | "auto"
 
 
-function_definitions = [
-    {
-        "name": "get_top_margin_products",
-        "description": "Get top-selling products by margin over a given time window",
-        "parameters": {
-            "type": "object",
-            "properties": {"days": {"type": "integer", "default": 30}},
-            "required": [],
-        },
-    },
-    {
-        "name": "get_top_category",
-        "description": "Return the top-selling category by total margin or revenue over a period",
-        "parameters": {
-            "type": "object",
-            "properties": {"days": {"type": "integer", "default": 30}},
-            "required": [],
-        },
-    },
-]
+SYSTEM_PROMPT = (
+    "You are a helpful assistant manager with the ability to answer "
+    "questions for retail sales and business intelligence."
+)
+AI_MODES = {"sql", "function", "auto"}
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in AI_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode '{mode}'. Use 'sql', 'function', or 'auto'.",
+        )
+
+
+def _messages(prompt: str) -> list:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _cached_sql_answer(prompt: str, tenant_id, watermark: str) -> Tuple[str, list]:
+    """
+    Run the SQL agent (in a worker thread) and cache its answer, even if the
+    client has gone by the time it finishes: the next asker gets it free.
+    """
+    answer, queries = ask_sql_agent(prompt, tenant_id)
+    answer_cache.put(tenant_id, "sql", prompt, watermark, answer, queries)
+    return answer, queries
+
+
+async def _function_answer(prompt: str, tenant_id, db: Session) -> Tuple[str, bool]:
+    """Function-calling mode; returns the answer and whether it may be cached."""
+    response = await get_async_openai_client().chat.completions.create(
+        model=OPENAI_CHAT_MODEL,
+        messages=_messages(prompt),
+        functions=function_definitions(),
+        function_call="auto",
+        temperature=0.3,
+        max_tokens=300,
+    )
+
+    fn_call = response.choices[0].message.function_call
+    if not fn_call:
+        logger.warning("[AI] No function was triggered.")
+        return "No function was triggered. Try rephrasing the question.", False
+
+    fn_name = fn_call.name
+    logger.info(f"[AI] Function triggered: {fn_name}")
+    try:
+        args = json.loads(fn_call.arguments or "{}")
+        logger.info(f"[AI] Arguments: {args}")
+        # Served from the shared analytics cache when the data has not moved
+        answer = await run_in_threadpool(call_ai_function, fn_name, db, tenant_id, args)
+        if answer is None:
+            return f"Function '{fn_name}' not implemented.", False
+        return answer, True
+
+    except Exception as fn_error:
+        logger.exception("[AI] Function call failed")
+        return f"Function call failed: {str(fn_error)}", False
 
 
 @router.post("/ask")
@@ -56,86 +103,138 @@ async def ask_ai(
     try:
         logger.info(f"[AI] Request received: {request.dict()}")
         tenant_id = current_user.tenant_id
-
-        if request.mode not in {"sql", "function", "auto"}:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid mode '{request.mode}'. Use 'sql', 'function', or 'auto'.",
+        _check_mode(request.mode)
+
+        # Same question, same data: reuse the answer instead of asking again
+        watermark = await run_in_threadpool(data_watermark, db, tenant_id)
+        cached = answer_cache.get(tenant_id, request.mode, request.prompt, watermark)
+        if cached is not None:
+            logger.info(f"[AI] Cache hit ({cached.hits} hits) for mode {request.mode}")
+            return {"answer": cached.answer, "sql": cached.sql, "cached": True}
+
+        def answered(answer: str, sql=None) -> dict:
+            answer_cache.put(
+                tenant_id, request.mode, request.prompt, watermark, answer, sql
             )
-
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a helpful assistant manager with the ability to answer "
-                    "questions for retail sales and business intelligence."
-                ),
-            },
-            {"role": "user", "content": request.prompt},
-        ]
+            return {"answer": answer, "sql": sql or [], "cached": False}
 
         if request.mode == "sql":
             logger.info("[AI] Running SQL agent mode.")
-            result = run_sql_agent(request.prompt, tenant_id=str(tenant_id))
-            return {"answer": result}
+            result, queries = await run_in_threadpool(
+                _cached_sql_answer, request.prompt, tenant_id, watermark
+            )
+            return {"answer": result, "sql": queries, "cached": False}
 
         if request.mode == "function":
             logger.info("[AI] Running function-calling mode.")
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                functions=function_definitions,
-                function_call="auto",
-                temperature=0.3,
-                max_tokens=300,
-            )
-
-            fn_call = response.choices[0].message.function_call
-            if fn_call:
-                fn_name = fn_call.name
-                logger.info(f"[AI] Function triggered: {fn_name}")
-                try:
-                    args = json.loads(fn_call.arguments)
-                    logger.info(f"[AI] Arguments: {args}")
-
-                    if fn_name == "get_top_margin_products":
-                        result = get_top_margin_products(
-                            tenant_id=str(tenant_id), **args, db=db
-                        )
-                        if isinstance(result, list):
-                            answer = "Top margin products:\n" + "\n".join(
-                                f"- {r['product']}: ${r['total_margin']} from {r['units_sold']} units"
-                                for r in result
-                            )
-                            return {"answer": answer}
-                        return {"answer": result}
-
-                    elif fn_name == "get_top_category":
-                        result = get_top_category(
-                            tenant_id=str(tenant_id), **args, db=db
-                        )
-                        return {"answer": f"Top category: {result}"}
-
-                    else:
-                        return {"answer": f"Function '{fn_name}' not implemented."}
-
-                except Exception as fn_error:
-                    logger.exception("[AI] Function call failed")
-                    return {"answer": f"Function call failed: {str(fn_error)}"}
-
-            logger.warning("[AI] No function was triggered.")
-            return {"answer": "No function was triggered. Try rephrasing the question."}
+            answer, cacheable = await _function_answer(request.prompt, tenant_id, db)
+            if cacheable:
+                return answered(answer)
+            return {"answer": answer, "sql": [], "cached": False}
 
         logger.info("[AI] Running fallback chat mode.")
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
+        response = await get_async_openai_client().chat.completions.create(
+            model=OPENAI_CHAT_MODEL,
+            messages=_messages(request.prompt),
             temperature=0.3,
             max_tokens=300,
         )
-        return {"answer": response.choices[0].message.content.strip()}
+        return answered(response.choices[0].message.content.strip())
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("[AI] Fatal error")
         raise HTTPException(status_code=500, detail=f"AI assistant error: {str(e)}")
+
+
+@router.post("/ask/stream")
+async def ask_ai_stream(
+    request: AiPrompt,
+    http_request: Request,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Server-Sent Events version of /ask: "token" events as the model writes
+    (chat mode), then one "answer" event with the full answer, SQL and cache
+    flag, or an "error" event. Closing the connection cancels the upstream
+    completion; a running SQL agent finishes in its thread and is cached.
+    """
+    logger.info(f"[AI] Streaming request received: {request.dict()}")
+    tenant_id = current_user.tenant_id
+    _check_mode(request.mode)
+    watermark = await run_in_threadpool(data_watermark, db, tenant_id)
+    cached = answer_cache.get(tenant_id, request.mode, request.prompt, watermark)
+
+    async def events():
+        if cached is not None:
+            yield sse_event(
+                "answer", {"answer": cached.answer, "sql": cached.sql, "cached": True}
+            )
+            return
+
+        try:
+            sql = []
+            if request.mode == "sql":
+                agent = asyncio.ensure_future(
+                    run_in_threadpool(
+                        _cached_sql_answer, request.prompt, tenant_id, watermark
+                    )
+                )
+                while not agent.done():
+                    await asyncio.wait({agent}, timeout=SSE_HEARTBEAT_SECONDS)
+                    if await http_request.is_disconnected():
+                        logger.info("[AI] Client left; SQL agent result will be cached")
+                        return
+                    if not agent.done():
+                        yield ": keep-alive\n\n"
+                answer, sql = agent.result()
+
+            elif request.mode == "function":
+                # The request's session is closed before the stream body runs
+                stream_db = SessionLocal()
+                try:
+                    answer, cacheable = await _function_answer(
+                        request.prompt, tenant_id, stream_db
+                    )
+                finally:
+                    stream_db.close()
+                if cacheable:
+                    answer_cache.put(
+                        tenant_id, request.mode, request.prompt, watermark, answer
+                    )
+
+            else:
+                stream = await get_async_openai_client().chat.completions.create(
+                    model=OPENAI_CHAT_MODEL,
+                    messages=_messages(request.prompt),
+                    temperature=0.3,
+                    max_tokens=300,
+                    stream=True,
+                )
+                parts = []
+                try:
+                    async for chunk in stream:
+                        if await http_request.is_disconnected():
+                            logger.info("[AI] Client left; completion cancelled")
+                            return
+                        text = chunk.choices[0].delta.content if chunk.choices else None
+                        if text:
+                            parts.append(text)
+                            yield sse_event("token", {"text": text})
+                finally:
+                    # Stops the upstream generation when we leave early
+                    await stream.close()
+                answer = "".join(parts).strip()
+                answer_cache.put(
+                    tenant_id, request.mode, request.prompt, watermark, answer
+                )
+
+            yield sse_event("answer", {"answer": answer, "sql": sql, "cached": False})
+
+        except Exception as e:
+            logger.exception("[AI] Streaming error")
+            yield sse_event("error", {"detail": f"AI assistant error: {str(e)}"})
+
+    return sse_response(events())
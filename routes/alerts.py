@@ -1,50 +1,64 @@
 # routes/alerts.py
 
-from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi import APIRouter, Query, HTTPException, Depends, Request
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from typing import List, Optional
+from app.db.database import SessionLocal, get_db
 from app.models.models import Product, User
 from schemas.alerts import LowStockAlert
 from app.core.logging_config import logger
 from app.auth.dependencies import get_current_user
+from app.utils.sse import channel_stream
+from services.stock_alerts import DEFAULT_LOW_STOCK_THRESHOLD, STOCK_ALERTS_CHANNEL
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
 
+def query_low_stock(db: Session, tenant_id, threshold: Optional[int] = None):
+    """
+    Products at or below `threshold`, or below their own threshold when none
+    is given. The per-product form matches the ix_products_low_stock predicate.
+    """
+    effective = func.coalesce(Product.low_stock_threshold, DEFAULT_LOW_STOCK_THRESHOLD)
+    query = db.query(
+        Product.id, Product.name, Product.stock_quantity, effective
+    ).filter(Product.tenant_id == tenant_id, Product.deleted_at.is_(None))
+    if threshold is None:
+        query = query.filter(Product.stock_quantity <= effective)
+    else:
+        query = query.filter(Product.stock_quantity <= threshold)
+
+    return [
+        LowStockAlert(
+            product_id=product_id,
+            name=name,
+            stock_level=stock_quantity,
+            threshold=threshold if threshold is not None else product_threshold,
+        )
+        for product_id, name, stock_quantity, product_threshold in query.all()
+    ]
+
+
 @router.get("/low-stock", response_model=List[LowStockAlert])
 def low_stock_alerts(
-    threshold: int = Query(10, ge=0),
+    threshold: Optional[int] = Query(
+        None, ge=0, description="Override per-product thresholds"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
         logger.info(
-            f"🔍 Checking low-stock products (threshold ≤ {threshold}) for tenant '{current_user.tenant_id}'"
+            f"🔍 Checking low-stock products (threshold ≤ {threshold or 'per-product'}) for tenant '{current_user.tenant_id}'"
         )
 
-        low_stock_products = (
-            db.query(Product)
-            .filter(
-                Product.stock_quantity <= threshold,
-                Product.tenant_id == current_user.tenant_id,
-            )
-            .all()
-        )
+        alerts = query_low_stock(db, current_user.tenant_id, threshold)
 
         logger.info(
-            f"⚠️ Found {len(low_stock_products)} products at or below threshold for tenant '{current_user.tenant_id}'"
+            f"⚠️ Found {len(alerts)} products at or below threshold for tenant '{current_user.tenant_id}'"
         )
 
-        alerts = [
-            LowStockAlert(
-                product_id=product.id,
-                name=product.name,
-                stock_level=product.stock_quantity,
-            )
-            for product in low_stock_products
-        ]
-
         return alerts
 
     except Exception as e:
@@ -52,3 +66,37 @@ def low_stock_alerts(
         raise HTTPException(
             status_code=500, detail="Failed to fetch low-stock products"
         )
+
+
+def _initial_low_stock(tenant_id) -> list:
+    db = SessionLocal()
+    try:
+        return [a.model_dump() for a in query_low_stock(db, tenant_id)]
+    finally:
+        db.close()
+
+
+@router.get("/low-stock/stream")
+async def low_stock_stream(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Server-Sent Events feed of low-stock crossings for the caller's tenant.
+    Sends the current list once, then one event per crossing detected when
+    stock is written (checkout, returns, inventory events).
+    """
+    tenant_id = str(current_user.tenant_id)
+    logger.info(f"📡 Low-stock stream opened for tenant '{tenant_id}'")
+
+    def crossing(payload):
+        if payload.get("tenant_id") == tenant_id:
+            return payload["state"], payload
+        return None
+
+    return channel_stream(
+        request,
+        STOCK_ALERTS_CHANNEL,
+        lambda: _initial_low_stock(tenant_id),
+        crossing,
+    )
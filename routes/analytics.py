@@ -1,19 +1,21 @@
 from fastapi import APIRouter, Query, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional
+import json
+import os
 from datetime import date, timedelta, datetime
 import sqlalchemy
 from sqlalchemy.orm import Session
-from sqlalchemy import func, select
+from sqlalchemy import func, select, tuple_
 
 
-from app.db.database import get_db
+from app.db.database import SessionLocal, get_db
 from app.models.models import SaleItem, Return, Sale, User, Product
 from app.models.schemas import ProductReturnRate, SaleReturnRate, CashierReturnRate
 from schemas.analytics import (
     DailySalesSummary,
     TopProductTrend,
-    InventorySnapshot,
+    InventorySnapshotPage,
     InventoryMovement,
     TopMarginProduct,
     CategorySales,
@@ -21,9 +23,30 @@ from schemas.analytics import (
 )
 from app.auth.dependencies import get_current_user
 from app.core.logging_config import logger
+from app.utils.pagination import decode_cursor, encode_cursor
+from services.analytics_queries import category_sales as category_sales_by_tenant
+from services.analytics_queries import top_margin_products
+from services.analytics_reports import kpi_summary as kpi_summary_report
+from services.analytics_reports import sales_summary
+from services.jobs import enqueue, job_accepted
 
 router = APIRouter()
 
+# Longer ranges are computed by the job worker instead of inside the request
+ANALYTICS_INLINE_MAX_DAYS = int(os.getenv("ANALYTICS_INLINE_MAX_DAYS", "92"))
+
+
+def _queue_report(db: Session, kind: str, params: dict, current_user) -> JSONResponse:
+    job = enqueue(
+        db,
+        kind,
+        params,
+        tenant_id=current_user.tenant_id,
+        requested_by=current_user.id,
+    )
+    logger.info(f"🕒 {kind} queued as job {job.id} for '{current_user.username}'")
+    return job_accepted(job)
+
 
 @router.get("/sales-summary")
 def get_sales_summary(
@@ -31,55 +54,31 @@ def get_sales_summary(
     end_date: str = Query(...),
     cashier_id: int = Query(None),
     category: str = Query(None),
+    background: bool = Query(
+        False, description="Run as a job (always, for long ranges) and poll /jobs"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    try:
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    if background or (end - start).days > ANALYTICS_INLINE_MAX_DAYS:
+        params = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "cashier_id": cashier_id,
+            "category": category,
+        }
+        return _queue_report(db, "sales_summary", params, current_user)
 
+    try:
         logger.info(
             f"📈 Sales summary requested from {start} to {end} (cashier={cashier_id}, category={category})"
         )
 
-        base_query = db.query(
-            func.date(Sale.timestamp).label("sale_date"),
-            func.count(Sale.id).label("total_sales_count"),
-            func.sum(Sale.total_amount).label("total_sales_value"),
-            func.avg(Sale.total_amount).label("avg_sale_value"),
-        ).filter(
-            Sale.timestamp >= start,
-            Sale.timestamp < end,
-            Sale.tenant_id == current_user.tenant_id,
+        return sales_summary(
+            db, current_user.tenant_id, start, end, cashier_id, category
         )
-
-        if cashier_id:
-            base_query = base_query.filter(Sale.cashier_id == cashier_id)
-
-        if category:
-            base_query = (
-                base_query.join(SaleItem)
-                .join(Product)
-                .filter(Product.category == category)
-            )
-
-        base_query = base_query.group_by(func.date(Sale.timestamp)).order_by(
-            func.date(Sale.timestamp)
-        )
-
-        results = base_query.all()
-
-        return [
-            {
-                "sale_date": row.sale_date.isoformat(),
-                "total_sales_count": int(row.total_sales_count),
-                "total_sales_value": float(row.total_sales_value or 0),
-                "avg_sale_value": float(row.avg_sale_value or 0),
-                "day_of_week": row.sale_date.strftime("%A"),
-            }
-            for row in results
-        ]
-
     except Exception as e:
         logger.error(f"🔥 Failed to compute sales summary: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to compute sales summary")
@@ -106,11 +105,13 @@ def top_products(
                 SUM(si.quantity) AS total_units_sold,
                 SUM(si.quantity * si.price) AS total_revenue
             FROM sale_items si
+            JOIN sales s ON si.sale_id = s.id
             JOIN products p ON si.product_id = p.id
+            WHERE s.deleted_at IS NULL
         """
 
         if category:
-            sql += " WHERE p.category = :category"
+            sql += " AND p.category = :category"
 
         sql += """
             GROUP BY p.id, p.name, p.category
@@ -143,6 +144,7 @@ def top_products_trend(days: int = 30, limit: int = 5, db: Session = Depends(get
             JOIN sales s ON si.sale_id = s.id
             JOIN products p ON si.product_id = p.id
             WHERE s.timestamp >= CURRENT_DATE - INTERVAL :days
+              AND s.deleted_at IS NULL
             GROUP BY p.id
             ORDER BY SUM(si.quantity) DESC
             LIMIT :limit
@@ -168,6 +170,7 @@ def top_products_trend(days: int = 30, limit: int = 5, db: Session = Depends(get
             JOIN sales s ON si.sale_id = s.id
             JOIN products p ON si.product_id = p.id
             WHERE s.timestamp >= CURRENT_DATE - INTERVAL :days
+              AND s.deleted_at IS NULL
               AND p.id = ANY(:product_ids)
             GROUP BY sale_date, p.id, p.name
             ORDER BY sale_date ASC, revenue DESC
@@ -186,25 +189,117 @@ def top_products_trend(days: int = 30, limit: int = 5, db: Session = Depends(get
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
-@router.get("/analytics/inventory-snapshot", response_model=List[InventorySnapshot])
-def inventory_snapshot(db: Session = Depends(get_db)):
+# Output field -> column; the snapshot only selects what the caller asked for
+INVENTORY_SNAPSHOT_COLUMNS = {
+    "id": Product.id,
+    "name": Product.name,
+    "sku": Product.sku,
+    "category": Product.category,
+    "quantity": Product.stock_quantity,
+    "price": Product.price,
+}
+DEFAULT_SNAPSHOT_FIELDS = ["id", "name", "category", "quantity", "price"]
+
+
+def _snapshot_row(row) -> dict:
+    item = dict(row)
+    if item.get("price") is not None:
+        item["price"] = float(item["price"])
+    return item
+
+
+@router.get("/analytics/inventory-snapshot", response_model=InventorySnapshotPage)
+def inventory_snapshot(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated subset of id,name,sku,category,quantity,price",
+    ),
+    category: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(500, ge=1, le=5000),
+    stream: bool = Query(False, description="Stream every row as NDJSON"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    requested = (
+        [f.strip() for f in fields.split(",") if f.strip()]
+        if fields
+        else DEFAULT_SNAPSHOT_FIELDS
+    )
+    unknown = [f for f in requested if f not in INVENTORY_SNAPSHOT_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown snapshot fields: {', '.join(unknown)}"
+        )
+
+    # Keyset on (category, name, id); the sort key is always selected so the
+    # cursor can be built, then dropped from the output if not requested.
+    sort_category = func.coalesce(Product.category, "").label("_sort_category")
+    sort_name = Product.name.label("_sort_name")
+    sort_id = Product.id.label("_sort_id")
+
+    stmt = (
+        select(
+            *[INVENTORY_SNAPSHOT_COLUMNS[f].label(f) for f in requested],
+            sort_category,
+            sort_name,
+            sort_id,
+        )
+        .where(
+            Product.tenant_id == current_user.tenant_id, Product.deleted_at.is_(None)
+        )
+        .order_by(func.coalesce(Product.category, ""), Product.name, Product.id)
+    )
+    if category:
+        stmt = stmt.where(Product.category.in_(category))
+
+    def project(row) -> dict:
+        return _snapshot_row({f: row[f] for f in requested})
+
+    if stream:
+        logger.info(
+            f"📦 Streaming inventory snapshot for tenant {current_user.tenant_id}"
+        )
+        tenant_stmt = stmt
+
+        def generate():
+            # The request session is closed before the body is sent
+            session = SessionLocal()
+            try:
+                result = session.execute(
+                    tenant_stmt.execution_options(yield_per=1000)
+                ).mappings()
+                for row in result:
+                    yield json.dumps(project(row)) + "\n"
+            finally:
+                session.close()
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
     try:
-        logger.info("📦 Generating inventory snapshot")
-
-        products = db.query(Product).order_by(Product.category, Product.name).all()
-
-        logger.info(f"✅ Retrieved {len(products)} inventory records")
-        return [
-            InventorySnapshot(
-                id=p.id,
-                name=p.name,
-                category=p.category,
-                quantity=p.stock_quantity,
-                price=float(p.price),
+        after = decode_cursor(cursor, 3)
+        if after:
+            stmt = stmt.where(
+                tuple_(func.coalesce(Product.category, ""), Product.name, Product.id)
+                > tuple_(*after)
             )
-            for p in products
-        ]
 
+        rows = db.execute(stmt.limit(limit + 1)).mappings().all()
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(
+                [last["_sort_category"], last["_sort_name"], last["_sort_id"]]
+            )
+
+        logger.info(
+            f"✅ Retrieved {len(page)} inventory records for tenant {current_user.tenant_id}"
+        )
+        return {"items": [project(r) for r in page], "next_cursor": next_cursor}
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"🔥 Inventory snapshot error: {str(e)}", exc_info=True)
         return JSONResponse(
@@ -250,41 +345,19 @@ def inventory_movement(db: Session = Depends(get_db)):
 
 
 @router.get("/analytics/top-margins", response_model=List[TopMarginProduct])
-def top_margins(limit: int = 10, db: Session = Depends(get_db)):
+def top_margins(
+    limit: int = 10,
+    days: Optional[int] = Query(None, description="Only the last N days"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     try:
         logger.info(f"📊 Fetching top {limit} products by margin")
 
-        sql = """
-            SELECT
-                p.id AS product_id,
-                p.name,
-                p.category,
-                SUM(si.quantity) AS units_sold,
-                SUM(si.quantity * si.price) AS revenue,
-                SUM(si.quantity * COALESCE(p.cost_basis, 0)) AS cost_basis,
-                SUM(
-                    si.quantity *
-                    (si.price - COALESCE(p.cost_basis, 0))
-                ) AS margin_dollars,
-                CASE
-                    WHEN SUM(si.quantity * si.price) > 0 THEN
-                        ROUND(
-                            100.0 * SUM(si.quantity * (si.price -
-                            COALESCE(p.cost_basis, 0))) /
-                            SUM(si.quantity * si.price), 2
-                        )
-                    ELSE 0
-                END AS margin_percent
-            FROM sale_items si
-            JOIN products p ON si.product_id = p.id
-            GROUP BY p.id, p.name, p.category
-            ORDER BY margin_dollars DESC
-            LIMIT :limit
-        """
-        rows = db.execute(sqlalchemy.text(sql), {"limit": limit}).fetchall()
+        rows = top_margin_products(db, current_user.tenant_id, limit=limit, days=days)
 
         logger.info(f"✅ Retrieved top-margin data for {len(rows)} products")
-        return [dict(r._mapping) for r in rows]
+        return rows
 
     except Exception as e:
         logger.error(f"🔥 Margin report error: {str(e)}", exc_info=True)
@@ -294,29 +367,18 @@ def top_margins(limit: int = 10, db: Session = Depends(get_db)):
 
 
 @router.get("/analytics/category-sales", response_model=List[CategorySales])
-def category_sales(db: Session = Depends(get_db)):
+def category_sales(
+    days: Optional[int] = Query(None, description="Only the last N days"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     try:
         logger.info("📊 Generating category-level sales summary")
 
-        sql = """
-            SELECT
-                category,
-                SUM(si.quantity) AS total_units_sold,
-                SUM(si.quantity * si.price) AS total_revenue,
-                ROUND(
-                    SUM(si.quantity * si.price) /
-                    NULLIF(SUM(si.quantity), 0),
-                    2
-                ) AS avg_price
-            FROM sale_items si
-            JOIN products p ON si.product_id = p.id
-            GROUP BY category
-            ORDER BY total_revenue DESC
-        """
-        results = db.execute(sqlalchemy.text(sql)).fetchall()
+        results = category_sales_by_tenant(db, current_user.tenant_id, days=days)
 
         logger.info(f"✅ Category summary complete for {len(results)} categories")
-        return [dict(r._mapping) for r in results]
+        return results
 
     except Exception as e:
         logger.error(f"🔥 Category sales error: {str(e)}", exc_info=True)
@@ -330,6 +392,8 @@ def category_sales(db: Session = Depends(get_db)):
 def get_product_return_rates(db: Session = Depends(get_db)):
     sold = (
         db.query(SaleItem.product_id, func.sum(SaleItem.quantity).label("total_sold"))
+        .join(Sale, Sale.id == SaleItem.sale_id)
+        .filter(Sale.deleted_at.is_(None))
         .group_by(SaleItem.product_id)
         .subquery()
     )
@@ -376,6 +440,7 @@ def get_sale_return_rates(db: Session = Depends(get_db)):
             func.sum(SaleItem.quantity).label("total_items_sold"),
         )
         .join(SaleItem)
+        .filter(Sale.deleted_at.is_(None))
         .group_by(Sale.id)
         .subquery()
     )
@@ -417,6 +482,7 @@ def get_sale_return_rates(db: Session = Depends(get_db)):
 def get_cashier_return_rates(db: Session = Depends(get_db)):
     sales_by_user = (
         db.query(Sale.user_id, func.count(Sale.id).label("total_sales"))
+        .filter(Sale.deleted_at.is_(None))
         .group_by(Sale.user_id)
         .subquery()
     )
@@ -424,6 +490,7 @@ def get_cashier_return_rates(db: Session = Depends(get_db)):
     returns_by_user = (
         db.query(Sale.user_id, func.count(Return.id).label("total_returns"))
         .join(Sale, Sale.id == Return.sale_id)
+        .filter(Sale.deleted_at.is_(None))
         .group_by(Sale.user_id)
         .subquery()
     )
@@ -461,136 +528,31 @@ def kpi_summary(
     end_date: str = Query(..., description="End date in YYYY-MM-DD"),
     cashier_id: int = Query(None, description="Optional cashier ID"),
     category: str = Query(None, description="Optional product category"),
+    background: bool = Query(
+        False, description="Run as a job (always, for long ranges) and poll /jobs"
+    ),
     db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
 ):
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date() + timedelta(days=1)
+    if background or (end - start).days > ANALYTICS_INLINE_MAX_DAYS:
+        params = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "cashier_id": cashier_id,
+            "category": category,
+        }
+        return _queue_report(db, "kpi_summary", params, current_user)
+
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end = datetime.strptime(end_date, "%Y-%m-%d").date() + timedelta(days=1)
         logger.info(
             f"📊 KPI summary requested from {start} to {end} (cashier: {cashier_id}, category: {category})"
         )
 
-        delta_days = (end - start).days
-        prev_end = start - timedelta(days=1)
-        prev_start = prev_end - timedelta(days=delta_days - 1)
-
-        def compute_kpis(start, end):
-            sale_query = db.query(Sale).filter(
-                Sale.timestamp >= start, Sale.timestamp < end
-            )
-            if cashier_id:
-                sale_query = sale_query.filter(Sale.cashier_id == cashier_id)
-
-            total_sales, total_transactions = sale_query.with_entities(
-                func.coalesce(func.sum(Sale.total_amount), 0),
-                func.count(Sale.id),
-            ).one()
-
-            days_tracked = max((end - start).days, 1)
-            avg_daily_sales = total_sales / days_tracked
-
-            # Total units sold
-            item_query = (
-                db.query(SaleItem)
-                .join(Sale)
-                .filter(Sale.timestamp >= start, Sale.timestamp < end)
-            )
-            if cashier_id:
-                item_query = item_query.filter(Sale.cashier_id == cashier_id)
-            if category:
-                item_query = item_query.join(Product).filter(
-                    Product.category == category
-                )
-
-            total_units = (
-                db.query(func.coalesce(func.sum(SaleItem.quantity), 0))
-                .select_from(item_query.subquery())
-                .scalar()
-            )
-
-            avg_basket_size = (
-                total_units / total_transactions if total_transactions else 0
-            )
-
-            # Return quantity
-            return_query = db.query(Return).filter(
-                Return.timestamp >= start, Return.timestamp < end
-            )
-            if category:
-                return_query = return_query.join(Product).filter(
-                    Product.category == category
-                )
-
-            total_returned = (
-                db.query(func.coalesce(func.sum(Return.quantity), 0))
-                .select_from(return_query.subquery())
-                .scalar()
-            )
-
-            return_rate = (total_returned / total_units * 100) if total_units else 0
-
-            # Top category (unfiltered for now, or we can filter by cashier if needed)
-            top_cat_sql = sqlalchemy.text(
-                """
-                SELECT p.category, SUM(si.quantity * si.price) AS revenue
-                FROM sale_items si
-                JOIN sales s ON si.sale_id = s.id
-                JOIN products p ON si.product_id = p.id
-                WHERE s.timestamp >= :start AND s.timestamp < :end
-                {cashier_filter}
-                {category_filter}
-                GROUP BY p.category
-                ORDER BY revenue DESC
-                LIMIT 1
-            """.replace(
-                    "{cashier_filter}",
-                    "AND s.cashier_id = :cashier_id" if cashier_id else "",
-                ).replace(
-                    "{category_filter}",
-                    "AND p.category = :category" if category else "",
-                )
-            )
-
-            sql_params = {"start": start, "end": end}
-            if cashier_id:
-                sql_params["cashier_id"] = cashier_id
-            if category:
-                sql_params["category"] = category
-
-            top_category_row = db.execute(top_cat_sql, sql_params).fetchone()
-            top_category = top_category_row[0] if top_category_row else "N/A"
-
-            return KpiSummary(
-                total_sales=round(float(total_sales), 2),
-                avg_daily_sales=round(float(avg_daily_sales), 2),
-                total_transactions=total_transactions,
-                avg_basket_size=round(float(avg_basket_size), 2),
-                return_rate=round(float(return_rate), 2),
-                top_category=top_category,
-            )
-
-        current = compute_kpis(start, end)
-        previous = compute_kpis(prev_start, prev_end)
-
-        def safe_delta(curr, prev):
-            if prev == 0:
-                return 0.0
-            return round(((curr - prev) / prev) * 100, 2)
-
-        final_kpi_payload = {
-            **current.model_dump(),
-            "delta_total_sales": safe_delta(current.total_sales, previous.total_sales),
-            "delta_avg_daily_sales": safe_delta(
-                current.avg_daily_sales, previous.avg_daily_sales
-            ),
-            "delta_total_transactions": safe_delta(
-                current.total_transactions, previous.total_transactions
-            ),
-            "delta_avg_basket_size": safe_delta(
-                current.avg_basket_size, previous.avg_basket_size
-            ),
-            "delta_return_rate": safe_delta(current.return_rate, previous.return_rate),
-        }
+        final_kpi_payload = kpi_summary_report(
+            db, current_user.tenant_id, start, end, cashier_id, category
+        )
 
         logger.info("📦 Final KPI summary payload: %s", final_kpi_payload)
 
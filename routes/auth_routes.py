@@ -1,10 +1,12 @@
 # routes/auth_routes.py
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.auth.auth import create_access_token, verify_password
+from app.auth.auth import create_access_token
+from app.auth.hashing import HashingBusyError, password_hasher, rehash_password
 from app.db.database import get_db
 from app.models.models import User, Tenant
 from app.models.schemas import TokenResponse
@@ -13,20 +15,37 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
-    db_user = (
-        db.query(User)
+    db_user = await run_in_threadpool(
+        lambda: db.query(User)
         .filter(User.username == form_data.username, User.tenant_id.isnot(None))
         .first()
     )
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not db_user or not verify_password(form_data.password, db_user.password_hash):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, db_user.password_hash
+        )
+    except HashingBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-ins in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    tenant = db.query(Tenant).filter(Tenant.id == db_user.tenant_id).first()
+    if new_hash:
+        await run_in_threadpool(rehash_password, db, db_user, new_hash)
+
+    tenant = await run_in_threadpool(
+        lambda: db.query(Tenant).filter(Tenant.id == db_user.tenant_id).first()
+    )
     if not tenant:
         raise HTTPException(status_code=400, detail="Tenant configuration error.")
 
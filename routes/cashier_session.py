@@ -1,17 +1,28 @@
 # routes/cashier_session.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from datetime import datetime
 from decimal import Decimal
-from app.models.models import CashierSession, Sale, User
+from app.models.models import CashierSession, User
 from app.models.schemas import (
     CashierSessionCreate,
     CashierSessionClose,
     CashierSessionOut,
 )
-from app.db.database import get_db
-from app.auth.dependencies import get_current_user
+from app.db.database import SessionLocal, get_db
+from app.auth.dependencies import get_current_user, require_role
+from app.utils.sse import channel_stream
+from services.cash_drawer import (
+    CASHIER_SESSIONS_CHANNEL,
+    expected_cash,
+    publish_session,
+)
+from services.session_dashboard import (
+    DEFAULT_SHIFT_HOURS,
+    live_sessions,
+    session_metrics,
+)
 
 router = APIRouter(prefix="/cashier_sessions", tags=["Cashier Sessions"])
 
@@ -45,6 +56,8 @@ def open_session(
         notes=session_data.notes,
     )
     db.add(session)
+    db.flush()
+    publish_session(db, session, "opened")
     db.commit()
     db.refresh(session)
     return session
@@ -63,6 +76,8 @@ def close_session(
             CashierSession.id == session_id,
             CashierSession.tenant_id == current_user.tenant_id,
         )
+        # Sales ringing in now wait, then find the drawer closed
+        .with_for_update()
         .first()
     )
     if not session:
@@ -72,18 +87,8 @@ def close_session(
     if session.closed_at:
         raise HTTPException(status_code=400, detail="Session already closed.")
 
-    sales = (
-        db.query(Sale)
-        .filter(
-            Sale.timestamp >= session.opened_at,
-            Sale.timestamp <= datetime.utcnow(),
-            Sale.payment_type == "cash",
-            Sale.cashier_id == current_user.id,
-            Sale.tenant_id == current_user.tenant_id,
-        )
-        .all()
-    )
-    system_total = sum([s.total_amount for s in sales])
+    # Float plus the running cash totals kept by every sale and refund
+    system_total = expected_cash(session)
     difference = close_data.closing_cash - system_total
 
     session.closing_cash = close_data.closing_cash
@@ -93,11 +98,61 @@ def close_session(
     session.closed_at = datetime.utcnow()
     session.notes = close_data.notes
 
+    publish_session(db, session, "closed")
     db.commit()
     db.refresh(session)
     return session
 
 
+@router.get("/live")
+def get_live_sessions(
+    shift_hours: float = Query(DEFAULT_SHIFT_HOURS, gt=0, le=24),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    """Every open drawer for the tenant with velocity and cash projections."""
+    return live_sessions(db, current_user.tenant_id, shift_hours)
+
+
+def _initial_live_sessions(tenant_id, shift_hours: float) -> list:
+    db = SessionLocal()
+    try:
+        return live_sessions(db, tenant_id, shift_hours)
+    finally:
+        db.close()
+
+
+@router.get("/live/stream")
+async def stream_live_sessions(
+    request: Request,
+    shift_hours: float = Query(DEFAULT_SHIFT_HOURS, gt=0, le=24),
+    current_user: User = Depends(require_role("admin")),
+):
+    """
+    Server-Sent Events version of /live: the open drawers once, then an
+    "opened", "updated" or "closed" event each time a drawer changes, with
+    metrics recomputed from the counters carried in the notification.
+    """
+    tenant_id = str(current_user.tenant_id)
+
+    def drawer_change(payload):
+        if payload.get("tenant_id") != tenant_id:
+            return None
+        # The payload dict is shared with other subscribers; don't mutate it
+        session = {k: v for k, v in payload.items() if k != "state"}
+        state = payload.get("state", "updated")
+        if state == "closed":
+            return state, session
+        return state, session_metrics(session, shift_hours=shift_hours)
+
+    return channel_stream(
+        request,
+        CASHIER_SESSIONS_CHANNEL,
+        lambda: _initial_live_sessions(tenant_id, shift_hours),
+        drawer_change,
+    )
+
+
 @router.get("/current", response_model=CashierSessionOut)
 def get_current_session(
     db: Session = Depends(get_db),
@@ -110,6 +165,7 @@ def get_current_session(
             CashierSession.closed_at.is_(None),
             CashierSession.tenant_id == current_user.tenant_id,
         )
+        .order_by(CashierSession.opened_at.desc(), CashierSession.id.desc())
         .first()
     )
     if not session:
@@ -136,15 +192,14 @@ def get_session_summary(
     if session.cashier_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized.")
 
-    sales = (
-        db.query(Sale)
-        .filter(
-            Sale.timestamp >= session.opened_at,
-            Sale.payment_type == "cash",
-            Sale.cashier_id == current_user.id,
-            Sale.tenant_id == current_user.tenant_id,
-        )
-        .all()
-    )
-    system_total = sum([s.total_amount for s in sales])
-    return {"session_id": session.id, "system_cash_total": float(system_total)}
+    return {
+        "session_id": session.id,
+        "system_cash_total": float(expected_cash(session)),
+        "cash_total": float(session.cash_total),
+        "card_total": float(session.card_total),
+        "sale_count": session.sale_count,
+        "refund_total": float(session.refund_total),
+        "refund_count": session.refund_count,
+        "cash_refund_total": float(session.cash_refund_total),
+        "last_activity_at": session.last_activity_at,
+    }
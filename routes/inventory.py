@@ -1,15 +1,27 @@
 # routes/inventory.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from app.db.database import get_db
 from app.models.models import Product, InventoryEvent, User
-from app.models.schemas import InventoryEventIn, InventoryEventOut
+from app.models.schemas import (
+    InventoryEventIn,
+    InventoryEventOut,
+    ShrinkReportRow,
+    StockLevelOut,
+)
 from app.auth.dependencies import get_current_user, require_role
 from app.core.logging_config import logger
+from services.stock_ledger import (
+    StockConflictError,
+    record_stock_change,
+    shrink_report,
+    stock_as_of,
+    take_stock_snapshots,
+)
 
 router = APIRouter(prefix="/inventory", tags=["Inventory"])
 
@@ -48,21 +60,11 @@ def create_inventory_event(
             )
             raise HTTPException(status_code=404, detail="Product not found")
 
-        # Update product quantity
-        product.stock_quantity += event.change
-
-        # Create inventory event
-        now = datetime.utcnow()
-        event_record = InventoryEvent(
-            product_id=event.product_id,
-            change=event.change,
-            reason=event.reason,
-            created_at=now,
-            updated_at=now,
-            tenant_id=user.tenant_id,
+        # Update product quantity and append the ledger row
+        event_record = record_stock_change(
+            db, product, event.change, "adjustment", reason=event.reason
         )
 
-        db.add_all([product, event_record])
         db.commit()
         db.refresh(event_record)
 
@@ -74,6 +76,10 @@ def create_inventory_event(
 
     except HTTPException:
         raise
+    except StockConflictError as e:
+        db.rollback()
+        logger.warning(f"⚠️ Inventory event conflict for product {event.product_id}")
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         db.rollback()
         logger.error(
@@ -113,3 +119,67 @@ def list_inventory_events(
             exc_info=True,
         )
         raise HTTPException(status_code=500, detail="Unexpected server error")
+
+
+# 📸 Checkpoint current stock levels (admin only)
+@router.post("/stock-snapshots")
+def create_stock_snapshots(
+    db: Session = Depends(get_db),
+    user: User = Depends(require_role("admin")),
+):
+    try:
+        created = take_stock_snapshots(db, tenant_id=user.tenant_id)
+        db.commit()
+        logger.info(
+            f"📸 {created} stock snapshots taken by {user.username} for tenant {user.tenant_id}"
+        )
+        return {"snapshots_created": created}
+
+    except Exception as e:
+        db.rollback()
+        logger.error(
+            f"🔥 Failed to snapshot stock for tenant {user.tenant_id}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Unexpected server error")
+
+
+# 🕰️ Stock levels at a point in time (admin only)
+@router.get("/stock-as-of", response_model=List[StockLevelOut])
+def get_stock_as_of(
+    as_of: datetime = Query(...),
+    product_id: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db),
+    user: User = Depends(require_role("admin")),
+):
+    try:
+        return stock_as_of(db, user.tenant_id, as_of, product_ids=product_id)
+
+    except Exception as e:
+        logger.error(
+            f"🔥 Failed to compute stock as of {as_of} for tenant {user.tenant_id}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Unexpected server error")
+
+
+# 📉 Shrink report between two points in time (admin only)
+@router.get("/shrink-report", response_model=List[ShrinkReportRow])
+def get_shrink_report(
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    db: Session = Depends(get_db),
+    user: User = Depends(require_role("admin")),
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    try:
+        return shrink_report(db, user.tenant_id, start, end)
+
+    except Exception as e:
+        logger.error(
+            f"🔥 Failed to build shrink report for tenant {user.tenant_id}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Unexpected server error")
@@ -0,0 +1,67 @@
+# routes/jobs.py
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+
+from app.auth.dependencies import get_current_user
+from app.core.logging_config import logger
+from app.db.database import get_db
+from app.models.models import Job
+from app.models.schemas import JobOut
+from services.jobs import get_job, job_out
+
+router = APIRouter()
+
+
+def _visible_job(db: Session, job_id: int, current_user) -> Job:
+    job = get_job(db, job_id, current_user.tenant_id)
+    # Admins see the whole store's jobs, everyone else only their own
+    if job is None or (
+        current_user.role != "admin" and job.requested_by != current_user.id
+    ):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/", response_model=List[JobOut])
+def list_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    query = db.query(Job).filter(Job.tenant_id == current_user.tenant_id)
+    if current_user.role != "admin":
+        query = query.filter(Job.requested_by == current_user.id)
+    return [job_out(job) for job in query.order_by(Job.id.desc()).limit(limit)]
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    return job_out(_visible_job(db, job_id, current_user))
+
+
+@router.get("/{job_id}/result")
+def get_job_result(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    job = _visible_job(db, job_id, current_user)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.result_filename is None:
+        return job.result
+
+    logger.info(f"📦 Job {job.id} result downloaded by '{current_user.username}'")
+    return Response(
+        content=job.result_data,
+        media_type=job.result_media_type,
+        headers={"Content-Disposition": f"attachment; filename={job.result_filename}"},
+    )
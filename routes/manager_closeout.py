@@ -1,135 +1,66 @@
 # routes/manager_closeout.py
 
-from fastapi import APIRouter, Depends, Query, Request
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date, datetime
-from weasyprint import HTML
-import tempfile
-from fastapi.templating import Jinja2Templates
+from datetime import date
+from typing import List, Optional
+import os
+from uuid import UUID
 
 from app.db.database import get_db
-from app.auth.dependencies import get_current_user
-from app.models.models import CashierSession, Sale, Return, Product, User, SaleItem
-from schemas.manager_closeout import ZReportOut, SessionSummary, TopSeller
-from app.utils.zreport_csv import generate_zreport_csv
+from app.auth.dependencies import check_tenant_access, get_current_user, require_role
+from app.models.models import Tenant, User
+from schemas.manager_closeout import ZReportOut
+from services.jobs import (
+    PRIORITY_INTERACTIVE,
+    enqueue,
+    find_active_job,
+    job_accepted,
+)
+from services.pdf_renderer import content_key, pdf_renderer
+from services.zreport import zreport_csv, zreport_html
+from services.zreport_archive import stream_zreport_archive
+from services.zreport_snapshots import (
+    ZReportBundle,
+    freeze_day,
+    load_z_report,
+    store_pdf,
+)
 
 router = APIRouter(prefix="/manager_closeout", tags=["Manager Closeout"])
-templates = Jinja2Templates(directory="templates")
 
+# Archive export limits: one quarter, and a cap on files per archive
+ZREPORT_ARCHIVE_MAX_DAYS = int(os.getenv("ZREPORT_ARCHIVE_MAX_DAYS", "92"))
+ZREPORT_ARCHIVE_MAX_REPORTS = int(os.getenv("ZREPORT_ARCHIVE_MAX_REPORTS", "2000"))
 
-def filter_by_tenant(query, tenant_id):
-    return query.filter_by(tenant_id=tenant_id)
 
-
-@router.get("/zreport", response_model=ZReportOut)
-def generate_z_report(
-    report_date: date = Query(default=date.today()),
+def z_report(
+    report_date: Optional[date] = Query(None, description="Defaults to today"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-):
-    start_dt = datetime.combine(report_date, datetime.min.time())
-    end_dt = datetime.combine(report_date, datetime.max.time())
-
-    tenant_id = current_user.tenant_id
-
-    sales = (
-        filter_by_tenant(db.query(Sale), tenant_id)
-        .filter(Sale.timestamp.between(start_dt, end_dt))
-        .all()
-    )
-    total_sales = sum([s.total_amount for s in sales])
-    total_cash = sum([s.total_amount for s in sales if s.payment_type == "cash"])
-    total_card = sum([s.total_amount for s in sales if s.payment_type == "card"])
-
-    total_returns = (
-        db.query(func.coalesce(func.sum(Return.quantity * Product.price), 0))
-        .join(Product, Return.product_id == Product.id)
-        .filter(
-            Return.timestamp.between(start_dt, end_dt), Product.tenant_id == tenant_id
-        )
-        .scalar()
-    )
-
-    sessions = (
-        db.query(CashierSession, User.username)
-        .join(User, CashierSession.cashier_id == User.id)
-        .filter(
-            CashierSession.opened_at.between(start_dt, end_dt),
-            CashierSession.tenant_id == tenant_id,
-        )
-        .all()
-    )
-
-    session_summaries = [
-        SessionSummary(
-            cashier_id=s.cashier_id,
-            cashier_name=username,
-            opening_cash=s.opening_cash,
-            closing_cash=s.closing_cash,
-            system_cash_total=s.system_cash_total,
-            cash_difference=s.cash_difference,
-            is_over_short=s.is_over_short,
-            opened_at=s.opened_at,
-            closed_at=s.closed_at,
-        )
-        for s, username in sessions
-    ]
+) -> ZReportBundle:
+    """
+    Dependency loading the report once for whichever view asked for it:
+    the frozen snapshot for closed days, a live computation for today.
+    """
+    return load_z_report(db, current_user.tenant_id, report_date or date.today())
 
-    top_products = (
-        db.query(
-            Product.id, Product.name, func.sum(SaleItem.quantity).label("units_sold")
-        )
-        .join(SaleItem, Product.id == SaleItem.product_id)
-        .join(Sale, Sale.id == SaleItem.sale_id)
-        .filter(
-            Sale.timestamp.between(start_dt, end_dt), Product.tenant_id == tenant_id
-        )
-        .group_by(Product.id, Product.name)
-        .order_by(func.sum(SaleItem.quantity).desc())
-        .limit(5)
-        .all()
-    )
 
-    top_sellers = [
-        TopSeller(product_id=p[0], name=p[1], units_sold=p[2]) for p in top_products
-    ]
-
-    return ZReportOut(
-        date=report_date,
-        total_sales=total_sales,
-        total_cash=total_cash,
-        total_card=total_card,
-        total_returns=total_returns,
-        sessions=session_summaries,
-        top_sellers=top_sellers,
-    )
+@router.get("/zreport", response_model=ZReportOut)
+def generate_z_report(bundle: ZReportBundle = Depends(z_report)):
+    return bundle.report
 
 
 @router.get("/zreport/export")
-def export_zreport_csv(
-    report_date: date = Query(default=date.today()),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    report = generate_z_report(report_date, db, current_user)
-
-    csv_data = generate_zreport_csv(
-        report.date,
-        report.total_sales,
-        report.total_cash,
-        report.total_card,
-        report.total_returns,
-        report.sessions,
-        report.top_sellers,
-    )
+def export_zreport_csv(bundle: ZReportBundle = Depends(z_report)):
+    csv_data = bundle.csv if bundle.csv is not None else zreport_csv(bundle.report)
 
     return Response(
         content=csv_data,
         media_type="text/csv",
         headers={
-            "Content-Disposition": f"attachment; filename=zreport_{report_date}.csv"
+            "Content-Disposition": f"attachment; filename=zreport_{bundle.report.date}.csv"
         },
     )
 
@@ -137,31 +68,115 @@ def export_zreport_csv(
 @router.get("/zreport/pdf")
 def export_zreport_pdf(
     request: Request,
-    report_date: date = Query(default=date.today()),
+    bundle: ZReportBundle = Depends(z_report),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    report = generate_z_report(report_date, db, current_user)
-
-    html_content = templates.get_template("zreport.html").render(
-        {
-            "date": report.date,
-            "total_sales": report.total_sales,
-            "total_cash": report.total_cash,
-            "total_card": report.total_card,
-            "total_returns": report.total_returns,
-            "sessions": report.sessions,
-            "top_sellers": report.top_sellers,
-        }
-    )
+    """
+    The PDF when it is already frozen or cached; otherwise a 202 with the
+    render job to poll, so web workers never wait on WeasyPrint.
+    """
+    report = bundle.report
+    html_content = zreport_html(report)
+
+    # Same figures, same document: let the browser reuse its copy
+    key = content_key(html_content)
+    etag = f'"{key}"'
+    headers = {
+        "Content-Disposition": f"inline; filename=zreport_{report.date}.pdf",
+        "ETag": etag,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    pdf_bytes = bundle.pdf
+    if pdf_bytes is None:
+        pdf_bytes = pdf_renderer.get(key)
+        if pdf_bytes is not None and bundle.snapshot_id is not None:
+            store_pdf(db, bundle.snapshot_id, pdf_bytes)
+
+    if pdf_bytes is None:
+        params = {"report_date": report.date.isoformat()}
+        job = find_active_job(db, "zreport_pdf", current_user.tenant_id, params)
+        if job is None:
+            job = enqueue(
+                db,
+                "zreport_pdf",
+                params,
+                tenant_id=current_user.tenant_id,
+                requested_by=current_user.id,
+                priority=PRIORITY_INTERACTIVE,
+            )
+        return job_accepted(job)
+
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+
+@router.post("/zreport/freeze")
+def freeze_z_report(
+    report_date: date = Query(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    """Re-freeze a closed day now instead of waiting for the closeout job."""
+    try:
+        bundle = freeze_day(db, current_user.tenant_id, report_date)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    if bundle.snapshot_id is None:
+        raise HTTPException(
+            status_code=409, detail="Sales for this day changed while freezing; retry"
+        )
+    return {"report_date": report_date, "snapshot_id": bundle.snapshot_id}
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        HTML(string=html_content).write_pdf(tmp.name)
-        tmp.seek(0)
-        pdf_bytes = tmp.read()
 
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename=zreport_{report_date}.pdf"},
+@router.get("/zreport/archive")
+def export_zreport_archive(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    tenant_id: Optional[List[UUID]] = Query(None, description="Defaults to your store"),
+    include_pdf: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    """
+    Zip of the daily CSVs (and PDFs) for a date range and set of stores,
+    streamed as each report completes.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    days = (end_date - start_date).days + 1
+    if days > ZREPORT_ARCHIVE_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Archive range is limited to {ZREPORT_ARCHIVE_MAX_DAYS} days",
+        )
+
+    # Other stores need a grant (scripts/grant_tenant_access.py)
+    tenant_ids = set(tenant_id or [current_user.tenant_id])
+    check_tenant_access(db, current_user, tenant_ids)
+
+    tenants = (
+        db.query(Tenant.id, Tenant.name)
+        .filter(Tenant.id.in_(tenant_ids))
+        .order_by(Tenant.id)
+        .all()
+    )
+    if len(tenants) != len(tenant_ids):
+        raise HTTPException(status_code=404, detail="Unknown store")
+    if days * len(tenants) > ZREPORT_ARCHIVE_MAX_REPORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Archive is limited to {ZREPORT_ARCHIVE_MAX_REPORTS} reports",
+        )
+
+    # One folder per store (tenant names are unique)
+    labels = [(tid, name.replace("/", "_")) for tid, name in tenants]
+    filename = f"zreports_{start_date}_{end_date}.zip"
+    return StreamingResponse(
+        stream_zreport_archive(labels, start_date, end_date, include_pdf),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
@@ -0,0 +1,16 @@
+# routes/metrics.py
+
+from fastapi import APIRouter, Depends
+
+from app.auth.dependencies import require_role
+from app.db.database import engine
+from app.db.pool_metrics import pool_stats
+from app.models.models import User
+
+router = APIRouter()
+
+
+# 📈 Connection pool usage for the worker that serves the request (admin only)
+@router.get("/db-pool")
+def db_pool_metrics(current_user: User = Depends(require_role("admin"))):
+    return pool_stats(engine)
@@ -1,14 +1,34 @@
 # routes/products.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    UploadFile,
+)
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from typing import List
 
 from app.db.database import get_db
 from app.models.models import Product
-from app.models.schemas import ProductCreate, ProductOut
+from app.models.schemas import (
+    CatalogImportResult,
+    ProductChangesOut,
+    ProductCreate,
+    ProductOut,
+    ProductUpdate,
+    PurgeJobOut,
+)
 from app.auth.dependencies import get_current_user, require_role
 from app.core.logging_config import logger
+from services.catalog_cache import catalog_cache
+from services.catalog_feed import product_changes
+from services.catalog_import import import_catalog_csv
+from services.jobs import PRIORITY_BULK, enqueue, job_accepted
+from services.purge import get_purge_job, purge_job_out, soft_delete
 
 router = APIRouter()
 
@@ -23,18 +43,29 @@ def search_products(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    query_lower = query.lower()
-    products = (
-        db.query(Product)
-        .filter(
-            (Product.name.ilike(f"%{query_lower}%"))
-            | (Product.sku.ilike(f"{query_lower}%")),
-            Product.tenant_id == current_user["tenant_id"],
+    return catalog_cache.search(db, current_user["tenant_id"], query, limit=10)
+
+
+# 🔄 Delta sync for terminals: products changed/deleted since a watermark
+@router.get("/products/changes", response_model=ProductChangesOut)
+def get_product_changes(
+    since: str = Query("0", description="Watermark from the previous call"),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        changes = product_changes(db, current_user["tenant_id"], since, limit)
+        logger.info(
+            f"🔄 Catalog delta since {since}: {len(changes['rows'])} changed, "
+            f"{len(changes['deleted'])} deleted"
         )
-        .limit(10)
-        .all()
-    )
-    return products
+        return changes
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Failed to fetch catalog changes since {since}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error fetching catalog changes")
 
 
 # 📦 Get full product list
@@ -44,12 +75,7 @@ def get_products(
 ):
     logger.info("📦 Product list requested")
     try:
-        products = (
-            db.query(Product)
-            .filter(Product.tenant_id == current_user["tenant_id"])
-            .order_by(Product.name)
-            .all()
-        )
+        products = catalog_cache.products(db, current_user["tenant_id"])
         logger.info(f"✅ Returned {len(products)} products")
         return products
     except Exception as e:
@@ -66,16 +92,12 @@ def get_product_by_id(
 ):
     logger.info(f"🔍 Fetching product by ID: {product_id}")
     try:
-        product = (
-            db.query(Product)
-            .filter(
-                Product.id == product_id, Product.tenant_id == current_user["tenant_id"]
-            )
-            .first()
-        )
+        product = catalog_cache.get(db, current_user["tenant_id"], product_id)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         return product
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Failed to fetch product ID {product_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error fetching product")
@@ -96,6 +118,7 @@ def create_product(
         db.add(product)
         db.commit()
         db.refresh(product)
+        catalog_cache.mark_stale(product.tenant_id)
 
         logger.info(
             f"✅ Product '{product.name}' created with ID {product.id} by admin '{current_user['username']}'"
@@ -107,7 +130,101 @@ def create_product(
         raise HTTPException(status_code=500, detail="Something went wrong")
 
 
-# 🗑️ Delete product
+# ✏️ Update product (optimistic concurrency on `version`)
+@router.patch("/products/{product_id}", response_model=ProductOut)
+def update_product(
+    product_id: int,
+    changes: ProductUpdate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_role("admin")),
+):
+    logger.info(
+        f"✏️ Admin '{current_user['username']}' updating product ID {product_id} at version {changes.version}"
+    )
+    product = (
+        db.query(Product)
+        .filter(
+            Product.id == product_id,
+            Product.tenant_id == current_user["tenant_id"],
+            Product.deleted_at.is_(None),
+        )
+        .first()
+    )
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.version != changes.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Product was modified (now at version {product.version}); reload and retry",
+        )
+
+    for field, value in changes.dict(exclude_unset=True, exclude={"version"}).items():
+        setattr(product, field, value)
+
+    try:
+        # The mapper's version_id_col turns this flush into a compare-and-swap
+        db.commit()
+        db.refresh(product)
+        catalog_cache.mark_stale(product.tenant_id)
+        logger.info(f"✅ Product ID {product_id} updated to version {product.version}")
+        return product
+    except StaleDataError:
+        db.rollback()
+        logger.warning(f"⚠️ Concurrent edit on product ID {product_id}")
+        raise HTTPException(
+            status_code=409,
+            detail="Product was modified concurrently; reload and retry",
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Error updating product ID {product_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+# 📥 Bulk import a distributor catalog (CSV) by SKU
+@router.post("/products/import", response_model=CatalogImportResult)
+def import_products(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="Import as a job and poll /jobs"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_role("admin")),
+):
+    logger.info(
+        f"📥 Admin '{current_user['username']}' importing catalog '{file.filename}'"
+    )
+    if background:
+        job = enqueue(
+            db,
+            "catalog_import",
+            {"filename": file.filename},
+            tenant_id=current_user["tenant_id"],
+            requested_by=current_user["id"],
+            priority=PRIORITY_BULK,
+            input_data=file.file.read(),
+        )
+        logger.info(f"🕒 Catalog import '{file.filename}' queued as job {job.id}")
+        return job_accepted(job)
+
+    try:
+        result = import_catalog_csv(db, file.file, current_user["tenant_id"])
+        db.commit()
+        catalog_cache.mark_stale(current_user["tenant_id"])
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Catalog import failed for '{file.filename}': {str(e)}")
+        raise HTTPException(status_code=500, detail="Catalog import failed")
+
+    logger.info(
+        f"✅ Catalog import: {result['inserted']} inserted, {result['updated']} updated, "
+        f"{len(result['errors'])} errors"
+    )
+    return result
+
+
+# 🗑️ Delete product (hidden now, purged with its history in the background)
 @router.delete("/products/{product_id}")
 def delete_product(
     product_id: int,
@@ -121,7 +238,9 @@ def delete_product(
         product = (
             db.query(Product)
             .filter(
-                Product.id == product_id, Product.tenant_id == current_user["tenant_id"]
+                Product.id == product_id,
+                Product.tenant_id == current_user["tenant_id"],
+                Product.deleted_at.is_(None),
             )
             .first()
         )
@@ -131,28 +250,39 @@ def delete_product(
             )
             raise HTTPException(status_code=404, detail="Product not found")
 
-        db.delete(product)
-        db.commit()
+        job = soft_delete(db, product, "product", requested_by=current_user["id"])
+        catalog_cache.mark_stale(current_user["tenant_id"], product_id, deleted=True)
 
         logger.info(
-            f"✅ Product ID {product_id} successfully deleted by admin '{current_user['username']}'"
+            f"✅ Product ID {product_id} deleted by admin '{current_user['username']}', purge job {job.id} queued"
         )
-        return {"message": f"Deleted product with ID {product_id}"}
+        return {
+            "message": f"Deleted product with ID {product_id}",
+            "purge_job_id": job.id,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"❌ Error deleting product ID {product_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Something went wrong")
 
 
+# 📋 Progress of a product purge
+@router.get("/products/purge-jobs/{job_id}", response_model=PurgeJobOut)
+def get_product_purge_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_role("admin")),
+):
+    job = get_purge_job(db, job_id, "product", current_user["tenant_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return purge_job_out(job)
+
+
 @router.get("/categories")
 def get_categories(
     db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)
 ):
-    categories = (
-        db.query(Product.category)
-        .filter(Product.tenant_id == current_user["tenant_id"])
-        .distinct()
-        .order_by(Product.category)
-        .all()
-    )
-    return [c[0] for c in categories if c[0]]
+    return catalog_cache.categories(db, current_user["tenant_id"])
@@ -2,12 +2,15 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from decimal import Decimal
 from typing import List
 
 from app.db.database import get_db
 from app.auth.dependencies import get_current_user
 from app.models.models import Product, Return as ReturnRecord, Sale, SaleItem, User
 from app.models.schemas import ReturnCreateBatch, ReturnRecord as ReturnOut
+from services import cash_drawer
+from services.stock_ledger import StockConflictError, record_stock_change
 
 router = APIRouter(prefix="/returns", tags=["Returns"])
 
@@ -19,17 +22,28 @@ def submit_return(
     current_user: User = Depends(get_current_user),
 ):
     saved_returns = []
+    # Refund at the price actually paid when the sale is known
+    paid_prices = {}
+    refund_total = Decimal("0")
+    # Refunded the way the sale was paid; without a sale, from the drawer
+    payment_type = "cash"
 
     if batch.sale_id:
         sale = (
             db.query(Sale)
-            .filter(Sale.id == batch.sale_id, Sale.tenant_id == current_user.tenant_id)
+            .filter(
+                Sale.id == batch.sale_id,
+                Sale.tenant_id == current_user.tenant_id,
+                Sale.deleted_at.is_(None),
+            )
             .first()
         )
         if not sale:
             raise HTTPException(status_code=404, detail="Sale not found.")
 
+        payment_type = sale.payment_type
         original_items = {item.product_id: item.quantity for item in sale.items}
+        paid_prices = {item.product_id: item.price for item in sale.items}
         prior_returns = (
             db.query(ReturnRecord).filter(ReturnRecord.sale_id == batch.sale_id).all()
         )
@@ -90,9 +104,6 @@ def submit_return(
                 status_code=404, detail=f"Product ID {ret.product_id} not found."
             )
 
-        if ret.restock:
-            product.stock_quantity += ret.quantity
-
         return_record = ReturnRecord(
             product_id=ret.product_id,
             quantity=ret.quantity,
@@ -102,7 +113,28 @@ def submit_return(
             tenant_id=current_user.tenant_id,
         )
         db.add(return_record)
+        db.flush()
         saved_returns.append(return_record)
+        refund_total += (
+            Decimal(str(paid_prices.get(ret.product_id, product.price))) * ret.quantity
+        )
+
+        if ret.restock:
+            try:
+                record_stock_change(
+                    db,
+                    product,
+                    ret.quantity,
+                    "return",
+                    reason=ret.reason,
+                    reference_id=return_record.id,
+                )
+            except StockConflictError as e:
+                db.rollback()
+                raise HTTPException(status_code=409, detail=str(e))
 
+    cash_drawer.record_refund(
+        db, current_user.id, current_user.tenant_id, refund_total, payment_type
+    )
     db.commit()
     return saved_returns
@@ -8,8 +8,16 @@ from datetime import datetime
 
 from app.db.database import get_db
 from app.models.models import Product, Sale, SaleItem
-from app.models.schemas import SaleInput, SaleCreate, SaleOut
+from app.models.schemas import PurgeJobOut, SaleInput, SaleCreate, SaleOut
 from app.auth.dependencies import get_current_user, require_role
+from services import cash_drawer
+from services.catalog_cache import catalog_cache
+from services.purge import get_purge_job, purge_job_out, soft_delete
+from services.stock_ledger import (
+    InsufficientStockError,
+    StockConflictError,
+    record_stock_change,
+)
 import logging
 
 router = APIRouter()
@@ -20,7 +28,12 @@ logger = logging.getLogger(__name__)
 def list_sales(db: Session = Depends(get_db)):
     logger.info("📄 Retrieving all sales with item details")
     try:
-        sales = db.query(Sale).order_by(Sale.timestamp.desc()).all()
+        sales = (
+            db.query(Sale)
+            .filter(Sale.deleted_at.is_(None))
+            .order_by(Sale.timestamp.desc())
+            .all()
+        )
         results = [
             {
                 "id": s.id,
@@ -49,6 +62,7 @@ def get_sales_by_product(query: str, db: Session = Depends(get_db)):
     product_ids = (
         db.query(Product.id)
         .filter((Product.name.ilike(f"%{query}%")) | (Product.sku.ilike(f"%{query}%")))
+        .filter(Product.deleted_at.is_(None))
         .subquery()
     )
 
@@ -61,7 +75,7 @@ def get_sales_by_product(query: str, db: Session = Depends(get_db)):
 
     sales = (
         db.query(Sale)
-        .filter(Sale.id.in_(db.query(sale_ids)))
+        .filter(Sale.id.in_(db.query(sale_ids)), Sale.deleted_at.is_(None))
         .order_by(Sale.timestamp.desc())
         .all()
     )
@@ -74,7 +88,7 @@ def get_sale_by_id(sale_id: int, db: Session = Depends(get_db)):
     sale = (
         db.query(Sale)
         .options(joinedload(Sale.items).joinedload(SaleItem.product))
-        .filter(Sale.id == sale_id)
+        .filter(Sale.id == sale_id, Sale.deleted_at.is_(None))
         .first()
     )
     if not sale:
@@ -88,7 +102,11 @@ def get_sale_by_id(sale_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/sales/checkout")
-def checkout(sale: SaleCreate, db: Session = Depends(get_db)):
+def checkout(
+    sale: SaleCreate,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
     try:
         logger.info("🧾 Incoming sale payload: %s", sale.dict())
 
@@ -97,25 +115,48 @@ def checkout(sale: SaleCreate, db: Session = Depends(get_db)):
             timestamp=sale.timestamp or datetime.utcnow(),
             updated_at=datetime.utcnow(),
             payment_type=sale.payment_type,
+            cashier_id=user["id"],
+            tenant_id=user["tenant_id"],
         )
         db.add(new_sale)
         db.flush()
+        cash_drawer.record_sale(db, new_sale)
 
         for item in sale.items:
+            product = (
+                db.query(Product)
+                .filter(
+                    Product.id == item.product_id,
+                    Product.tenant_id == user["tenant_id"],
+                    Product.deleted_at.is_(None),
+                )
+                .first()
+            )
+            if not product:
+                raise HTTPException(
+                    status_code=404, detail=f"Product {item.product_id} not found"
+                )
             db.add(
                 SaleItem(
                     sale_id=new_sale.id,
-                    product_id=item.product_id,
+                    product_id=product.id,
                     quantity=item.quantity,
                     price=item.price,
                 )
             )
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            if product:
-                product.stock_quantity -= item.quantity
+            record_stock_change(
+                db, product, -item.quantity, "sale", reference_id=new_sale.id
+            )
 
         db.commit()
         return {"message": "Sale completed", "sale_id": new_sale.id}
+    except HTTPException:
+        db.rollback()
+        raise
+    except StockConflictError as e:
+        db.rollback()
+        logger.warning(f"⚠️ Checkout stock conflict: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         db.rollback()
         logger.error(f"❌ Checkout failed: {str(e)}")
@@ -134,9 +175,12 @@ def create_sale(
     try:
         total_amount = 0
         sale_items = []
+        products = []
 
         for item in sale.items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
+            # Price and pre-check come from the catalog cache; the stock
+            # write below re-checks against the live row
+            product = catalog_cache.get(db, user["tenant_id"], item.product_id)
             if not product:
                 raise HTTPException(
                     status_code=404, detail=f"Product {item.product_id} not found"
@@ -153,20 +197,29 @@ def create_sale(
                     product_id=product.id, quantity=item.quantity, price=product.price
                 )
             )
-
-            product.stock_quantity -= item.quantity
+            products.append(product)
 
         new_sale = Sale(
             total_amount=total_amount,
             cashier_id=user["id"],
             payment_type=sale.payment_type,
+            tenant_id=user["tenant_id"],
         )
         db.add(new_sale)
         db.flush()
+        cash_drawer.record_sale(db, new_sale)
 
-        for item in sale_items:
+        for item, product in zip(sale_items, products):
             item.sale_id = new_sale.id
             db.add(item)
+            record_stock_change(
+                db,
+                product,
+                -item.quantity,
+                "sale",
+                reference_id=new_sale.id,
+                min_stock=0,
+            )
 
         db.commit()
         logger.info(f"✅ Sale {new_sale.id} completed successfully")
@@ -175,6 +228,13 @@ def create_sale(
     except HTTPException:
         db.rollback()
         raise
+    except InsufficientStockError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except StockConflictError as e:
+        db.rollback()
+        logger.warning(f"⚠️ Sale stock conflict: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         db.rollback()
         logger.error(f"🔥 Failed to create sale: {str(e)}", exc_info=True)
@@ -189,17 +249,42 @@ def delete_sale(
 ):
     logger.info(f"🗑️ Delete request for sale ID {sale_id} by admin: {user['username']}")
     try:
-        sale = db.query(Sale).filter(Sale.id == sale_id).first()
+        sale = (
+            db.query(Sale)
+            .filter(
+                Sale.id == sale_id,
+                Sale.tenant_id == user["tenant_id"],
+                Sale.deleted_at.is_(None),
+            )
+            .first()
+        )
         if not sale:
             raise HTTPException(status_code=404, detail=f"Sale {sale_id} not found")
 
-        db.delete(sale)
-        db.commit()
+        # Items and returns are purged in batches by the job worker
+        cash_drawer.reverse_sale(db, sale)
+        job = soft_delete(db, sale, "sale", requested_by=user["id"])
 
-        logger.info(f"✅ Sale ID {sale_id} deleted successfully by {user['username']}")
-        return {"message": f"Sale {sale_id} deleted"}
+        logger.info(
+            f"✅ Sale ID {sale_id} deleted by {user['username']}, purge job {job.id} queued"
+        )
+        return {"message": f"Sale {sale_id} deleted", "purge_job_id": job.id}
 
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"🔥 Failed to delete sale ID {sale_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Unexpected server error")
+
+
+@router.get("/sales/purge-jobs/{job_id}", response_model=PurgeJobOut)
+def get_sale_purge_job(
+    job_id: int,
+    user: dict = Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+):
+    job = get_purge_job(db, job_id, "sale", user["tenant_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return purge_job_out(job)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.models.models import User
 from app.models.schemas import UserCreate, UserOut, LoginInput, TokenResponse
-from passlib.hash import bcrypt
 from app.auth.auth import create_access_token, require_role, get_current_user
+from app.auth.hashing import HashingBusyError, password_hasher, rehash_password
 from app.db.database import get_db
 import logging
 from typing import List
@@ -12,9 +13,17 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-ins in progress, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 # 👤 Register a new user
 @router.post("/users/register", response_model=UserOut)
-def register_user(
+async def register_user(
     user: UserCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role("admin")),
@@ -23,8 +32,8 @@ def register_user(
         f"📥 Registration attempt for username: {user.username} (role: {user.role}) by admin {current_user.username}"
     )
 
-    try:
-        existing_user = (
+    def username_taken():
+        return (
             db.query(User)
             .filter(
                 User.username == user.username,
@@ -32,20 +41,27 @@ def register_user(
             )
             .first()
         )
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already exists")
-
-        hashed_pw = bcrypt.hash(user.password)
-        new_user = User(
-            username=user.username,
-            password_hash=hashed_pw,
-            role=user.role,
-            tenant_id=current_user.tenant_id,
-        )
 
+    def save(new_user: User) -> User:
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        return new_user
+
+    try:
+        if await run_in_threadpool(username_taken):
+            raise HTTPException(status_code=400, detail="Username already exists")
+
+        hashed_pw = await password_hasher.hash(user.password)
+        new_user = await run_in_threadpool(
+            save,
+            User(
+                username=user.username,
+                password_hash=hashed_pw,
+                role=user.role,
+                tenant_id=current_user.tenant_id,
+            ),
+        )
 
         logger.info(
             f"✅ User registered: {new_user.username} (ID: {new_user.id}, role: {new_user.role}, tenant: {new_user.tenant_id})"
@@ -54,27 +70,43 @@ def register_user(
 
     except HTTPException:
         raise
+    except HashingBusyError:
+        logger.warning(f"⚠️ Registration for {user.username} refused: hashing busy")
+        raise _hashing_busy()
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         logger.error(f"❌ Registration failed for {user.username}: {str(e)}")
         raise HTTPException(status_code=500, detail="Registration error")
 
 
 # 🔐 Login endpoint
 @router.post("/login", response_model=TokenResponse)
-def login(user: LoginInput, db: Session = Depends(get_db)):
+async def login(user: LoginInput, db: Session = Depends(get_db)):
     logger.info(f"🔐 Login attempt for username: {user.username}")
 
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == user.username).first()
+    )
 
     if not db_user:
         logger.warning(f"⚠️ Login failed: User '{user.username}' not found")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not bcrypt.verify(user.password, db_user.password_hash):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(
+            user.password, db_user.password_hash
+        )
+    except HashingBusyError:
+        logger.warning(f"⚠️ Login for '{user.username}' refused: hashing busy")
+        raise _hashing_busy()
+
+    if not valid:
         logger.warning(f"⚠️ Login failed: Incorrect password for user '{user.username}'")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    if new_hash:
+        await run_in_threadpool(rehash_password, db, db_user, new_hash)
+
     token = create_access_token(
         data={
             "sub": db_user.username,
@@ -88,6 +120,12 @@ def login(user: LoginInput, db: Session = Depends(get_db)):
     return {"access_token": token, "token_type": "bearer"}
 
 
+# 📈 Password hashing queue metrics (admin only)
+@router.get("/users/password-hashing/stats")
+def password_hashing_stats(current_user: User = Depends(require_role("admin"))):
+    return password_hasher.stats()
+
+
 # 📋 List all users (admin only)
 @router.get("/users", response_model=List[UserOut])
 def list_users(
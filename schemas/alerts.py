@@ -1,4 +1,6 @@
 # schemas/alerts.py
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -6,3 +8,4 @@ class LowStockAlert(BaseModel):
     product_id: int
     name: str
     stock_level: int
+    threshold: Optional[int] = None
@@ -1,7 +1,7 @@
 # schemas/analytics.py
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
 class DailySalesSummary(BaseModel):
@@ -28,6 +28,12 @@ class InventorySnapshot(BaseModel):
     price: float
 
 
+class InventorySnapshotPage(BaseModel):
+    # Items only carry the fields requested via `fields`
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
 class InventoryMovement(BaseModel):
     product_id: int
     name: str
@@ -0,0 +1,37 @@
+# scripts/freeze_zreports.py
+#
+# Closeout job: freeze the Z-report (JSON, CSV and PDF) of every closed day
+# that has no snapshot yet or was invalidated by a late write. Run shortly
+# after midnight (cron):
+#   python -m scripts.freeze_zreports --days 7
+
+import argparse
+
+from app.db.database import SessionLocal
+from services.zreport_snapshots import freeze_closed_days
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Freeze closed-day Z-reports")
+    parser.add_argument(
+        "--days", type=int, default=7, help="How many closed days to check"
+    )
+    parser.add_argument("--tenant-id", help="Only this store (tenant) UUID")
+    parser.add_argument(
+        "--no-pdf", action="store_true", help="Skip PDFs (rendered on first view)"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        frozen = freeze_closed_days(
+            db, days_back=args.days, with_pdf=not args.no_pdf, tenant_id=args.tenant_id
+        )
+    finally:
+        db.close()
+
+    print(f"✅ {frozen} Z-reports frozen")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# scripts/grant_tenant_access.py
+#
+# Let a user read other stores (e.g. a regional manager exporting Z-report
+# archives), or take that away again:
+#   python scripts/grant_tenant_access.py alice "Store 12" "Store 14"
+#   python scripts/grant_tenant_access.py --revoke alice "Store 14"
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.database import SessionLocal
+from app.models.models import Tenant, TenantGrant, User
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grant or revoke access to stores")
+    parser.add_argument("username")
+    parser.add_argument("stores", nargs="+", help="tenant names")
+    parser.add_argument("--revoke", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == args.username).first()
+        if user is None:
+            sys.exit(f"❌ No user {args.username}")
+        tenants = db.query(Tenant).filter(Tenant.name.in_(args.stores)).all()
+        unknown = set(args.stores) - {t.name for t in tenants}
+        if unknown:
+            sys.exit(f"❌ Unknown stores: {', '.join(sorted(unknown))}")
+
+        if args.revoke:
+            db.query(TenantGrant).filter(
+                TenantGrant.user_id == user.id,
+                TenantGrant.tenant_id.in_([t.id for t in tenants]),
+            ).delete(synchronize_session=False)
+        else:
+            db.execute(
+                insert(TenantGrant)
+                .values([{"user_id": user.id, "tenant_id": t.id} for t in tenants])
+                .on_conflict_do_nothing()
+            )
+        db.commit()
+        action = "Revoked" if args.revoke else "Granted"
+        print(f"✅ {action} {len(tenants)} stores for {user.username}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
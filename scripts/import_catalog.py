@@ -0,0 +1,40 @@
+# scripts/import_catalog.py
+#
+# Load a distributor catalog straight into the database for one store:
+#   python -m scripts.import_catalog catalog.csv --tenant-id <uuid>
+
+import argparse
+import sys
+
+from app.db.database import SessionLocal
+from services.catalog_import import import_catalog_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a product catalog CSV")
+    parser.add_argument("path", help="CSV with name, sku, price[, category, ...]")
+    parser.add_argument("--tenant-id", required=True, help="Store (tenant) UUID")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            result = import_catalog_csv(db, f, args.tenant_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(
+        f"✅ {result['rows_read']} rows read: {result['inserted']} inserted, "
+        f"{result['updated']} updated"
+    )
+    for error in result["errors"]:
+        print(f"❌ line {error['line']} ({error['sku']}): {error['error']}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
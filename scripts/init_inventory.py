@@ -1,8 +1,8 @@
 # scripts/init_inventory.py
 
-from datetime import datetime
 from app.db.database import SessionLocal
-from app.models.models import Product, InventoryEvent
+from app.models.models import Product
+from services.stock_ledger import record_stock_change
 
 
 def init_inventory_event(product_id: int, change: int, reason: str):
@@ -13,19 +13,8 @@ def init_inventory_event(product_id: int, change: int, reason: str):
             print(f"❌ Product ID {product_id} not found.")
             return
 
-        # Update inventory quantity
-        product.stock_quantity += change
-        db.add(product)
-
-        # Insert inventory event
-        event = InventoryEvent(
-            product_id=product_id,
-            change=change,
-            reason=reason,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-        )
-        db.add(event)
+        # Update inventory quantity and append the ledger row
+        record_stock_change(db, product, change, "adjustment", reason=reason)
 
         db.commit()
         print(
@@ -0,0 +1,56 @@
+# scripts/job_worker.py
+#
+# Background job worker: runs queued PDF exports, long-range analytics,
+# catalog imports and purges off the API. Start as many as the box allows, e.g.
+#   python -m scripts.job_worker --processes 4
+# Workers share the jobs table (SKIP LOCKED), so extra hosts just add more.
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+import services.job_handlers  # noqa: F401  (registers the handlers)
+from services.jobs import work
+
+
+def run_worker(name: str) -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s"
+    )
+    stop = threading.Event()
+    # Finish the current job, then exit
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    work(name, stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument(
+        "--processes", type=int, default=1, help="Worker processes to start"
+    )
+    args = parser.parse_args()
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    if args.processes == 1:
+        run_worker(prefix)
+        return
+
+    # spawn: each worker builds its own engine and LISTEN connection
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=run_worker, args=(f"{prefix}/{n}",), name=f"job-worker-{n}")
+        for n in range(args.processes)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+# scripts/purge_deleted.py
+#
+# Queue a purge job for every soft-deleted product or sale that has none
+# queued or running (e.g. its purge failed). The job worker does the rest.
+# Safe to run from cron alongside the API.
+
+from app.db.database import SessionLocal
+from services.purge import queue_missing_purges
+
+
+def purge_deleted():
+    db = SessionLocal()
+    try:
+        queued = queue_missing_purges(db)
+    finally:
+        db.close()
+    print(f"✅ {queued} purge jobs queued")
+
+
+if __name__ == "__main__":
+    purge_deleted()
@@ -0,0 +1,24 @@
+# scripts/snapshot_stock.py
+#
+# Checkpoint stock levels for every tenant. Run nightly (cron) so
+# point-in-time stock queries only replay a day of ledger rows.
+
+from app.db.database import SessionLocal
+from services.stock_ledger import take_stock_snapshots
+
+
+def snapshot_stock():
+    db = SessionLocal()
+    try:
+        created = take_stock_snapshots(db)
+        db.commit()
+        print(f"✅ {created} stock snapshots taken")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    snapshot_stock()
@@ -0,0 +1,177 @@
+# services/ai_cache.py
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "2000"))
+# Safety net on top of the data watermark, e.g. for prompts about "now"
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", "3600"))
+# How alike two words must be to count as the same word misspelled
+AI_CACHE_WORD_SIMILARITY = float(os.getenv("AI_CACHE_WORD_SIMILARITY", "0.8"))
+# Prompts compared per (tenant, mode, watermark) when looking for a near match
+NEAR_MATCH_SCAN_LIMIT = 200
+
+# Words that never change what is being asked
+FILLER_WORDS = frozenset(
+    "a an the please can could would you me us tell show give what whats "
+    "which is are was were do does did i we our my of for in on to".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+_DIGIT = re.compile(r"[0-9]")
+
+Words = Tuple[str, ...]
+
+
+def normalize_prompt(prompt: str) -> Words:
+    """
+    The words that carry meaning, in order: lower-cased, punctuation and
+    filler dropped, simple plurals folded. Order is kept, since "sales
+    greater than returns" and "returns greater than sales" differ.
+    """
+    words = []
+    for word in _WORD.findall(prompt.lower()):
+        if word in FILLER_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return tuple(words)
+
+
+def _same_word(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    # Quantities and identifiers ("top 5", "store2", "sku1042") are never typos
+    if _DIGIT.search(a) or _DIGIT.search(b):
+        return False
+    return SequenceMatcher(None, a, b).ratio() >= AI_CACHE_WORD_SIMILARITY
+
+
+def is_near_duplicate(a: Words, b: Words) -> bool:
+    """
+    True when the prompts match word for word, allowing misspellings, e.g.
+    "top sellng products" ~ "top selling products", but not "this week" ~
+    "last week" or "store1 sales" ~ "store2 sales".
+    """
+    return len(a) == len(b) and all(_same_word(x, y) for x, y in zip(a, b))
+
+
+class CachedAnswer:
+    __slots__ = ("answer", "sql", "stored_at", "hits")
+
+    def __init__(self, answer: str, sql: Optional[List[str]] = None):
+        self.answer = answer
+        self.sql = sql or []
+        self.stored_at = time.monotonic()
+        self.hits = 0
+
+
+class AnswerCache:
+    """
+    Final answers (and the SQL behind them) keyed by tenant, mode, data
+    watermark and normalized prompt. Any write to the tenant's data moves
+    the watermark, so stale answers are never served; they age out of the
+    LRU. A miss on the exact key falls back to scanning the bucket for a
+    near-duplicate prompt.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = AI_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = AI_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, CachedAnswer]" = OrderedDict()
+        # (tenant, mode, watermark) -> normalized prompts stored under it
+        self._buckets: Dict[Tuple[str, str, str], List[Words]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, tenant_id, mode: str, prompt: str, watermark: str
+    ) -> Optional[CachedAnswer]:
+        bucket_key = (str(tenant_id), mode, watermark)
+        words = normalize_prompt(prompt)
+        with self._lock:
+            entry = self._lookup(bucket_key + (words,))
+            if entry is None:
+                for other in self._buckets.get(bucket_key, ())[-NEAR_MATCH_SCAN_LIMIT:]:
+                    if is_near_duplicate(words, other):
+                        entry = self._lookup(bucket_key + (other,))
+                        if entry is not None:
+                            break
+            if entry is None:
+                self.misses += 1
+                return None
+            entry.hits += 1
+            self.hits += 1
+            return entry
+
+    def put(
+        self,
+        tenant_id,
+        mode: str,
+        prompt: str,
+        watermark: str,
+        answer: str,
+        sql: Optional[List[str]] = None,
+    ) -> None:
+        bucket_key = (str(tenant_id), mode, watermark)
+        words = normalize_prompt(prompt)
+        if not words:
+            return
+        key = bucket_key + (words,)
+        with self._lock:
+            if key not in self._entries:
+                self._buckets.setdefault(bucket_key, []).append(words)
+            self._entries[key] = CachedAnswer(answer, sql)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+
+    def _lookup(self, key: tuple) -> Optional[CachedAnswer]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self._forget(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _forget(self, key: tuple) -> None:
+        bucket_key, words = key[:3], key[3]
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            return
+        try:
+            bucket.remove(words)
+        except ValueError:
+            pass
+        if not bucket:
+            del self._buckets[bucket_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+answer_cache = AnswerCache()
@@ -1,69 +1,145 @@
 # services/ai_functions.py
 
-from datetime import datetime, timedelta
+import inspect
+from typing import Any, Callable, Dict, List, Optional, Union, get_args, get_origin
+
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from app.models.models import Product, SaleItem, Sale
-from app.db.database import get_db
-from fastapi import Depends
-
-
-def get_top_margin_products(
-    store_id: str, days: int = 30, db: Session = Depends(get_db)
-):
-    try:
-        start_date = datetime.utcnow() - timedelta(days=days)
-
-        result = (
-            db.query(
-                Product.name.label("product"),
-                func.sum(SaleItem.quantity).label("units_sold"),
-                func.sum(SaleItem.price * SaleItem.quantity).label("total_margin"),
-            )
-            .join(SaleItem, SaleItem.product_id == Product.id)
-            .join(Sale, Sale.id == SaleItem.sale_id)
-            .filter(Sale.store_id == store_id)
-            .filter(Sale.timestamp >= start_date)
-            .group_by(Product.name)
-            .order_by(desc("total_margin"))
-            .limit(5)
-            .all()
-        )
-
-        return [
-            {
-                "product": row.product,
-                "units_sold": int(row.units_sold),
-                "total_margin": float(row.total_margin),
-            }
-            for row in result
-        ]
-    except Exception as e:
-        return f"Query failed: {str(e)}"
-
-
-def get_top_category(store_id: str, days: int = 30, db: Session = Depends(get_db)):
-    try:
-        start_date = datetime.utcnow() - timedelta(days=days)
-
-        result = (
-            db.query(
-                Product.category,
-                func.sum(SaleItem.price * SaleItem.quantity).label("total_margin"),
-            )
-            .join(SaleItem, SaleItem.product_id == Product.id)
-            .join(Sale, Sale.id == SaleItem.sale_id)
-            .filter(Sale.store_id == store_id)
-            .filter(Sale.timestamp >= start_date)
-            .group_by(Product.category)
-            .order_by(desc("total_margin"))
-            .limit(1)
-            .first()
-        )
-
-        if result:
-            return f"The top-selling category is {result.category} with ${round(result.total_margin, 2)} in margin."
-        else:
-            return "No category data available."
-    except Exception as e:
-        return f"Query failed: {str(e)}"
+
+from services.analytics_queries import category_sales, top_margin_products
+
+# Python annotation -> JSON schema type for generated function parameters
+JSON_TYPES = {int: "integer", float: "number", str: "string", bool: "boolean"}
+
+
+class AiFunction:
+    __slots__ = ("name", "fn", "description", "schema")
+
+    def __init__(self, name: str, fn: Callable, description: str, schema: dict):
+        self.name = name
+        self.fn = fn
+        self.description = description
+        self.schema = schema
+
+
+AI_FUNCTIONS: Dict[str, AiFunction] = {}
+
+
+def _json_type(annotation) -> str:
+    if get_origin(annotation) is Union:
+        # Optional[X] -> X
+        annotation = next(a for a in get_args(annotation) if a is not type(None))
+    return JSON_TYPES.get(annotation, "string")
+
+
+def ai_function(description: str, **param_docs: str):
+    """
+    Register `fn(db, tenant_id, **params) -> str` as a function the assistant
+    may call. The OpenAI schema is generated from the signature: every
+    parameter after (db, tenant_id) becomes a property, typed from its
+    annotation, documented from `param_docs`, required if it has no default.
+    """
+
+    def register(fn):
+        properties, required = {}, []
+        params = list(inspect.signature(fn).parameters.values())[2:]
+        for param in params:
+            prop = {"type": _json_type(param.annotation)}
+            if param.name in param_docs:
+                prop["description"] = param_docs[param.name]
+            if param.default is inspect.Parameter.empty:
+                required.append(param.name)
+            elif param.default is not None:
+                prop["default"] = param.default
+            properties[param.name] = prop
+
+        schema = {
+            "name": fn.__name__,
+            "description": description,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": required,
+            },
+        }
+        AI_FUNCTIONS[fn.__name__] = AiFunction(fn.__name__, fn, description, schema)
+        return fn
+
+    return register
+
+
+def function_definitions() -> List[dict]:
+    return [f.schema for f in AI_FUNCTIONS.values()]
+
+
+def call_ai_function(
+    name: str, db: Session, tenant_id, arguments: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Run a registered function for `tenant_id` with model-supplied arguments.
+    Unknown arguments are dropped and values coerced to the declared types,
+    since the model occasionally sends "30" for 30. None if not registered.
+    """
+    entry = AI_FUNCTIONS.get(name)
+    if entry is None:
+        return None
+
+    kwargs = {}
+    for param in list(inspect.signature(entry.fn).parameters.values())[2:]:
+        if param.name not in arguments:
+            continue
+        value = arguments[param.name]
+        json_type = entry.schema["parameters"]["properties"][param.name]["type"]
+        if json_type == "integer":
+            value = int(value)
+        elif json_type == "number":
+            value = float(value)
+        kwargs[param.name] = value
+    return entry.fn(db, tenant_id, **kwargs)
+
+
+# ── Functions ────────────────────────────────────────────────
+@ai_function(
+    "Get top-selling products by margin over a given time window",
+    days="How many days back to look",
+    limit="How many products to return",
+)
+def get_top_margin_products(db: Session, tenant_id, days: int = 30, limit: int = 5):
+    rows = top_margin_products(db, tenant_id, limit=min(limit, 50), days=days)
+    if not rows:
+        return f"No sales in the last {days} days."
+    return "Top margin products:\n" + "\n".join(
+        f"- {r['name']}: ${round(r['margin_dollars'], 2)} margin "
+        f"({r['margin_percent']}%) from {r['units_sold']} units"
+        for r in rows
+    )
+
+
+@ai_function(
+    "Return the top-selling category by revenue over a period",
+    days="How many days back to look",
+)
+def get_top_category(db: Session, tenant_id, days: int = 30):
+    rows = category_sales(db, tenant_id, days=days)
+    if not rows:
+        return "No category data available."
+    top = rows[0]
+    return (
+        f"The top-selling category is {top['category']} with "
+        f"${round(top['total_revenue'], 2)} in revenue "
+        f"from {top['total_units_sold']} units."
+    )
+
+
+@ai_function(
+    "Break down revenue and units sold by product category over a period",
+    days="How many days back to look",
+)
+def get_category_breakdown(db: Session, tenant_id, days: int = 30):
+    rows = category_sales(db, tenant_id, days=days)
+    if not rows:
+        return "No category data available."
+    return "Sales by category:\n" + "\n".join(
+        f"- {r['category']}: ${round(r['total_revenue'], 2)} from "
+        f"{r['total_units_sold']} units (avg ${r['avg_price']})"
+        for r in rows
+    )
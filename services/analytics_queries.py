@@ -0,0 +1,196 @@
+# services/analytics_queries.py
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import sqlalchemy
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import InventoryEvent, Product, Return, Sale
+
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "1000"))
+# Upper bound on reuse even while the data watermark stands still
+ANALYTICS_CACHE_TTL_SECONDS = int(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "900"))
+
+
+def data_watermark(db: Session, tenant_id) -> str:
+    """
+    Changes whenever the tenant's sales, returns, catalog or stock move, and
+    at midnight, since windows like "last 30 days" depend on the date. One
+    round trip of index-backed MAX() lookups. Sales are edited and soft
+    deleted in place, so their latest updated_at counts alongside the
+    newest id.
+    """
+    row = db.execute(
+        select(
+            select(func.max(Sale.id))
+            .where(Sale.tenant_id == tenant_id)
+            .scalar_subquery(),
+            select(func.max(Sale.updated_at))
+            .where(Sale.tenant_id == tenant_id)
+            .scalar_subquery(),
+            select(func.max(Return.id))
+            .where(Return.tenant_id == tenant_id)
+            .scalar_subquery(),
+            select(func.max(Product.change_seq))
+            .where(Product.tenant_id == tenant_id)
+            .scalar_subquery(),
+            select(func.max(InventoryEvent.id))
+            .where(InventoryEvent.tenant_id == tenant_id)
+            .scalar_subquery(),
+        )
+    ).one()
+    return ":".join(str(v or 0) for v in row) + f":{date.today().isoformat()}"
+
+
+class AnalyticsCache:
+    """
+    Results of tenant-scoped aggregates keyed by query, arguments and the
+    tenant's data watermark. Dashboards and the assistant share it, so a
+    figure computed for one is a lookup for the other until data changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANALYTICS_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = ANALYTICS_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+analytics_cache = AnalyticsCache()
+
+
+def cached_aggregate(fn):
+    """
+    Serve `fn(db, tenant_id, **kwargs)` from the analytics cache. Results
+    are shared between callers and must be treated as read-only.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(db: Session, tenant_id, **kwargs):
+        watermark = data_watermark(db, tenant_id)
+        key = (fn.__name__, str(tenant_id), tuple(sorted(kwargs.items())), watermark)
+        result = analytics_cache.get(key)
+        if result is None:
+            result = fn(db, tenant_id, **kwargs)
+            analytics_cache.put(key, result)
+        return result
+
+    return wrapper
+
+
+def _since(days: Optional[int]) -> Optional[datetime]:
+    return datetime.utcnow() - timedelta(days=days) if days else None
+
+
+@cached_aggregate
+def top_margin_products(
+    db: Session, tenant_id, limit: int = 10, days: Optional[int] = None
+) -> list:
+    rows = db.execute(
+        sqlalchemy.text(
+            """
+            SELECT
+                p.id AS product_id,
+                p.name,
+                p.category,
+                SUM(si.quantity) AS units_sold,
+                SUM(si.quantity * si.price) AS revenue,
+                SUM(si.quantity * COALESCE(p.cost_basis, 0)) AS cost_basis,
+                SUM(
+                    si.quantity *
+                    (si.price - COALESCE(p.cost_basis, 0))
+                ) AS margin_dollars,
+                CASE
+                    WHEN SUM(si.quantity * si.price) > 0 THEN
+                        ROUND(
+                            100.0 * SUM(si.quantity * (si.price -
+                            COALESCE(p.cost_basis, 0))) /
+                            SUM(si.quantity * si.price), 2
+                        )
+                    ELSE 0
+                END AS margin_percent
+            FROM sale_items si
+            JOIN sales s ON si.sale_id = s.id
+            JOIN products p ON si.product_id = p.id
+            WHERE s.tenant_id = :tenant_id
+              AND s.deleted_at IS NULL
+              AND (CAST(:since AS timestamp) IS NULL OR s.timestamp >= :since)
+            GROUP BY p.id, p.name, p.category
+            ORDER BY margin_dollars DESC
+            LIMIT :limit
+            """
+        ),
+        {"tenant_id": tenant_id, "since": _since(days), "limit": limit},
+    ).fetchall()
+    return [dict(r._mapping) for r in rows]
+
+
+@cached_aggregate
+def category_sales(db: Session, tenant_id, days: Optional[int] = None) -> list:
+    rows = db.execute(
+        sqlalchemy.text(
+            """
+            SELECT
+                category,
+                SUM(si.quantity) AS total_units_sold,
+                SUM(si.quantity * si.price) AS total_revenue,
+                ROUND(
+                    SUM(si.quantity * si.price) /
+                    NULLIF(SUM(si.quantity), 0),
+                    2
+                ) AS avg_price
+            FROM sale_items si
+            JOIN sales s ON si.sale_id = s.id
+            JOIN products p ON si.product_id = p.id
+            WHERE s.tenant_id = :tenant_id
+              AND s.deleted_at IS NULL
+              AND (CAST(:since AS timestamp) IS NULL OR s.timestamp >= :since)
+            GROUP BY category
+            ORDER BY total_revenue DESC
+            """
+        ),
+        {"tenant_id": tenant_id, "since": _since(days)},
+    ).fetchall()
+    return [dict(r._mapping) for r in rows]
@@ -0,0 +1,202 @@
+# services/analytics_reports.py
+#
+# Report queries shared by the analytics routes and the background job
+# worker, so long ranges can be computed off the request path.
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import sqlalchemy
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.models import Product, Return, Sale, SaleItem
+from schemas.analytics import KpiSummary
+
+
+def parse_range(start_date: str, end_date: str):
+    """YYYY-MM-DD strings to a half-open [start, end) datetime range."""
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    return start, end
+
+
+def sales_summary(
+    db: Session,
+    tenant_id,
+    start: datetime,
+    end: datetime,
+    cashier_id: Optional[int] = None,
+    category: Optional[str] = None,
+) -> List[dict]:
+    base_query = db.query(
+        func.date(Sale.timestamp).label("sale_date"),
+        func.count(Sale.id).label("total_sales_count"),
+        func.sum(Sale.total_amount).label("total_sales_value"),
+        func.avg(Sale.total_amount).label("avg_sale_value"),
+    ).filter(
+        Sale.timestamp >= start,
+        Sale.timestamp < end,
+        Sale.tenant_id == tenant_id,
+        Sale.deleted_at.is_(None),
+    )
+
+    if cashier_id:
+        base_query = base_query.filter(Sale.cashier_id == cashier_id)
+
+    if category:
+        base_query = (
+            base_query.join(SaleItem).join(Product).filter(Product.category == category)
+        )
+
+    base_query = base_query.group_by(func.date(Sale.timestamp)).order_by(
+        func.date(Sale.timestamp)
+    )
+
+    results = base_query.all()
+
+    return [
+        {
+            "sale_date": row.sale_date.isoformat(),
+            "total_sales_count": int(row.total_sales_count),
+            "total_sales_value": float(row.total_sales_value or 0),
+            "avg_sale_value": float(row.avg_sale_value or 0),
+            "day_of_week": row.sale_date.strftime("%A"),
+        }
+        for row in results
+    ]
+
+
+def kpi_summary(
+    db: Session,
+    tenant_id,
+    start,
+    end,
+    cashier_id: Optional[int] = None,
+    category: Optional[str] = None,
+) -> dict:
+    delta_days = (end - start).days
+    prev_end = start - timedelta(days=1)
+    prev_start = prev_end - timedelta(days=delta_days - 1)
+
+    def compute_kpis(start, end):
+        sale_query = db.query(Sale).filter(
+            Sale.timestamp >= start,
+            Sale.timestamp < end,
+            Sale.tenant_id == tenant_id,
+            Sale.deleted_at.is_(None),
+        )
+        if cashier_id:
+            sale_query = sale_query.filter(Sale.cashier_id == cashier_id)
+
+        total_sales, total_transactions = sale_query.with_entities(
+            func.coalesce(func.sum(Sale.total_amount), 0),
+            func.count(Sale.id),
+        ).one()
+
+        days_tracked = max((end - start).days, 1)
+        avg_daily_sales = total_sales / days_tracked
+
+        # Total units sold
+        item_query = (
+            db.query(SaleItem)
+            .join(Sale)
+            .filter(
+                Sale.timestamp >= start,
+                Sale.timestamp < end,
+                Sale.tenant_id == tenant_id,
+                Sale.deleted_at.is_(None),
+            )
+        )
+        if cashier_id:
+            item_query = item_query.filter(Sale.cashier_id == cashier_id)
+        if category:
+            item_query = item_query.join(Product).filter(Product.category == category)
+
+        total_units = item_query.with_entities(
+            func.coalesce(func.sum(SaleItem.quantity), 0)
+        ).scalar()
+
+        avg_basket_size = total_units / total_transactions if total_transactions else 0
+
+        # Return quantity
+        return_query = db.query(Return).filter(
+            Return.timestamp >= start,
+            Return.timestamp < end,
+            Return.tenant_id == tenant_id,
+        )
+        if category:
+            return_query = return_query.join(Product).filter(
+                Product.category == category
+            )
+
+        total_returned = return_query.with_entities(
+            func.coalesce(func.sum(Return.quantity), 0)
+        ).scalar()
+
+        return_rate = (total_returned / total_units * 100) if total_units else 0
+
+        # Top category, under the same filters as the figures above
+        top_cat_sql = sqlalchemy.text(
+            """
+            SELECT p.category, SUM(si.quantity * si.price) AS revenue
+            FROM sale_items si
+            JOIN sales s ON si.sale_id = s.id
+            JOIN products p ON si.product_id = p.id
+            WHERE s.timestamp >= :start AND s.timestamp < :end
+              AND s.tenant_id = :tenant_id
+              AND s.deleted_at IS NULL
+            {cashier_filter}
+            {category_filter}
+            GROUP BY p.category
+            ORDER BY revenue DESC
+            LIMIT 1
+        """.replace(
+                "{cashier_filter}",
+                "AND s.cashier_id = :cashier_id" if cashier_id else "",
+            ).replace(
+                "{category_filter}",
+                "AND p.category = :category" if category else "",
+            )
+        )
+
+        sql_params = {"start": start, "end": end, "tenant_id": tenant_id}
+        if cashier_id:
+            sql_params["cashier_id"] = cashier_id
+        if category:
+            sql_params["category"] = category
+
+        top_category_row = db.execute(top_cat_sql, sql_params).fetchone()
+        top_category = top_category_row[0] if top_category_row else "N/A"
+
+        return KpiSummary(
+            total_sales=round(float(total_sales), 2),
+            avg_daily_sales=round(float(avg_daily_sales), 2),
+            total_transactions=total_transactions,
+            avg_basket_size=round(float(avg_basket_size), 2),
+            return_rate=round(float(return_rate), 2),
+            top_category=top_category,
+        )
+
+    current = compute_kpis(start, end)
+    previous = compute_kpis(prev_start, prev_end)
+
+    def safe_delta(curr, prev):
+        if prev == 0:
+            return 0.0
+        return round(((curr - prev) / prev) * 100, 2)
+
+    return {
+        **current.model_dump(),
+        "delta_total_sales": safe_delta(current.total_sales, previous.total_sales),
+        "delta_avg_daily_sales": safe_delta(
+            current.avg_daily_sales, previous.avg_daily_sales
+        ),
+        "delta_total_transactions": safe_delta(
+            current.total_transactions, previous.total_transactions
+        ),
+        "delta_avg_basket_size": safe_delta(
+            current.avg_basket_size, previous.avg_basket_size
+        ),
+        "delta_return_rate": safe_delta(current.return_rate, previous.return_rate),
+    }
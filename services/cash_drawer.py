@@ -0,0 +1,149 @@
+# services/cash_drawer.py
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.models import CashierSession, Sale
+from services.notifications import notify
+
+# Every drawer change is published here for the live session dashboard
+CASHIER_SESSIONS_CHANNEL = "cashier_sessions"
+
+# What a dashboard needs to recompute a session's metrics from one message
+LIVE_COLUMNS = (
+    CashierSession.id,
+    CashierSession.cashier_id,
+    CashierSession.tenant_id,
+    CashierSession.terminal_id,
+    CashierSession.opened_at,
+    CashierSession.closed_at,
+    CashierSession.opening_cash,
+    CashierSession.cash_total,
+    CashierSession.card_total,
+    CashierSession.sale_count,
+    CashierSession.refund_total,
+    CashierSession.refund_count,
+    CashierSession.cash_refund_total,
+    CashierSession.last_activity_at,
+)
+
+
+def session_payload(session) -> dict:
+    """Counters of a CashierSession (or a row of LIVE_COLUMNS) as a plain dict."""
+    return {column.key: getattr(session, column.key) for column in LIVE_COLUMNS}
+
+
+def publish_session(db: Session, session, state: str = "updated") -> None:
+    """Tell dashboards about a drawer change once the transaction commits."""
+    payload = session_payload(session)
+    payload["state"] = state
+    notify(db, CASHIER_SESSIONS_CHANNEL, payload)
+
+
+def expected_cash(session) -> Decimal:
+    """
+    What should physically be in a drawer (a CashierSession or its payload):
+    the opening float plus cash sales, less the refunds paid out of it in cash.
+    """
+
+    def amount(name: str) -> Decimal:
+        value = session[name] if isinstance(session, dict) else getattr(session, name)
+        return Decimal(str(value or 0))
+
+    return amount("opening_cash") + amount("cash_total") - amount("cash_refund_total")
+
+
+def open_session_id(db: Session, cashier_id: int, tenant_id) -> Optional[int]:
+    """The cashier's open drawer, if any (served by ix_cashier_sessions_open)."""
+    if cashier_id is None:
+        return None
+    # Nothing stops two drawers being opened at once; use the latest
+    return (
+        db.query(CashierSession.id)
+        .filter(
+            CashierSession.cashier_id == cashier_id,
+            CashierSession.tenant_id == tenant_id,
+            CashierSession.closed_at.is_(None),
+        )
+        .order_by(CashierSession.opened_at.desc(), CashierSession.id.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def _bump(db: Session, session_id: int, sign: int = 1, **amounts) -> bool:
+    """
+    Add `amounts` to the session's running totals in a single UPDATE, so
+    concurrent terminals never lose increments, and publish the new
+    counters. No-op once the session is closed; returns whether a row was
+    updated.
+    """
+    values = {
+        name: getattr(CashierSession, name) + sign * amount
+        for name, amount in amounts.items()
+        if amount
+    }
+    values["last_activity_at"] = datetime.utcnow()
+    row = db.execute(
+        update(CashierSession)
+        .where(CashierSession.id == session_id, CashierSession.closed_at.is_(None))
+        .values(**values)
+        .returning(*LIVE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return False
+    publish_session(db, row)
+    return True
+
+
+def _sale_amounts(sale: Sale) -> dict:
+    total = Decimal(str(sale.total_amount))
+    return {
+        "cash_total": total if sale.payment_type == "cash" else 0,
+        "card_total": total if sale.payment_type == "card" else 0,
+        "sale_count": 1,
+    }
+
+
+def record_sale(db: Session, sale: Sale) -> Optional[int]:
+    """
+    Attach a flushed sale to its cashier's open drawer and add it to the
+    running totals. Returns the session id, or None when no drawer is open.
+    """
+    session_id = open_session_id(db, sale.cashier_id, sale.tenant_id)
+    if session_id is None or not _bump(db, session_id, **_sale_amounts(sale)):
+        return None
+    sale.cashier_session_id = session_id
+    return session_id
+
+
+def reverse_sale(db: Session, sale: Sale) -> bool:
+    """Take a deleted sale back out of its drawer, if that drawer is still open."""
+    if sale.cashier_session_id is None:
+        return False
+    return _bump(db, sale.cashier_session_id, sign=-1, **_sale_amounts(sale))
+
+
+def record_refund(
+    db: Session, cashier_id: int, tenant_id, amount: Decimal, payment_type: str
+) -> Optional[int]:
+    """
+    Add a refund handed out by `cashier_id` to their open drawer. Only a
+    refund of a cash payment comes out of the drawer; card refunds go back
+    to the card and count towards refund_total alone.
+    """
+    session_id = open_session_id(db, cashier_id, tenant_id)
+    if session_id is None or not _bump(
+        db,
+        session_id,
+        refund_total=amount,
+        refund_count=1,
+        cash_refund_total=amount if payment_type == "cash" else 0,
+    ):
+        return None
+    return session_id
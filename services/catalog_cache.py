@@ -0,0 +1,253 @@
+# services/catalog_cache.py
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import Product, ProductTombstone
+from services.catalog_feed import change_horizon
+from services.notifications import hub
+
+logger = logging.getLogger(__name__)
+
+# Channel the products trigger notifies on every insert/update/delete
+CATALOG_CHANGES_CHANNEL = "catalog_changes"
+
+# Safety net for missed notifications: a tenant catalog not refreshed for
+# this long catches up from the change feed on the next read
+CATALOG_CACHE_MAX_AGE_SECONDS = int(os.getenv("CATALOG_CACHE_MAX_AGE_SECONDS", "60"))
+
+RECORD_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.sku,
+    Product.price,
+    Product.category,
+    Product.stock_quantity,
+    Product.low_stock_threshold,
+    Product.version,
+    Product.tenant_id,
+    Product.change_seq,
+)
+
+
+class CatalogRecord:
+    """Read-only product row held by the cache; compatible with ProductOut."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "sku",
+        "price",
+        "category",
+        "stock_quantity",
+        "low_stock_threshold",
+        "version",
+        "tenant_id",
+        "change_seq",
+    )
+
+    def __init__(self, row):
+        for name, value in zip(self.__slots__, row):
+            setattr(self, name, value)
+
+
+class CatalogView:
+    """
+    One generation of a tenant's catalog. Never edited once published:
+    a refresh builds the next generation and swaps it in with a single
+    assignment, so readers never see a half-applied refresh.
+    """
+
+    __slots__ = ("by_id", "by_sku", "_sorted_by_name")
+
+    def __init__(
+        self,
+        by_id: Optional[Dict[int, CatalogRecord]] = None,
+        by_sku: Optional[Dict[str, CatalogRecord]] = None,
+    ):
+        self.by_id = by_id if by_id is not None else {}
+        self.by_sku = by_sku if by_sku is not None else {}
+        self._sorted_by_name: Optional[List[CatalogRecord]] = None
+
+    def sorted_by_name(self) -> List[CatalogRecord]:
+        # Racing readers may both sort; they produce the same list
+        ordered = self._sorted_by_name
+        if ordered is None:
+            ordered = sorted(self.by_id.values(), key=lambda r: r.name)
+            self._sorted_by_name = ordered
+        return ordered
+
+    def apply(self, upserts: List[CatalogRecord], deletes) -> "CatalogView":
+        """The next generation, with `upserts` written and `deletes` removed."""
+        by_id = dict(self.by_id)
+        by_sku = dict(self.by_sku)
+        for record in upserts:
+            previous = by_id.get(record.id)
+            if previous is not None and previous.sku != record.sku:
+                by_sku.pop(previous.sku, None)
+            by_id[record.id] = record
+            by_sku[record.sku] = record
+        for product_id in deletes:
+            record = by_id.pop(product_id, None)
+            if record is not None:
+                by_sku.pop(record.sku, None)
+        return CatalogView(by_id, by_sku)
+
+
+class TenantCatalog:
+    def __init__(self):
+        self.view = CatalogView()
+        # Transaction horizon the view is complete up to (see change_horizon)
+        self.watermark = 0
+        self.loaded = False
+        self.refreshed_at = 0.0
+        self.dirty = True
+        self.pending_deletes = set()
+        # Serialises refreshes; readers never take it
+        self.lock = threading.Lock()
+
+
+class CatalogCache:
+    """
+    Per-tenant, per-process product catalog. Loaded lazily on first read,
+    then refreshed incrementally (products and tombstones written at or
+    after the tenant's transaction watermark) whenever a catalog_changes
+    notification from any worker marks it stale, or when it has gone
+    unrefreshed for max_age_seconds.
+    """
+
+    def __init__(self, max_age_seconds: int = CATALOG_CACHE_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._tenants: Dict[str, TenantCatalog] = {}
+        self._lock = threading.Lock()
+        self._subscribed = False
+
+    # ── Reads ────────────────────────────────────────────────
+    def products(self, db: Session, tenant_id) -> List[CatalogRecord]:
+        return self._fresh(db, tenant_id).sorted_by_name()
+
+    def get(self, db: Session, tenant_id, product_id: int) -> Optional[CatalogRecord]:
+        return self._fresh(db, tenant_id).by_id.get(product_id)
+
+    def get_by_sku(self, db: Session, tenant_id, sku: str) -> Optional[CatalogRecord]:
+        return self._fresh(db, tenant_id).by_sku.get(sku)
+
+    def categories(self, db: Session, tenant_id) -> List[str]:
+        view = self._fresh(db, tenant_id)
+        return sorted({r.category for r in view.by_id.values() if r.category})
+
+    def search(
+        self, db: Session, tenant_id, query: str, limit: int = 10
+    ) -> List[CatalogRecord]:
+        """Same matching as the SQL search: name contains, or SKU starts with."""
+        needle = query.lower()
+        matches = []
+        for record in self._fresh(db, tenant_id).by_id.values():
+            if needle in record.name.lower() or record.sku.lower().startswith(needle):
+                matches.append(record)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    # ── Invalidation ─────────────────────────────────────────
+    def mark_stale(self, tenant_id, product_id: Optional[int] = None, deleted=False):
+        catalog = self._tenants.get(str(tenant_id))
+        if catalog is None:
+            return
+        if deleted and product_id is not None:
+            catalog.pending_deletes.add(product_id)
+        catalog.dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tenants = {}
+
+    def _on_change(self, payload: dict) -> None:
+        self.mark_stale(
+            payload.get("tenant_id"),
+            payload.get("product_id"),
+            deleted=payload.get("op") == "DELETE",
+        )
+
+    # ── Loading ──────────────────────────────────────────────
+    def _fresh(self, db: Session, tenant_id) -> CatalogView:
+        self._ensure_subscribed()
+        key = str(tenant_id)
+        catalog = self._tenants.get(key)
+        if catalog is None:
+            with self._lock:
+                catalog = self._tenants.setdefault(key, TenantCatalog())
+
+        def stale():
+            age = time.monotonic() - catalog.refreshed_at
+            return catalog.dirty or age > self.max_age_seconds
+
+        if stale():
+            with catalog.lock:
+                if stale():
+                    self._refresh(db, tenant_id, catalog)
+        return catalog.view
+
+    def _refresh(self, db: Session, tenant_id, catalog: TenantCatalog):
+        # Clear first so notifications arriving mid-refresh trigger another one
+        catalog.dirty = False
+        deletes, catalog.pending_deletes = catalog.pending_deletes, set()
+        since = catalog.watermark
+        # Read before the rows: everything written below it is visible to them
+        horizon = change_horizon(db)
+
+        stmt = select(*RECORD_COLUMNS, Product.deleted_at).where(
+            Product.tenant_id == tenant_id
+        )
+        if not catalog.loaded:
+            stmt = stmt.where(Product.deleted_at.is_(None))
+        else:
+            # Rows at or above the old horizon may have committed since; the
+            # ones already applied are simply applied again
+            stmt = stmt.where(Product.change_xid >= since)
+            deletes.update(
+                db.scalars(
+                    select(ProductTombstone.product_id).where(
+                        ProductTombstone.tenant_id == tenant_id,
+                        ProductTombstone.change_xid >= since,
+                    )
+                )
+            )
+
+        rows = db.execute(stmt).all()
+        upserts = []
+        for row in rows:
+            if row.deleted_at is not None:
+                # Soft-deleted; the purge job removes the row later
+                deletes.add(row.id)
+            else:
+                upserts.append(CatalogRecord(row[:-1]))
+
+        if catalog.loaded:
+            catalog.view = catalog.view.apply(upserts, deletes)
+        else:
+            catalog.view = CatalogView().apply(upserts, ())
+        catalog.watermark = horizon
+        catalog.refreshed_at = time.monotonic()
+        logger.debug(
+            f"Catalog cache {'refreshed' if catalog.loaded else 'loaded'} for tenant "
+            f"{tenant_id}: {len(rows)} rows, watermark {catalog.watermark}"
+        )
+        catalog.loaded = True
+
+    def _ensure_subscribed(self) -> None:
+        if self._subscribed:
+            return
+        with self._lock:
+            if not self._subscribed:
+                hub.subscribe(CATALOG_CHANGES_CHANNEL, self._on_change)
+                self._subscribed = True
+
+
+catalog_cache = CatalogCache()
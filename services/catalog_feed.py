@@ -0,0 +1,135 @@
+# services/catalog_feed.py
+
+from typing import List, Tuple
+
+import sqlalchemy
+from sqlalchemy.orm import Session
+
+# Positional layout of each upserted row in the feed
+FEED_COLUMNS = [
+    "id",
+    "name",
+    "sku",
+    "price",
+    "category",
+    "stock_quantity",
+    "low_stock_threshold",
+    "version",
+]
+
+# Transactions below this id have all finished; a row written by any
+# transaction at or above it may still become visible later
+CHANGE_HORIZON_SQL = sqlalchemy.text(
+    "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+)
+
+# Keyset on (change_xid, id), stopping below the horizon so a slow writer's
+# rows can never land behind a cursor a client already holds
+FEED_SQL = sqlalchemy.text(
+    """
+    SELECT change_xid, id, deleted,
+           name, sku, price, category, stock_quantity, low_stock_threshold, version
+    FROM (
+        SELECT change_xid, id, deleted_at IS NOT NULL AS deleted,
+               name, sku, price, category, stock_quantity, low_stock_threshold,
+               version
+        FROM products
+        WHERE tenant_id = :tenant_id
+          AND (change_xid, id) > (:since_xid, :since_id)
+          AND change_xid < :horizon
+        UNION ALL
+        SELECT change_xid, product_id, TRUE,
+               NULL, NULL, NULL, NULL, NULL, NULL, NULL
+        FROM product_tombstones
+        WHERE tenant_id = :tenant_id
+          AND (change_xid, product_id) > (:since_xid, :since_id)
+          AND change_xid < :horizon
+    ) changes
+    ORDER BY change_xid, id
+    LIMIT :limit
+    """
+)
+
+
+def parse_watermark(watermark: str) -> Tuple[int, int]:
+    """A watermark from product_changes as (change_xid, id); "0" starts over."""
+    if watermark in ("", "0"):
+        return 0, 0
+    try:
+        xid, product_id = (int(part) for part in watermark.split(":"))
+    except ValueError:
+        raise ValueError(f"Malformed watermark '{watermark}'")
+    if xid < 0 or product_id < 0:
+        raise ValueError(f"Malformed watermark '{watermark}'")
+    return xid, product_id
+
+
+def change_horizon(db: Session) -> int:
+    """
+    Oldest transaction id still in flight. Every product change with a
+    change_xid below it is committed (or gone) and visible to later reads,
+    and no new change can be written below it.
+    """
+    return db.execute(CHANGE_HORIZON_SQL).scalar_one()
+
+
+def product_changes(db: Session, tenant_id, since: str, limit: int) -> dict:
+    """
+    Products changed or deleted after the `since` watermark, in commit-safe
+    order: only changes by transactions older than every one still running
+    are served, so nothing can later appear behind the returned watermark.
+    Soft-deleted products are reported as deletes straight away; the
+    tombstone written when the purge removes the row repeats the delete.
+
+    Rows are positional arrays (see FEED_COLUMNS) to keep payloads small.
+    Clients store the returned watermark (an opaque string) and call again
+    while `has_more`; since="0" is a full download.
+    """
+    since_xid, since_id = parse_watermark(since)
+    horizon = change_horizon(db)
+    rows = db.execute(
+        FEED_SQL,
+        {
+            "tenant_id": tenant_id,
+            "since_xid": since_xid,
+            "since_id": since_id,
+            "horizon": horizon,
+            "limit": limit + 1,
+        },
+    ).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    upserts: List[list] = []
+    deleted: List[int] = []
+    for r in rows:
+        if r.deleted:
+            deleted.append(r.id)
+        else:
+            upserts.append(
+                [
+                    r.id,
+                    r.name,
+                    r.sku,
+                    float(r.price),
+                    r.category,
+                    r.stock_quantity,
+                    r.low_stock_threshold,
+                    r.version,
+                ]
+            )
+
+    if has_more:
+        watermark = f"{rows[-1].change_xid}:{rows[-1].id}"
+    elif horizon > since_xid:
+        # Caught up: everything below the horizon has been served
+        watermark = f"{horizon}:0"
+    else:
+        watermark = f"{since_xid}:{since_id}"
+    return {
+        "watermark": watermark,
+        "has_more": has_more,
+        "columns": FEED_COLUMNS,
+        "rows": upserts,
+        "deleted": deleted,
+    }
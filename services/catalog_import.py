@@ -0,0 +1,211 @@
+# services/catalog_import.py
+
+import csv
+import io
+import tempfile
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, List
+
+import sqlalchemy
+from sqlalchemy.orm import Session
+
+REQUIRED_COLUMNS = ("name", "sku", "price")
+OPTIONAL_COLUMNS = ("category", "stock_quantity", "low_stock_threshold")
+STAGE_COLUMNS = ("line_no",) + REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+
+# Staged rows spill from memory to disk past this size
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+STAGE_TABLE_SQL = """
+    CREATE TEMP TABLE catalog_import_stage (
+        line_no integer NOT NULL,
+        name varchar(255) NOT NULL,
+        sku varchar(100) NOT NULL,
+        price numeric(10, 2) NOT NULL,
+        category varchar(100),
+        stock_quantity integer,
+        low_stock_threshold integer
+    ) ON COMMIT DROP
+"""
+
+# Last occurrence of a SKU in the file wins. Existing products keep their
+# stock (that is owned by the ledger); new products get the file's stock and
+# a matching opening ledger row. SKUs owned by another tenant, or by a
+# product awaiting purge, are skipped by the conflict WHERE clause and
+# reported back as row errors.
+UPSERT_SQL = """
+    WITH deduped AS (
+        SELECT DISTINCT ON (sku) *
+        FROM catalog_import_stage
+        ORDER BY sku, line_no DESC
+    ),
+    upserted AS (
+        INSERT INTO products (
+            name, sku, price, category, stock_quantity, low_stock_threshold,
+            tenant_id, version
+        )
+        SELECT
+            name, sku, price, category, COALESCE(stock_quantity, 0),
+            low_stock_threshold, :tenant_id, 1
+        FROM deduped
+        ON CONFLICT (sku) DO UPDATE SET
+            name = EXCLUDED.name,
+            price = EXCLUDED.price,
+            category = COALESCE(EXCLUDED.category, products.category),
+            low_stock_threshold = COALESCE(
+                EXCLUDED.low_stock_threshold, products.low_stock_threshold
+            ),
+            version = products.version + 1
+        WHERE products.tenant_id = EXCLUDED.tenant_id
+          AND products.deleted_at IS NULL
+        RETURNING id, sku, stock_quantity, (xmax = 0) AS inserted
+    ),
+    opening_stock AS (
+        INSERT INTO inventory_events (
+            product_id, change, reason, source, created_at, updated_at, tenant_id
+        )
+        SELECT id, stock_quantity, 'Catalog import', 'adjustment',
+               now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc', :tenant_id
+        FROM upserted
+        WHERE inserted AND stock_quantity <> 0
+    )
+    SELECT sku, inserted FROM upserted
+"""
+
+
+def _parse_int(value: str, column: str):
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a whole number")
+
+
+def _clean_row(row: Dict[str, str]) -> list:
+    """Validate one CSV row, returning the staged values in STAGE_COLUMNS order."""
+    values = {
+        k: (row.get(k) or "").strip() for k in REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+    }
+
+    for column in REQUIRED_COLUMNS:
+        if not values[column]:
+            raise ValueError(f"{column} is required")
+    if len(values["name"]) > 255:
+        raise ValueError("name is longer than 255 characters")
+    if len(values["sku"]) > 100:
+        raise ValueError("sku is longer than 100 characters")
+    if len(values["category"]) > 100:
+        raise ValueError("category is longer than 100 characters")
+
+    try:
+        price = Decimal(values["price"].lstrip("$"))
+    except InvalidOperation:
+        raise ValueError("price must be a number")
+    if price < 0 or price >= Decimal("100000000"):
+        raise ValueError("price is out of range")
+
+    stock = _parse_int(values["stock_quantity"], "stock_quantity")
+    threshold = _parse_int(values["low_stock_threshold"], "low_stock_threshold")
+    if threshold is not None and threshold < 0:
+        raise ValueError("low_stock_threshold cannot be negative")
+
+    return [
+        values["name"],
+        values["sku"],
+        f"{price:.2f}",
+        values["category"] or None,
+        stock,
+        threshold,
+    ]
+
+
+def import_catalog_csv(db: Session, stream: BinaryIO, tenant_id) -> dict:
+    """
+    Stream-parse a distributor CSV, COPY the valid rows into a temp stage
+    table and upsert them into `products` by SKU in one statement.
+
+    Returns counts plus a per-row error report (1-based line numbers,
+    header is line 1). The caller owns the transaction.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    header = [h.strip().lower() for h in (reader.fieldnames or [])]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+    reader.fieldnames = header
+
+    errors: List[dict] = []
+    staged_lines: Dict[str, int] = {}
+    rows_read = 0
+
+    with tempfile.SpooledTemporaryFile(
+        max_size=SPOOL_MAX_BYTES, mode="w+", newline=""
+    ) as staged:
+        writer = csv.writer(staged)
+        for row in reader:
+            rows_read += 1
+            line_no = reader.line_num
+            try:
+                cleaned = _clean_row(row)
+            except ValueError as e:
+                errors.append(
+                    {
+                        "line": line_no,
+                        "sku": (row.get("sku") or "").strip(),
+                        "error": str(e),
+                    }
+                )
+                continue
+
+            sku = cleaned[1]
+            if sku in staged_lines:
+                errors.append(
+                    {
+                        "line": staged_lines[sku],
+                        "sku": sku,
+                        "error": f"duplicate SKU, superseded by line {line_no}",
+                    }
+                )
+            staged_lines[sku] = line_no
+            writer.writerow([line_no] + ["" if v is None else v for v in cleaned])
+
+        # Leave the caller's stream open
+        text.detach()
+
+        staged.seek(0)
+        db.execute(sqlalchemy.text(STAGE_TABLE_SQL))
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY catalog_import_stage ({', '.join(STAGE_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                staged,
+            )
+        finally:
+            cursor.close()
+
+    results = db.execute(
+        sqlalchemy.text(UPSERT_SQL), {"tenant_id": tenant_id}
+    ).fetchall()
+
+    inserted = sum(1 for r in results if r.inserted)
+    written = {r.sku for r in results}
+    for sku, line_no in staged_lines.items():
+        if sku not in written:
+            errors.append(
+                {
+                    "line": line_no,
+                    "sku": sku,
+                    "error": "SKU belongs to another store or a deleted product",
+                }
+            )
+
+    errors.sort(key=lambda e: e["line"])
+    return {
+        "rows_read": rows_read,
+        "inserted": inserted,
+        "updated": len(results) - inserted,
+        "errors": errors,
+    }
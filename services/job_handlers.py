@@ -0,0 +1,76 @@
+# services/job_handlers.py
+#
+# Work the job worker knows how to run. Imported by scripts/job_worker.py;
+# the API only queues jobs by kind.
+
+import io
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from services.analytics_reports import kpi_summary, parse_range, sales_summary
+from services.catalog_import import import_catalog_csv
+from services.jobs import JobContext, JobOutput, job_handler
+from services.pdf_renderer import content_key, pdf_renderer, render_pdf
+from services.purge import PURGE_JOB, purge
+from services.zreport import zreport_html
+from services.zreport_snapshots import load_z_report, store_pdf
+
+
+@job_handler("zreport_pdf")
+def zreport_pdf(db: Session, ctx: JobContext) -> JobOutput:
+    report_date = date.fromisoformat(ctx.params["report_date"])
+    bundle = load_z_report(db, ctx.tenant_id, report_date)
+    ctx.progress(30, "Report loaded")
+
+    pdf = bundle.pdf
+    if pdf is None:
+        html = zreport_html(bundle.report)
+        key = content_key(html)
+        pdf = pdf_renderer.get(key)
+        if pdf is None:
+            # Already off the request path: render here, not on another pool
+            pdf = render_pdf(html)
+            pdf_renderer.put(key, pdf)
+        if bundle.snapshot_id is not None:
+            store_pdf(db, bundle.snapshot_id, pdf)
+
+    return JobOutput(pdf, "application/pdf", f"zreport_{report_date}.pdf")
+
+
+@job_handler("sales_summary")
+def sales_summary_job(db: Session, ctx: JobContext) -> list:
+    p = ctx.params
+    start, end = parse_range(p["start_date"], p["end_date"])
+    return sales_summary(
+        db, ctx.tenant_id, start, end, p.get("cashier_id"), p.get("category")
+    )
+
+
+@job_handler("kpi_summary")
+def kpi_summary_job(db: Session, ctx: JobContext) -> dict:
+    p = ctx.params
+    start, end = parse_range(p["start_date"], p["end_date"])
+    return kpi_summary(
+        db,
+        ctx.tenant_id,
+        start.date(),
+        end.date(),
+        p.get("cashier_id"),
+        p.get("category"),
+    )
+
+
+@job_handler("catalog_import")
+def catalog_import(db: Session, ctx: JobContext) -> dict:
+    ctx.progress(0, f"Importing {ctx.params.get('filename', 'catalog')}")
+    result = import_catalog_csv(db, io.BytesIO(ctx.input_data), ctx.tenant_id)
+    db.commit()
+    # Per-row errors can run long; the summary keeps the first page of them
+    errors = result["errors"]
+    return {**result, "errors": errors[:1000], "error_count": len(errors)}
+
+
+@job_handler(PURGE_JOB)
+def purge_job(db: Session, ctx: JobContext) -> dict:
+    return purge(db, ctx)
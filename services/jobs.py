@@ -0,0 +1,370 @@
+# services/jobs.py
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.models.models import Job
+from app.models.schemas import JobOut
+from services.notifications import hub, notify
+
+logger = logging.getLogger(__name__)
+
+# Notified on enqueue so idle workers pick the job up without waiting a poll
+JOBS_CHANNEL = "jobs"
+
+# Idle workers re-check the queue this often even without a notification
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "5"))
+# A running job whose worker has not checked in for this long is re-queued
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "900"))
+# How often a worker checks in while a job runs, handler progress or not
+JOB_HEARTBEAT_SECONDS = float(
+    os.getenv("JOB_HEARTBEAT_SECONDS", str(JOB_TIMEOUT_SECONDS / 5))
+)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Finished jobs (and their stored results) are deleted after this long
+JOB_RESULT_TTL_HOURS = int(os.getenv("JOB_RESULT_TTL_HOURS", "24"))
+JOB_MAINTENANCE_SECONDS = 60
+
+# Someone is waiting on the result > scheduled exports > bulk imports
+PRIORITY_INTERACTIVE = 10
+PRIORITY_EXPORT = 0
+PRIORITY_BULK = -10
+
+JOBS_PATH = "/api/jobs"
+
+
+class JobOutput:
+    """A file result: stored on the job and served by GET /jobs/{id}/result."""
+
+    __slots__ = ("data", "media_type", "filename", "summary")
+
+    def __init__(
+        self, data: bytes, media_type: str, filename: str, summary: dict = None
+    ):
+        self.data = data
+        self.media_type = media_type
+        self.filename = filename
+        self.summary = summary
+
+
+class JobContext:
+    """What a handler sees of its job, plus progress reporting."""
+
+    def __init__(self, job: Job):
+        self.job_id = job.id
+        self.params = job.params or {}
+        self.input_data = job.input_data
+        self.tenant_id = job.tenant_id
+        self.requested_by = job.requested_by
+        self.worker = job.worker
+        self.attempts = job.attempts
+
+    def owned(self, query):
+        """
+        Narrow a jobs query to this run: once the job is re-queued and
+        claimed again, its worker or attempt count moves and a late write
+        from this run matches nothing.
+        """
+        return query.filter(
+            Job.id == self.job_id,
+            Job.status == "running",
+            Job.worker == self.worker,
+            Job.attempts == self.attempts,
+        )
+
+    def progress(self, percent: int, message: Optional[str] = None) -> None:
+        """
+        Record progress in its own short transaction, so the handler's
+        session and transaction are left alone. Doubles as a heartbeat.
+        """
+        self._touch(progress=max(0, min(int(percent), 100)), progress_message=message)
+
+    def heartbeat(self) -> bool:
+        """Check in; False once the job is no longer this run's."""
+        return self._touch()
+
+    def _touch(self, **values) -> bool:
+        from app.db.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            updated = self.owned(db.query(Job)).update(
+                {**values, "heartbeat_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+            return updated > 0
+        finally:
+            db.close()
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Checks in for a running job until stopped, so a handler step that
+    reports no progress for a while does not look like a dead worker.
+    """
+
+    def __init__(self, ctx: JobContext, interval: float):
+        super().__init__(name=f"job-{ctx.job_id}-heartbeat", daemon=True)
+        self.ctx = ctx
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                if not self.ctx.heartbeat():
+                    logger.warning(f"Job {self.ctx.job_id} was taken from this worker")
+                    return
+            except Exception:
+                logger.warning(
+                    f"Heartbeat for job {self.ctx.job_id} failed", exc_info=True
+                )
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+# kind -> handler(db, ctx) returning a JobOutput or a JSON-able summary
+JOB_HANDLERS: Dict[str, Callable[[Session, JobContext], Any]] = {}
+
+
+def job_handler(kind: str):
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    params: Optional[dict] = None,
+    tenant_id=None,
+    requested_by: Optional[int] = None,
+    priority: int = PRIORITY_EXPORT,
+    input_data: Optional[bytes] = None,
+) -> Job:
+    """
+    Queue a job. Commits, so the notification waking the workers goes out
+    with it.
+    """
+    job = Job(
+        kind=kind,
+        status="queued",
+        priority=priority,
+        params=params or {},
+        input_data=input_data,
+        tenant_id=tenant_id,
+        requested_by=requested_by,
+    )
+    db.add(job)
+    db.flush()
+    notify(db, JOBS_CHANNEL, {"job_id": job.id, "kind": kind})
+    db.commit()
+    return job
+
+
+def find_active_job(db: Session, kind: str, tenant_id, params: dict) -> Optional[Job]:
+    """A queued or running job identical to the one about to be queued."""
+    return (
+        db.query(Job)
+        .filter(
+            Job.kind == kind,
+            Job.tenant_id == tenant_id,
+            Job.status.in_(("queued", "running")),
+            Job.params == params,
+        )
+        .order_by(Job.id.desc())
+        .first()
+    )
+
+
+def get_job(db: Session, job_id: int, tenant_id=None) -> Optional[Job]:
+    query = db.query(Job).filter(Job.id == job_id)
+    if tenant_id is not None:
+        query = query.filter(Job.tenant_id == tenant_id)
+    return query.first()
+
+
+def job_out(job: Job) -> JobOut:
+    out = JobOut.model_validate(job)
+    out.has_file = job.result_filename is not None
+    return out
+
+
+def job_accepted(job: Job) -> JSONResponse:
+    """202 for a queued job, pointing the client at its status URL."""
+    return JSONResponse(
+        status_code=202,
+        content=job_out(job).model_dump(mode="json"),
+        headers={"Location": f"{JOBS_PATH}/{job.id}"},
+    )
+
+
+# ── Worker side ──────────────────────────────────────────────
+def claim_next(db: Session, worker: str) -> Optional[Job]:
+    """
+    Take the best queued job. SKIP LOCKED lets any number of workers poll
+    the same table without blocking on, or double-claiming, a row.
+    """
+    job = (
+        db.query(Job)
+        .filter(Job.status == "queued")
+        .order_by(Job.priority.desc(), Job.id)
+        .with_for_update(skip_locked=True)
+        .limit(1)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+
+    now = datetime.utcnow()
+    job.status = "running"
+    job.worker = worker
+    job.attempts += 1
+    job.started_at = now
+    job.heartbeat_at = now
+    job.error = None
+    db.commit()
+    return job
+
+
+def _finish(db: Session, ctx: JobContext, values: dict) -> bool:
+    """Store the outcome unless the job was re-queued from under this run."""
+    values["finished_at"] = datetime.utcnow()
+    updated = ctx.owned(db.query(Job)).update(values, synchronize_session=False)
+    db.commit()
+    if not updated:
+        logger.warning(
+            f"Job {ctx.job_id} was re-queued while running; dropping this outcome"
+        )
+    return updated > 0
+
+
+def run_job(db: Session, job: Job) -> None:
+    """
+    Run a claimed job with its handler and store the outcome on the row,
+    checking in every JOB_HEARTBEAT_SECONDS while it runs.
+    """
+    job_id, kind = job.id, job.kind
+    handler = JOB_HANDLERS.get(kind)
+    ctx = JobContext(job)
+    heartbeat = _Heartbeat(ctx, JOB_HEARTBEAT_SECONDS)
+    started = time.monotonic()
+
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{kind}'")
+        output = handler(db, ctx)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        error = str(e) or e.__class__.__name__
+        _finish(db, ctx, {"status": "failed", "error": error})
+        logger.error(f"Job {job_id} ({kind}) failed: {str(e)}", exc_info=True)
+        return
+    finally:
+        heartbeat.stop()
+
+    values = {"status": "done", "progress": 100, "input_data": None}
+    if isinstance(output, JobOutput):
+        values.update(
+            result_data=output.data,
+            result_media_type=output.media_type,
+            result_filename=output.filename,
+            result=output.summary,
+        )
+    else:
+        values["result"] = output
+    if _finish(db, ctx, values):
+        logger.info(
+            f"Job {job_id} ({kind}) finished in {time.monotonic() - started:.1f}s"
+        )
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    """
+    Running jobs whose worker died go back on the queue, or fail once
+    they have used up their attempts. Returns how many were touched.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_TIMEOUT_SECONDS)
+    stale = (
+        db.query(Job)
+        .filter(Job.status == "running", Job.heartbeat_at < cutoff)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in stale:
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            job.status = "failed"
+            job.error = f"Worker {job.worker} stopped responding"
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = "queued"
+            job.worker = None
+    db.commit()
+    if stale:
+        logger.warning(f"Recovered {len(stale)} jobs from unresponsive workers")
+    return len(stale)
+
+
+def delete_expired_jobs(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=JOB_RESULT_TTL_HOURS)
+    deleted = (
+        db.query(Job)
+        .filter(Job.status.in_(("done", "failed")), Job.finished_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def work(worker: str, stop: Optional[threading.Event] = None) -> None:
+    """
+    Worker loop: claim and run jobs until `stop` is set, sleeping between
+    empty polls unless an enqueue notification wakes it early.
+    """
+    from app.db.database import SessionLocal
+
+    stop = stop or threading.Event()
+    wake = threading.Event()
+    unsubscribe = hub.subscribe(JOBS_CHANNEL, lambda payload: wake.set())
+    last_maintenance = 0.0
+    logger.info(f"Job worker {worker} started")
+
+    try:
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                if time.monotonic() - last_maintenance > JOB_MAINTENANCE_SECONDS:
+                    requeue_stale_jobs(db)
+                    delete_expired_jobs(db)
+                    last_maintenance = time.monotonic()
+
+                job = claim_next(db, worker)
+                if job is not None:
+                    run_job(db, job)
+                    continue
+            except Exception:
+                db.rollback()
+                logger.exception(f"Job worker {worker} hit an error")
+            finally:
+                db.close()
+
+            wake.wait(JOB_POLL_SECONDS)
+            wake.clear()
+    finally:
+        unsubscribe()
+        logger.info(f"Job worker {worker} stopped")
@@ -0,0 +1,93 @@
+# services/llm_stub.py
+#
+# Offline stand-ins for the OpenAI client and the SQL agent, selected with
+# AI_LLM_BACKEND=stub. Answers are deterministic and every call is counted,
+# so tests and local runs can check what reached the "model".
+
+from types import SimpleNamespace
+
+
+def stub_answer(prompt: str) -> str:
+    return f"[stub] {prompt.strip()}"
+
+
+class _StubCompletions:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, model: str, messages: list, **kwargs):
+        self._client.calls += 1
+        prompt = next(
+            (m["content"] for m in reversed(messages) if m["role"] == "user"), ""
+        )
+        message = SimpleNamespace(content=stub_answer(prompt), function_call=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class StubOpenAI:
+    """Answers chat completions by echoing the prompt; never calls functions."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_StubCompletions(self))
+
+
+class StubSqlAgent:
+    """Mimics an AgentExecutor returning intermediate steps."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, inputs: dict) -> dict:
+        self.calls += 1
+        prompt = inputs["input"]
+        step = (
+            SimpleNamespace(tool="sql_db_query", tool_input="SELECT 1"),
+            "[(1,)]",
+        )
+        return {"output": stub_answer(prompt), "intermediate_steps": [step]}
+
+    def run(self, prompt: str) -> str:
+        return self({"input": prompt})["output"]
+
+
+class _StubStream:
+    """Async iterator of chat chunks, one per word, like a streamed reply."""
+
+    def __init__(self, text: str):
+        self._words = iter(text.split(" "))
+        self._first = True
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed:
+            raise StopAsyncIteration
+        word = next(self._words, None)
+        if word is None:
+            raise StopAsyncIteration
+        text = word if self._first else f" {word}"
+        self._first = False
+        delta = SimpleNamespace(content=text)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self):
+        self.closed = True
+
+
+class _StubAsyncCompletions(_StubCompletions):
+    async def create(self, model: str, messages: list, stream: bool = False, **kw):
+        response = super().create(model, messages, **kw)
+        if stream:
+            return _StubStream(response.choices[0].message.content)
+        return response
+
+
+class StubAsyncOpenAI(StubOpenAI):
+    """StubOpenAI with awaitable completions and stream=True support."""
+
+    def __init__(self):
+        super().__init__()
+        self.chat = SimpleNamespace(completions=_StubAsyncCompletions(self))
@@ -0,0 +1,157 @@
+# services/notifications.py
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Union
+
+import sqlalchemy
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# How long the listener blocks on the socket before picking up new channels
+POLL_INTERVAL_SECONDS = 1.0
+RECONNECT_BACKOFF_SECONDS = 5.0
+
+
+def notify(
+    db: Union[Session, Connection], channel: str, payload: Dict[str, Any]
+) -> None:
+    """
+    Publish `payload` on `channel` as part of the caller's transaction.
+
+    On PostgreSQL this is a pg_notify, so subscribers in every worker only
+    see it once the transaction commits (and never if it rolls back). Other
+    dialects have no cross-process channel and dispatch in-process. Accepts
+    a Connection so mapper event hooks can publish mid-flush.
+    """
+    message = json.dumps(payload, default=str)
+    bind = db.get_bind() if isinstance(db, Session) else db
+    if bind.dialect.name == "postgresql":
+        db.execute(
+            sqlalchemy.text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": channel, "payload": message},
+        )
+    else:
+        hub.dispatch(channel, message)
+
+
+class NotificationHub:
+    """
+    One LISTEN connection per worker process, fanned out to in-process
+    subscribers. The listener thread starts on the first subscription.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._listening = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, channel: str, callback: Callable[[dict], None]):
+        """Register `callback` for `channel`; returns an unsubscribe function."""
+        with self._lock:
+            self._subscribers[channel].add(callback)
+        self._ensure_listener()
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers[channel].discard(callback)
+
+        return unsubscribe
+
+    @contextmanager
+    def queue(self, channel: str, maxsize: int = 1000):
+        """
+        Context manager yielding an asyncio.Queue fed with payloads on
+        `channel`, bound to the calling event loop.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+        def enqueue(payload):
+            def put():
+                if not queue.full():
+                    queue.put_nowait(payload)
+
+            loop.call_soon_threadsafe(put)
+
+        unsubscribe = self.subscribe(channel, enqueue)
+        try:
+            yield queue
+        finally:
+            unsubscribe()
+
+    def dispatch(self, channel: str, message: str) -> None:
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            logger.warning(f"Dropping malformed notification on '{channel}'")
+            return
+
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception(f"Notification subscriber failed on '{channel}'")
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="pg-notify-listener", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        # Imported here so importing this module never opens a connection
+        from app.db.database import engine
+
+        if engine.dialect.name != "postgresql":
+            return
+
+        while True:
+            try:
+                self._listen_forever(engine)
+            except Exception:
+                logger.exception("Notification listener lost its connection")
+                time.sleep(RECONNECT_BACKOFF_SECONDS)
+
+    def _listen_forever(self, engine) -> None:
+        raw = engine.raw_connection()
+        try:
+            conn = raw.driver_connection
+            conn.autocommit = True
+            self._listening = set()
+
+            while True:
+                with self._lock:
+                    wanted = {c for c, subs in self._subscribers.items() if subs}
+                with conn.cursor() as cursor:
+                    for channel in wanted - self._listening:
+                        cursor.execute(f'LISTEN "{channel}"')
+                    for channel in self._listening - wanted:
+                        cursor.execute(f'UNLISTEN "{channel}"')
+                self._listening = wanted
+
+                if select.select([conn], [], [], POLL_INTERVAL_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    note = conn.notifies.pop(0)
+                    self.dispatch(note.channel, note.payload)
+        finally:
+            raw.invalidate()
+
+
+hub = NotificationHub()
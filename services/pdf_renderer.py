@@ -0,0 +1,271 @@
+# services/pdf_renderer.py
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+# Renders waiting or running beyond this are refused (the route answers 503)
+PDF_RENDER_MAX_PENDING = int(os.getenv("PDF_RENDER_MAX_PENDING", "32"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Optional directory shared by workers/restarts; unset keeps the cache in memory
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR")
+# The disk tier is pruned to this size, least recently used first...
+PDF_CACHE_DIR_MAX_BYTES = int(
+    os.getenv("PDF_CACHE_DIR_MAX_BYTES", str(1024 * 1024 * 1024))
+)
+# ...and never serves or keeps a file unused for longer than this
+PDF_CACHE_DIR_MAX_AGE_SECONDS = int(
+    os.getenv("PDF_CACHE_DIR_MAX_AGE_SECONDS", str(7 * 24 * 3600))
+)
+# Pruning lists the directory, so each process does it at most this often
+PDF_CACHE_PRUNE_SECONDS = 60
+
+
+class RendererBusyError(Exception):
+    """Raised when too many renders are queued; callers should answer 503."""
+
+
+def render_pdf(html: str) -> bytes:
+    """
+    Render synchronously. The API calls this through the pool, so WeasyPrint
+    and its native libraries are only loaded in worker processes; batch
+    jobs may call it directly.
+    """
+    from weasyprint import HTML
+
+    return HTML(string=html).write_pdf()
+
+
+def content_key(html: str) -> str:
+    """
+    Cache key for a document: a hash of the HTML, which embeds the date and
+    every figure shown but not the tenant. Any data change produces a new
+    key; identical reports share one even across tenants, which is safe
+    because the PDF is a function of the HTML alone.
+    """
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class PdfRenderer:
+    """
+    Renders HTML to PDF bytes on a bounded process pool, in memory, behind
+    a content-addressed LRU (plus an optional on-disk tier). Concurrent
+    requests for the same document share one render.
+    """
+
+    def __init__(
+        self,
+        workers: int = PDF_RENDER_WORKERS,
+        max_pending: int = PDF_RENDER_MAX_PENDING,
+        cache_max_bytes: int = PDF_CACHE_MAX_BYTES,
+        cache_dir: Optional[str] = PDF_CACHE_DIR,
+        dir_max_bytes: int = PDF_CACHE_DIR_MAX_BYTES,
+        dir_max_age_seconds: int = PDF_CACHE_DIR_MAX_AGE_SECONDS,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_dir = cache_dir
+        self.dir_max_bytes = dir_max_bytes
+        self.dir_max_age_seconds = dir_max_age_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending = 0
+        self._pruned_at = float("-inf")
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    async def render(self, html: str) -> bytes:
+        """
+        Render through the pool, sharing one render between concurrent
+        callers. The bookkeeping belongs to the render, not to whoever
+        started it: a caller that is cancelled (say, the client went away)
+        leaves the render running, counted against max_pending and still
+        shared, and its result is cached when it finishes.
+        """
+        key = content_key(html)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = self._start(key, html)
+        return await asyncio.shield(inflight)
+
+    def _start(self, key: str, html: str) -> asyncio.Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise RendererBusyError("Too many PDF renders in progress")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), render_pdf, html)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        with self._lock:
+            self._pending -= 1
+        if not future.cancelled() and future.exception() is None:
+            self.put(key, future.result())
+
+    def render_blocking(self, html: str) -> bytes:
+        """render() for worker threads: same cache and pool, no event loop."""
+        key = content_key(html)
+        pdf = self.get(key)
+        if pdf is None:
+            pdf = self._get_executor().submit(render_pdf, html).result()
+            self.put(key, pdf)
+        return pdf
+
+    # ── Cache ────────────────────────────────────────────────
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            pdf = self._cache.get(key)
+            if pdf is not None:
+                self._cache.move_to_end(key)
+                return pdf
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                if time.time() - os.stat(path).st_mtime > self.dir_max_age_seconds:
+                    return None
+                with open(path, "rb") as f:
+                    pdf = f.read()
+                # mtime doubles as last use, for pruning
+                os.utime(path)
+            except FileNotFoundError:
+                return None
+            self._remember(key, pdf)
+            return pdf
+        return None
+
+    def put(self, key: str, pdf: bytes) -> None:
+        self._remember(key, pdf)
+        if self.cache_dir:
+            # Write-then-rename so other workers never read a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(pdf)
+                os.replace(tmp_path, self._path(key))
+            except OSError:
+                logger.warning(f"Could not write PDF cache entry {key}", exc_info=True)
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+            self._maybe_prune_disk()
+
+    def _maybe_prune_disk(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._pruned_at < PDF_CACHE_PRUNE_SECONDS:
+                return
+            self._pruned_at = now
+        self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """
+        Delete disk entries unused for dir_max_age_seconds, then the least
+        recently used until the directory fits dir_max_bytes. Other workers
+        may prune the same directory at once, so vanished files are fine.
+        Returns how many files were removed.
+        """
+        if not self.cache_dir:
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(".pdf"):
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                elif now - stat.st_mtime > self.dir_max_age_seconds:
+                    # Left behind by a writer that died mid-write
+                    entries.append((stat.st_mtime, 0, entry.path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if now - mtime <= self.dir_max_age_seconds and total <= self.dir_max_bytes:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        if removed:
+            logger.info(f"Pruned {removed} PDF cache files, {total} bytes left")
+        return removed
+
+    def _remember(self, key: str, pdf: bytes) -> None:
+        if len(pdf) > self.cache_max_bytes:
+            return
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._cache_bytes -= len(previous)
+            self._cache[key] = pdf
+            self._cache_bytes += len(pdf)
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    # ── Pool ─────────────────────────────────────────────────
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork the API process with its DB/listener threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "cached_documents": len(self._cache),
+                "cached_bytes": self._cache_bytes,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+pdf_renderer = PdfRenderer()
@@ -0,0 +1,153 @@
+# services/purge.py
+
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+import sqlalchemy
+from sqlalchemy.orm import Session
+
+from app.models.models import Job
+from services.jobs import PRIORITY_BULK, JobContext, enqueue, get_job
+
+logger = logging.getLogger(__name__)
+
+# Job kind the worker runs purges under (see services.job_handlers)
+PURGE_JOB = "purge"
+
+# Rows removed per statement; each batch commits on its own so locks stay short
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+
+# Dependent (table, foreign key column) pairs removed before the parent row,
+# in order. stock_snapshots would cascade, but is batched like the rest.
+DEPENDENTS = {
+    "product": (
+        ("sale_items", "product_id"),
+        ("returns", "product_id"),
+        ("inventory_events", "product_id"),
+        ("stock_snapshots", "product_id"),
+    ),
+    "sale": (
+        ("sale_items", "sale_id"),
+        ("returns", "sale_id"),
+    ),
+}
+PARENT_TABLES = {"product": "products", "sale": "sales"}
+
+
+def soft_delete(db: Session, entity, kind: str, requested_by: Optional[int] = None):
+    """
+    Hide `entity` (a Product or Sale) from reads and queue a purge job for
+    it. Commits the caller's transaction, so the row is hidden and the job
+    queued together.
+    """
+    entity.deleted_at = datetime.utcnow()
+    return enqueue(
+        db,
+        PURGE_JOB,
+        {"entity": kind, "entity_id": entity.id},
+        tenant_id=entity.tenant_id,
+        requested_by=requested_by,
+        priority=PRIORITY_BULK,
+    )
+
+
+def _delete_batch(db: Session, table: str, column: str, value: int) -> int:
+    result = db.execute(
+        sqlalchemy.text(
+            f"DELETE FROM {table} WHERE id IN ("
+            f"SELECT id FROM {table} WHERE {column} = :value LIMIT :batch)"
+        ),
+        {"value": value, "batch": PURGE_BATCH_SIZE},
+    )
+    return result.rowcount
+
+
+def purge(db: Session, ctx: JobContext) -> dict:
+    """
+    Remove a soft-deleted product or sale and its dependents in bounded
+    batches, reporting progress after each table. Safe to re-run: a failed
+    or interrupted purge picks up where it stopped.
+    """
+    kind, entity_id = ctx.params["entity"], ctx.params["entity_id"]
+    parent = PARENT_TABLES[kind]
+    row = db.execute(
+        sqlalchemy.text(f"SELECT deleted_at FROM {parent} WHERE id = :id"),
+        {"id": entity_id},
+    ).first()
+    if row is not None and row.deleted_at is None:
+        raise ValueError(f"{kind} {entity_id} is not deleted; refusing to purge")
+
+    targets = list(DEPENDENTS[kind]) + [(parent, "id")]
+    rows_deleted = 0
+    for done, (table, column) in enumerate(targets, start=1):
+        while True:
+            deleted = _delete_batch(db, table, column, entity_id)
+            rows_deleted += deleted
+            db.commit()
+            if deleted < PURGE_BATCH_SIZE:
+                break
+        ctx.progress(
+            100 * done // len(targets), f"{table} cleared, {rows_deleted} rows"
+        )
+
+    logger.info(f"Purged {kind} {entity_id}: {rows_deleted} rows removed")
+    return {"entity": kind, "entity_id": entity_id, "rows_deleted": rows_deleted}
+
+
+def queue_missing_purges(db: Session) -> int:
+    """
+    Queue a purge for every soft-deleted product or sale without a queued
+    or running one, e.g. after a purge failed. Returns how many were queued.
+    """
+    queued = 0
+    for kind, table in PARENT_TABLES.items():
+        rows = db.execute(
+            sqlalchemy.text(
+                f"""
+                SELECT t.id, t.tenant_id FROM {table} t
+                WHERE t.deleted_at IS NOT NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM jobs j
+                      WHERE j.kind = :kind
+                        AND j.status IN ('queued', 'running')
+                        AND j.params = jsonb_build_object(
+                            'entity', CAST(:entity AS text), 'entity_id', t.id)
+                  )
+                """
+            ),
+            {"kind": PURGE_JOB, "entity": kind},
+        ).all()
+        for entity_id, tenant_id in rows:
+            enqueue(
+                db,
+                PURGE_JOB,
+                {"entity": kind, "entity_id": entity_id},
+                tenant_id=tenant_id,
+                priority=PRIORITY_BULK,
+            )
+            queued += 1
+    return queued
+
+
+def get_purge_job(db: Session, job_id: int, entity: str, tenant_id) -> Optional[Job]:
+    job = get_job(db, job_id, tenant_id)
+    if job is None or job.kind != PURGE_JOB or job.params.get("entity") != entity:
+        return None
+    return job
+
+
+def purge_job_out(job: Job) -> dict:
+    """A purge job in the shape of PurgeJobOut."""
+    return {
+        "id": job.id,
+        "entity": job.params["entity"],
+        "entity_id": job.params["entity_id"],
+        "status": job.status,
+        "rows_deleted": (job.result or {}).get("rows_deleted", 0),
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
@@ -0,0 +1,170 @@
+# services/schema_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import MetaData, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable
+
+logger = logging.getLogger(__name__)
+
+# Survives restarts and is shared by workers on the same host
+SCHEMA_CACHE_DIR = os.getenv(
+    "SCHEMA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sql-agent-schema")
+)
+# How long a database's Alembic revision is trusted before it is re-read
+SCHEMA_REVISION_CHECK_SECONDS = int(os.getenv("SCHEMA_REVISION_CHECK_SECONDS", "60"))
+# Revision recorded for databases without an alembic_version table
+UNVERSIONED = "unversioned"
+
+
+def database_key(engine: Engine) -> str:
+    url = engine.url.render_as_string(hide_password=True)
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+def alembic_revision(engine: Engine) -> str:
+    try:
+        with engine.connect() as conn:
+            revision = conn.execute(
+                text("SELECT version_num FROM alembic_version")
+            ).scalar()
+    except Exception:
+        return UNVERSIONED
+    return revision or UNVERSIONED
+
+
+def describe_tables(engine: Engine, table_names: Iterable[str]) -> Dict[str, str]:
+    """CREATE TABLE text for each table, as the SQL agent's schema tool shows it."""
+    metadata = MetaData()
+    metadata.reflect(bind=engine, only=list(table_names))
+    return {
+        table.name: str(CreateTable(table).compile(engine)).rstrip()
+        for table in metadata.sorted_tables
+    }
+
+
+class _Schema:
+    __slots__ = ("revision", "tables", "checked_at")
+
+    def __init__(self, revision: str, tables: Dict[str, str], checked_at: float):
+        self.revision = revision
+        self.tables = tables
+        self.checked_at = checked_at
+
+
+class SchemaCache:
+    """
+    Table descriptions per database, in memory and on disk, keyed by the
+    database's Alembic revision. Asking about a table costs a lookup; the
+    catalog is reflected again only for tables not yet described, or for
+    all of them after a migration moves the revision.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = SCHEMA_CACHE_DIR,
+        check_seconds: int = SCHEMA_REVISION_CHECK_SECONDS,
+    ):
+        self.cache_dir = cache_dir
+        self.check_seconds = check_seconds
+        self._schemas: Dict[str, _Schema] = {}
+        # The registry lock is held for dict access only; reflecting, which
+        # can take seconds, holds just the lock of the database concerned
+        self._lock = threading.Lock()
+        self._database_locks: Dict[str, threading.Lock] = {}
+        self.reflections = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def table_info(self, engine: Engine, table_names: Iterable[str]) -> Dict[str, str]:
+        names = list(table_names)
+        key = database_key(engine)
+        with self._lock:
+            database_lock = self._database_locks.setdefault(key, threading.Lock())
+
+        with database_lock:
+            schema = self._current(engine, key)
+            missing = [name for name in names if name not in schema.tables]
+            if missing:
+                started = time.monotonic()
+                described = describe_tables(engine, missing)
+                # Swapped whole, so stats() never sees a dict mid-update
+                schema.tables = {**schema.tables, **described}
+                with self._lock:
+                    self.reflections += 1
+                logger.info(
+                    f"Reflected {len(missing)} tables in "
+                    f"{time.monotonic() - started:.2f}s"
+                )
+                self._save(key, schema)
+            tables = schema.tables
+        return {name: tables[name] for name in names if name in tables}
+
+    def _current(self, engine: Engine, key: str) -> _Schema:
+        """The database's schema entry, revision-checked; needs its lock."""
+        with self._lock:
+            schema = self._schemas.get(key)
+        if schema is None:
+            schema = self._load(key)
+            with self._lock:
+                self._schemas[key] = schema
+        if time.monotonic() - schema.checked_at > self.check_seconds:
+            revision = alembic_revision(engine)
+            if revision != schema.revision:
+                logger.info(f"Schema revision {revision}; dropping cached tables")
+                schema = _Schema(revision, {}, time.monotonic())
+                with self._lock:
+                    self._schemas[key] = schema
+            schema.checked_at = time.monotonic()
+        return schema
+
+    def _load(self, key: str) -> _Schema:
+        # Never checked, so the revision is compared on first use
+        if self.cache_dir:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                return _Schema(stored["revision"], stored["tables"], float("-inf"))
+            except (FileNotFoundError, ValueError, KeyError):
+                pass
+        return _Schema(UNVERSIONED, {}, float("-inf"))
+
+    def _save(self, key: str, schema: _Schema) -> None:
+        if not self.cache_dir:
+            return
+        # Write-then-rename so other workers never read a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"revision": schema.revision, "tables": schema.tables}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            logger.warning(f"Could not write schema cache {key}", exc_info=True)
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._schemas.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "databases": len(self._schemas),
+                "tables": sum(len(s.tables) for s in self._schemas.values()),
+                "reflections": self.reflections,
+            }
+
+
+schema_cache = SchemaCache()
@@ -0,0 +1,329 @@
+# services/sql_guard.py
+#
+# Every query the SQL agent writes runs through run_guarded_query: a single
+# SELECT, parsed with Postgres's own parser (pglast) and checked on the
+# syntax tree, then executed in a read-only transaction with a statement
+# timeout, an EXPLAIN cost ceiling, a row limit and the caller's tenant
+# filter. Point SQL_AGENT_DATABASE_URL at a replica (ideally as a role with
+# SELECT on the agent tables only) to keep it off the primary entirely.
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import FrozenSet, List, Optional
+
+from pglast import ast, parse_sql
+from pglast.enums.primnodes import CoercionForm
+from pglast.parser import ParseError
+from pglast.stream import RawStream
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from services.schema_cache import schema_cache
+
+logger = logging.getLogger(__name__)
+
+# Read replica or snapshot for agent queries; the app database when unset
+SQL_AGENT_DATABASE_URL = os.getenv("SQL_AGENT_DATABASE_URL")
+SQL_GUARD_TIMEOUT_MS = int(os.getenv("SQL_GUARD_TIMEOUT_MS", "5000"))
+# Planner cost units; a full scan of a large sales table is well above this
+SQL_GUARD_MAX_COST = float(os.getenv("SQL_GUARD_MAX_COST", "50000"))
+SQL_GUARD_MAX_ROWS = int(os.getenv("SQL_GUARD_MAX_ROWS", "200"))
+SQL_GUARD_SCHEMA = "public"
+
+# The only tables the agent sees, each narrowed to one tenant ({tenant} is
+# the filter, or true for a single-store database). Queries run with an
+# empty search_path, so these CTEs are all an unqualified name can resolve
+# to; users, tenants, jobs and the like are unreachable.
+TENANT_SCOPES = {
+    "products": "SELECT * FROM {schema}.products WHERE {tenant}",
+    "sales": "SELECT * FROM {schema}.sales WHERE {tenant} AND deleted_at IS NULL",
+    "sale_items": (
+        "SELECT * FROM {schema}.sale_items WHERE sale_id IN ("
+        "SELECT id FROM {schema}.sales WHERE {tenant} AND deleted_at IS NULL)"
+    ),
+    "returns": "SELECT * FROM {schema}.returns WHERE {tenant}",
+    "inventory_events": "SELECT * FROM {schema}.inventory_events WHERE {tenant}",
+    "stock_snapshots": "SELECT * FROM {schema}.stock_snapshots WHERE {tenant}",
+    "cashier_sessions": "SELECT * FROM {schema}.cashier_sessions WHERE {tenant}",
+}
+AGENT_TABLES = list(TENANT_SCOPES)
+
+# Functions that read settings, files or other databases, or have side
+# effects; anything qualified with a schema is refused as well
+FORBIDDEN_FUNCTIONS = frozenset(
+    ("set_config", "current_setting", "nextval", "setval", "currval")
+    + ("ts_stat", "ts_rewrite")
+)
+FORBIDDEN_FUNCTION_PREFIXES = (
+    "pg_",
+    "dblink",
+    "lo_",
+    "query_to_",
+    "table_to_",
+    "cursor_to_",
+    "schema_to_",
+    "database_to_",
+)
+# Statements that write, whether top-level or inside a WITH
+_WRITES = (ast.InsertStmt, ast.UpdateStmt, ast.DeleteStmt, ast.MergeStmt)
+
+# Tenant of the question being answered; set by the caller around the agent
+current_tenant: contextvars.ContextVar = contextvars.ContextVar(
+    "sql_guard_tenant", default=None
+)
+
+_engine: Optional[Engine] = None
+_lock = threading.Lock()
+
+
+class SqlGuardError(Exception):
+    """A generated query was refused; the message is shown to the agent."""
+
+
+class GuardedResult:
+    __slots__ = ("columns", "rows", "truncated", "cost")
+
+    def __init__(self, columns: List[str], rows: list, truncated: bool, cost: float):
+        self.columns = columns
+        self.rows = rows
+        self.truncated = truncated
+        self.cost = cost
+
+
+def get_guard_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None and SQL_AGENT_DATABASE_URL:
+                _engine = create_engine(
+                    SQL_AGENT_DATABASE_URL,
+                    pool_size=2,
+                    max_overflow=2,
+                    pool_pre_ping=True,
+                )
+            if _engine is None:
+                from app.db.database import engine
+
+                _engine = engine
+    return _engine
+
+
+def _table_name(table: ast.RangeVar) -> str:
+    return ".".join(
+        n for n in (table.catalogname, table.schemaname, table.relname) if n
+    )
+
+
+def _check_function(node: ast.FuncCall) -> None:
+    function = tuple(n.sval for n in node.funcname)
+    # EXTRACT(... FROM ...), AT TIME ZONE and the like come out of the
+    # parser as pg_catalog calls; only the function name matters there
+    if node.funcformat == CoercionForm.COERCE_SQL_SYNTAX:
+        function = function[-1:]
+    name = function[-1].lower()
+    if (
+        len(function) > 1
+        or name in FORBIDDEN_FUNCTIONS
+        or name.startswith(FORBIDDEN_FUNCTION_PREFIXES)
+    ):
+        raise SqlGuardError(f"Function '{'.'.join(function)}' is not allowed.")
+
+
+def _check_table(table: ast.RangeVar, ctes: FrozenSet[str]) -> None:
+    name = table.relname
+    if (
+        table.catalogname
+        or table.schemaname
+        or name.lower().startswith("pg_")
+        or (name not in ctes and name not in AGENT_TABLES)
+    ):
+        raise SqlGuardError(
+            f"Table '{_table_name(table)}' is not available; use unqualified "
+            "names: " + ", ".join(AGENT_TABLES) + "."
+        )
+
+
+def _check_with(with_clause: ast.WithClause, ctes: FrozenSet[str]) -> FrozenSet[str]:
+    """
+    Check each CTE body against the names it can actually see, and return
+    the names visible to the statement the WITH belongs to. Without
+    RECURSIVE a body sees only the CTEs listed before it, not itself;
+    any other name there is resolved by the server, not by us.
+    """
+    names = [cte.ctename for cte in with_clause.ctes]
+    for position, cte in enumerate(with_clause.ctes):
+        visible = names if with_clause.recursive else names[:position]
+        _check_node(cte.ctequery, ctes | frozenset(visible))
+    return ctes | frozenset(names)
+
+
+def _check_node(node, ctes: FrozenSet[str]) -> None:
+    """
+    Walk the parse tree, refusing writes, row locks, SELECT INTO, forbidden
+    functions, and tables that are neither agent tables nor CTEs in scope
+    where they are named.
+    """
+    if isinstance(node, (list, tuple)):
+        for item in node:
+            _check_node(item, ctes)
+        return
+    if not isinstance(node, ast.Node):
+        return
+    if isinstance(node, _WRITES):
+        raise SqlGuardError("Only SELECT queries are allowed.")
+    if isinstance(node, ast.RangeVar):
+        _check_table(node, ctes)
+        return
+    if isinstance(node, ast.FuncCall):
+        _check_function(node)
+    if isinstance(node, ast.SelectStmt):
+        if node.intoClause is not None:
+            raise SqlGuardError("SELECT INTO is not allowed.")
+        if node.lockingClause:
+            raise SqlGuardError("Row locks (FOR UPDATE/SHARE) are not allowed.")
+        if node.withClause is not None:
+            ctes = _check_with(node.withClause, ctes)
+    for attribute in node:
+        if attribute != "withClause":
+            _check_node(getattr(node, attribute), ctes)
+
+
+def check_query(sql: str) -> str:
+    """
+    Refuse anything but one read-only SELECT (or WITH ... SELECT) over the
+    agent tables and the CTEs in scope where each table is named. The query
+    is parsed by Postgres's parser, so quoting, escapes and comments mean
+    what they mean to the server, and the checked tree is deparsed and
+    returned: what runs is what was checked.
+    """
+    try:
+        statements = parse_sql(sql)
+    except ParseError as e:
+        raise SqlGuardError(f"Could not parse the query: {e}")
+    if not statements:
+        raise SqlGuardError("Empty query.")
+    if len(statements) > 1:
+        raise SqlGuardError("Send exactly one statement.")
+    if not isinstance(statements[0].stmt, ast.SelectStmt):
+        raise SqlGuardError("Only SELECT queries are allowed.")
+
+    _check_node(statements[0].stmt, frozenset())
+    return RawStream()(statements[0])
+
+
+def guarded_sql(query: str, tenant_id, max_rows: int = SQL_GUARD_MAX_ROWS) -> str:
+    """
+    Wrap a checked query so every agent table it names is the tenant's
+    slice, and cap its rows (one extra, to detect truncation). With no
+    tenant the database is assumed to hold a single store's data, and the
+    tables are exposed whole.
+    """
+    wrapped = f"SELECT * FROM (\n{query}\n) AS guarded LIMIT {max_rows + 1}"
+    # Inlined rather than bound: the agent's SQL may contain % or :name text
+    tenant = (
+        "true"
+        if tenant_id is None
+        else f"tenant_id = '{uuid.UUID(str(tenant_id))}'::uuid"
+    )
+    scopes = ",\n".join(
+        f"{table} AS NOT MATERIALIZED ("
+        f"{scope.format(schema=SQL_GUARD_SCHEMA, tenant=tenant)})"
+        for table, scope in TENANT_SCOPES.items()
+    )
+    return f"WITH {scopes}\n{wrapped}"
+
+
+def run_guarded_query(
+    sql: str,
+    tenant_id=None,
+    tenant_scoped: bool = True,
+    engine: Optional[Engine] = None,
+    max_rows: int = SQL_GUARD_MAX_ROWS,
+    max_cost: float = SQL_GUARD_MAX_COST,
+    timeout_ms: int = SQL_GUARD_TIMEOUT_MS,
+) -> GuardedResult:
+    query = check_query(sql)
+    if tenant_scoped and tenant_id is None:
+        raise SqlGuardError("No tenant in scope for this question.")
+    statement = guarded_sql(query, tenant_id if tenant_scoped else None, max_rows)
+
+    with (engine or get_guard_engine()).connect() as conn:
+        # Sent verbatim, so a % in the agent's SQL is not read as a placeholder
+        conn = conn.execution_options(no_parameters=True)
+        # Never committed: the connection rolls back when it goes back to the pool
+        conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+        # Unqualified names can only reach the CTEs above
+        conn.exec_driver_sql("SET LOCAL search_path = ''")
+
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}").scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        cost = float(plan[0]["Plan"]["Total Cost"])
+        if cost > max_cost:
+            logger.warning(f"[SQL guard] Refused query costing {cost:.0f}: {query}")
+            raise SqlGuardError(
+                f"Query too expensive (estimated cost {cost:.0f}, limit "
+                f"{max_cost:.0f}). Narrow the date range, filter or aggregate."
+            )
+
+        result = conn.exec_driver_sql(statement)
+        columns = list(result.keys())
+        rows = [tuple(row) for row in result.fetchmany(max_rows + 1)]
+
+    truncated = len(rows) > max_rows
+    return GuardedResult(columns, rows[:max_rows], truncated, cost)
+
+
+def guarded_sql_database(engine: Optional[Engine] = None, tenant_scoped: bool = True):
+    """
+    A LangChain SQLDatabase limited to the agent tables, without sample rows
+    (they would be read across tenants), whose queries go through the guard
+    for the tenant in `current_tenant`. Table descriptions come from the
+    schema cache, so building it and answering questions skip reflection.
+    """
+    from langchain.sql_database import SQLDatabase
+
+    class GuardedSQLDatabase(SQLDatabase):
+        def run(self, command, fetch="all", *args, **kwargs):
+            result = run_guarded_query(
+                command,
+                current_tenant.get(),
+                tenant_scoped=tenant_scoped,
+                engine=self._engine,
+            )
+            rows = result.rows[:1] if fetch == "one" else result.rows
+            if not rows:
+                return ""
+            text = str(rows)
+            if result.truncated:
+                text += f"\n(first {len(rows)} rows only; aggregate or add a LIMIT)"
+            return text
+
+        def get_table_info(self, table_names=None):
+            # Described from the schema cache instead of reflecting per question
+            usable = self.get_usable_table_names()
+            names = list(table_names or usable)
+            missing = set(names) - set(usable)
+            if missing:
+                raise ValueError(f"table_names {missing} not found in database")
+            info = schema_cache.table_info(self._engine, names)
+            return "\n\n".join(info[name] for name in names if name in info)
+
+        def run_no_throw(self, command, *args, **kwargs):
+            # Refusals go back to the agent as errors it can correct
+            try:
+                return super().run_no_throw(command, *args, **kwargs)
+            except SqlGuardError as e:
+                return f"Error: {e}"
+
+    return GuardedSQLDatabase(
+        engine or get_guard_engine(),
+        include_tables=AGENT_TABLES,
+        sample_rows_in_table_info=0,
+        lazy_table_reflection=True,
+    )
@@ -0,0 +1,52 @@
+# services/stock_alerts.py
+
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.models import Product
+from services.notifications import notify
+
+STOCK_ALERTS_CHANNEL = "stock_alerts"
+
+# Used for products without their own low_stock_threshold. The partial index
+# ix_products_low_stock bakes this value in, so change both together.
+DEFAULT_LOW_STOCK_THRESHOLD = 10
+
+
+def threshold_for(product: Product) -> int:
+    if product.low_stock_threshold is not None:
+        return product.low_stock_threshold
+    return DEFAULT_LOW_STOCK_THRESHOLD
+
+
+def crossing_state(before: int, after: int, threshold: int) -> Optional[str]:
+    """'low' when stock drops to/below the threshold, 'restocked' when it recovers."""
+    if before > threshold >= after:
+        return "low"
+    if before <= threshold < after:
+        return "restocked"
+    return None
+
+
+def publish_stock_crossing(
+    db: Session, product: Product, before: int, after: int
+) -> None:
+    """Push an alert to subscribed screens if this change crossed the threshold."""
+    threshold = threshold_for(product)
+    state = crossing_state(before, after, threshold)
+    if state is None:
+        return
+
+    notify(
+        db,
+        STOCK_ALERTS_CHANNEL,
+        {
+            "state": state,
+            "tenant_id": str(product.tenant_id),
+            "product_id": product.id,
+            "name": product.name,
+            "stock_level": after,
+            "threshold": threshold,
+        },
+    )
@@ -0,0 +1,252 @@
+# services/stock_ledger.py
+
+from datetime import datetime
+from typing import List, Optional
+
+import sqlalchemy
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.models import InventoryEvent, Product
+from services.stock_alerts import publish_stock_crossing
+
+LEDGER_SOURCES = ("sale", "return", "adjustment")
+
+# Compare-and-swap attempts before a stock delta gives up with a conflict
+MAX_STOCK_RETRIES = 5
+
+
+class StockConflictError(Exception):
+    """Concurrent writers kept moving the product's version; retry later."""
+
+
+class InsufficientStockError(Exception):
+    """Applying the delta would take stock below the allowed minimum."""
+
+
+def record_stock_change(
+    db: Session,
+    product,
+    change: int,
+    source: str,
+    reason: Optional[str] = None,
+    reference_id: Optional[int] = None,
+    min_stock: Optional[int] = None,
+) -> InventoryEvent:
+    """
+    Apply `change` to the product's stock and append the matching ledger row.
+    `product` is a Product or a cached CatalogRecord.
+    Every stock mutation goes through here so the ledger can be replayed;
+    the caller owns the transaction.
+
+    The update is a compare-and-swap on `products.version` rather than a
+    row lock, re-reading and retrying up to MAX_STOCK_RETRIES times when
+    another writer got there first. `min_stock` is checked against the
+    freshly read quantity on every attempt.
+    """
+    if source not in LEDGER_SOURCES:
+        raise ValueError(f"Unknown stock ledger source '{source}'")
+
+    for _ in range(MAX_STOCK_RETRIES):
+        current = db.execute(
+            select(Product.stock_quantity, Product.version).where(
+                Product.id == product.id
+            )
+        ).one()
+        before = current.stock_quantity or 0
+        after = before + change
+        if min_stock is not None and after < min_stock:
+            raise InsufficientStockError(
+                f"Insufficient stock for {product.name}: {before} on hand"
+            )
+
+        result = db.execute(
+            update(Product)
+            .where(Product.id == product.id, Product.version == current.version)
+            .values(stock_quantity=after, version=current.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            break
+    else:
+        raise StockConflictError(
+            f"Stock for product {product.id} changed concurrently; try again"
+        )
+
+    # Keep the session's copy in step so later ORM flushes see the new version
+    # (cached catalog records are read-only and refresh from the change feed)
+    if isinstance(product, Product):
+        set_committed_value(product, "stock_quantity", after)
+        set_committed_value(product, "version", current.version + 1)
+
+    publish_stock_crossing(db, product, before, after)
+
+    now = datetime.utcnow()
+    event = InventoryEvent(
+        product_id=product.id,
+        change=change,
+        reason=reason,
+        source=source,
+        reference_id=reference_id,
+        created_at=now,
+        updated_at=now,
+        tenant_id=product.tenant_id,
+    )
+    db.add(event)
+    return event
+
+
+def take_stock_snapshots(db: Session, tenant_id=None) -> int:
+    """
+    Checkpoint current stock for every product (optionally one tenant) in a
+    single set-based insert. Each snapshot records the last ledger row it
+    covers so point-in-time queries only replay the delta after it.
+    """
+    sql = """
+        INSERT INTO stock_snapshots (product_id, quantity, taken_at, last_event_id, tenant_id)
+        SELECT
+            p.id,
+            COALESCE(p.stock_quantity, 0),
+            :taken_at,
+            COALESCE(
+                (SELECT MAX(ie.id) FROM inventory_events ie WHERE ie.product_id = p.id),
+                0
+            ),
+            p.tenant_id
+        FROM products p
+    """
+    params = {"taken_at": datetime.utcnow()}
+    if tenant_id is not None:
+        sql += " WHERE p.tenant_id = :tenant_id"
+        params["tenant_id"] = tenant_id
+
+    result = db.execute(sqlalchemy.text(sql), params)
+    return result.rowcount
+
+
+# Stock as of :as_of, anchored on whichever snapshot is closest in time:
+#   * snapshot before as_of  -> add ledger rows written after it, up to as_of
+#   * snapshot after as_of   -> subtract ledger rows it covers that are past as_of
+#   * no snapshot at all     -> live stock minus everything past as_of
+STOCK_AS_OF_SQL = """
+    WITH before AS (
+        SELECT DISTINCT ON (s.product_id)
+            s.product_id, s.quantity, s.last_event_id, s.taken_at
+        FROM stock_snapshots s
+        WHERE s.tenant_id = :tenant_id AND s.taken_at <= :as_of
+        ORDER BY s.product_id, s.taken_at DESC
+    ),
+    after AS (
+        SELECT DISTINCT ON (s.product_id)
+            s.product_id, s.quantity, s.last_event_id, s.taken_at
+        FROM stock_snapshots s
+        WHERE s.tenant_id = :tenant_id AND s.taken_at > :as_of
+        ORDER BY s.product_id, s.taken_at ASC
+    )
+    SELECT
+        p.id AS product_id,
+        p.name,
+        CASE
+            WHEN b.product_id IS NOT NULL
+                 AND (a.product_id IS NULL OR :as_of - b.taken_at <= a.taken_at - :as_of)
+            THEN b.quantity + COALESCE((
+                SELECT SUM(ie.change) FROM inventory_events ie
+                WHERE ie.product_id = p.id
+                  AND ie.id > b.last_event_id
+                  AND ie.created_at <= :as_of
+            ), 0)
+            WHEN a.product_id IS NOT NULL
+            THEN a.quantity - COALESCE((
+                SELECT SUM(ie.change) FROM inventory_events ie
+                WHERE ie.product_id = p.id
+                  AND ie.id <= a.last_event_id
+                  AND ie.created_at > :as_of
+            ), 0)
+            ELSE COALESCE(p.stock_quantity, 0) - COALESCE((
+                SELECT SUM(ie.change) FROM inventory_events ie
+                WHERE ie.product_id = p.id AND ie.created_at > :as_of
+            ), 0)
+        END AS quantity
+    FROM products p
+    LEFT JOIN before b ON b.product_id = p.id
+    LEFT JOIN after a ON a.product_id = p.id
+    WHERE p.tenant_id = :tenant_id
+    {product_filter}
+    ORDER BY p.id
+"""
+
+
+def stock_as_of(
+    db: Session,
+    tenant_id,
+    as_of: datetime,
+    product_ids: Optional[List[int]] = None,
+) -> List[dict]:
+    """Reconstruct per-product stock at `as_of` from snapshots plus ledger deltas."""
+    sql = STOCK_AS_OF_SQL.replace(
+        "{product_filter}", "AND p.id = ANY(:product_ids)" if product_ids else ""
+    )
+    params = {"tenant_id": tenant_id, "as_of": as_of}
+    if product_ids:
+        params["product_ids"] = product_ids
+
+    rows = db.execute(sqlalchemy.text(sql), params).fetchall()
+    return [
+        {"product_id": r.product_id, "name": r.name, "quantity": int(r.quantity)}
+        for r in rows
+    ]
+
+
+def shrink_report(db: Session, tenant_id, start: datetime, end: datetime) -> List[dict]:
+    """
+    Opening/closing stock for the period with the ledger movement between
+    them split by source. Negative adjustments are the shrink.
+    """
+    opening = {r["product_id"]: r for r in stock_as_of(db, tenant_id, start)}
+    closing = {r["product_id"]: r["quantity"] for r in stock_as_of(db, tenant_id, end)}
+
+    movement_sql = sqlalchemy.text(
+        """
+        SELECT
+            ie.product_id,
+            SUM(CASE WHEN ie.source = 'sale' THEN -ie.change ELSE 0 END) AS sold,
+            SUM(CASE WHEN ie.source = 'return' THEN ie.change ELSE 0 END) AS returned,
+            SUM(
+                CASE WHEN ie.source = 'adjustment' AND ie.change > 0
+                THEN ie.change ELSE 0 END
+            ) AS received,
+            SUM(
+                CASE WHEN ie.source = 'adjustment' AND ie.change < 0
+                THEN -ie.change ELSE 0 END
+            ) AS shrink
+        FROM inventory_events ie
+        WHERE ie.tenant_id = :tenant_id
+          AND ie.created_at > :start
+          AND ie.created_at <= :end
+        GROUP BY ie.product_id
+        """
+    )
+    movement = {
+        r.product_id: r
+        for r in db.execute(
+            movement_sql, {"tenant_id": tenant_id, "start": start, "end": end}
+        ).fetchall()
+    }
+
+    report = []
+    for product_id, row in opening.items():
+        moved = movement.get(product_id)
+        report.append(
+            {
+                "product_id": product_id,
+                "name": row["name"],
+                "opening_stock": row["quantity"],
+                "sold": int(moved.sold) if moved else 0,
+                "returned": int(moved.returned) if moved else 0,
+                "received": int(moved.received) if moved else 0,
+                "shrink": int(moved.shrink) if moved else 0,
+                "closing_stock": closing.get(product_id, row["quantity"]),
+            }
+        )
+    return report
@@ -0,0 +1,175 @@
+# services/zreport.py
+
+from datetime import date, datetime, timedelta
+from typing import TextIO
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.models import CashierSession, Product, Return, Sale, SaleItem, User
+from app.utils.zreport_csv import generate_zreport_csv, write_zreport_csv
+from schemas.manager_closeout import SessionSummary, TopSeller, ZReportOut
+
+TOP_SELLER_LIMIT = 5
+
+templates = Environment(
+    loader=FileSystemLoader("templates"), autoescape=select_autoescape(["html"])
+)
+
+
+def day_bounds(report_date: date):
+    """Half-open [start, end) range covering the whole day."""
+    start = datetime.combine(report_date, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def _sales_totals(db: Session, tenant_id, start: datetime, end: datetime):
+    def total_for(payment_type):
+        return func.coalesce(
+            func.sum(
+                case((Sale.payment_type == payment_type, Sale.total_amount), else_=0)
+            ),
+            0,
+        )
+
+    # One pass over the day's rows (index-only on ix_sales_tenant_timestamp)
+    return (
+        db.query(
+            func.coalesce(func.sum(Sale.total_amount), 0),
+            total_for("cash"),
+            total_for("card"),
+        )
+        .filter(
+            Sale.tenant_id == tenant_id,
+            Sale.timestamp >= start,
+            Sale.timestamp < end,
+            Sale.deleted_at.is_(None),
+        )
+        .one()
+    )
+
+
+def _returns_total(db: Session, tenant_id, start: datetime, end: datetime):
+    return (
+        db.query(func.coalesce(func.sum(Return.quantity * Product.price), 0))
+        .join(Product, Return.product_id == Product.id)
+        .filter(
+            Return.timestamp >= start,
+            Return.timestamp < end,
+            Product.tenant_id == tenant_id,
+        )
+        .scalar()
+    )
+
+
+def _session_summaries(db: Session, tenant_id, start: datetime, end: datetime):
+    sessions = (
+        db.query(CashierSession, User.username)
+        .join(User, CashierSession.cashier_id == User.id)
+        .filter(
+            CashierSession.opened_at >= start,
+            CashierSession.opened_at < end,
+            CashierSession.tenant_id == tenant_id,
+        )
+        .order_by(CashierSession.opened_at)
+        .all()
+    )
+    return [
+        SessionSummary(
+            cashier_id=s.cashier_id,
+            cashier_name=username,
+            opening_cash=s.opening_cash,
+            closing_cash=s.closing_cash,
+            system_cash_total=s.system_cash_total,
+            cash_difference=s.cash_difference,
+            is_over_short=s.is_over_short,
+            opened_at=s.opened_at,
+            closed_at=s.closed_at,
+        )
+        for s, username in sessions
+    ]
+
+
+def _top_sellers(db: Session, tenant_id, start: datetime, end: datetime):
+    units_sold = func.sum(SaleItem.quantity)
+    rows = (
+        db.query(Product.id, Product.name, units_sold.label("units_sold"))
+        .join(SaleItem, Product.id == SaleItem.product_id)
+        .join(Sale, Sale.id == SaleItem.sale_id)
+        .filter(
+            Sale.timestamp >= start,
+            Sale.timestamp < end,
+            Sale.deleted_at.is_(None),
+            Product.tenant_id == tenant_id,
+        )
+        .group_by(Product.id, Product.name)
+        .order_by(units_sold.desc())
+        .limit(TOP_SELLER_LIMIT)
+        .all()
+    )
+    return [
+        TopSeller(product_id=product_id, name=name, units_sold=units)
+        for product_id, name, units in rows
+    ]
+
+
+def build_z_report(db: Session, tenant_id, report_date: date) -> ZReportOut:
+    """
+    End-of-day report for one tenant. Every figure is computed by an
+    aggregate query, so cost grows with the number of sessions and top
+    sellers rather than the number of sales.
+    """
+    start, end = day_bounds(report_date)
+    total_sales, total_cash, total_card = _sales_totals(db, tenant_id, start, end)
+
+    return ZReportOut(
+        date=report_date,
+        total_sales=total_sales,
+        total_cash=total_cash,
+        total_card=total_card,
+        total_returns=_returns_total(db, tenant_id, start, end),
+        sessions=_session_summaries(db, tenant_id, start, end),
+        top_sellers=_top_sellers(db, tenant_id, start, end),
+    )
+
+
+def zreport_csv(report: ZReportOut) -> str:
+    return generate_zreport_csv(
+        report.date,
+        report.total_sales,
+        report.total_cash,
+        report.total_card,
+        report.total_returns,
+        report.sessions,
+        report.top_sellers,
+    )
+
+
+def write_zreport(out: TextIO, report: ZReportOut) -> None:
+    """Stream the CSV for `report` into `out` without building a string."""
+    write_zreport_csv(
+        out,
+        report.date,
+        report.total_sales,
+        report.total_cash,
+        report.total_card,
+        report.total_returns,
+        report.sessions,
+        report.top_sellers,
+    )
+
+
+def zreport_html(report: ZReportOut) -> str:
+    """HTML for the PDF export; deterministic, so it doubles as a cache key."""
+    return templates.get_template("zreport.html").render(
+        {
+            "date": report.date,
+            "total_sales": report.total_sales,
+            "total_cash": report.total_cash,
+            "total_card": report.total_card,
+            "total_returns": report.total_returns,
+            "sessions": report.sessions,
+            "top_sellers": report.top_sellers,
+        }
+    )
@@ -0,0 +1,121 @@
+# services/zreport_archive.py
+
+import io
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+
+from app.db.database import SessionLocal
+from services.pdf_renderer import pdf_renderer
+from services.zreport import write_zreport, zreport_html
+from services.zreport_snapshots import load_z_report, store_pdf
+
+ZREPORT_ARCHIVE_WORKERS = int(os.getenv("ZREPORT_ARCHIVE_WORKERS", "4"))
+# Reports loaded ahead of the zip writer; bounds memory regardless of range
+ARCHIVE_PREFETCH = ZREPORT_ARCHIVE_WORKERS * 2
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable sink the zip writer appends to; drained after each entry."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _load(tenant_id, label: str, day: date, include_pdf: bool):
+    """
+    Closed days come from their frozen snapshot, CSV and PDF included; a
+    PDF is rendered (and stored with the snapshot) only if none was frozen.
+    """
+    db = SessionLocal()
+    try:
+        bundle = load_z_report(db, tenant_id, day)
+        if include_pdf and bundle.pdf is None:
+            bundle.pdf = pdf_renderer.render_blocking(zreport_html(bundle.report))
+            if bundle.snapshot_id is not None:
+                store_pdf(db, bundle.snapshot_id, bundle.pdf)
+        if not include_pdf:
+            bundle.pdf = None
+        return label, day, bundle
+    finally:
+        db.close()
+
+
+def date_range(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+def stream_zreport_archive(
+    tenants: List[Tuple[object, str]],
+    start: date,
+    end: date,
+    include_pdf: bool = False,
+) -> Iterator[bytes]:
+    """
+    Yield a zip archive of `<store>/zreport_<date>.csv` (and .pdf) for every
+    (tenant_id, label) in `tenants` and day in [start, end]. Reports load in
+    parallel and each file is written out as soon as it is ready, so entries
+    arrive in completion order and memory stays bounded by the prefetch.
+    """
+    jobs = iter(
+        (tenant_id, label, day)
+        for tenant_id, label in tenants
+        for day in date_range(start, end)
+    )
+    sink = _ChunkSink()
+    pool = ThreadPoolExecutor(
+        max_workers=ZREPORT_ARCHIVE_WORKERS, thread_name_prefix="zreport-archive"
+    )
+    pending = set()
+
+    def submit_next():
+        job = next(jobs, None)
+        if job is not None:
+            pending.add(pool.submit(_load, *job, include_pdf))
+
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for _ in range(ARCHIVE_PREFETCH):
+                submit_next()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    label, day, bundle = future.result()
+                    submit_next()
+
+                    csv_name = f"{label}/zreport_{day}.csv"
+                    if bundle.csv is not None:
+                        archive.writestr(csv_name, bundle.csv)
+                    else:
+                        with archive.open(csv_name, "w") as entry:
+                            text = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+                            write_zreport(text, bundle.report)
+                            text.flush()
+                            text.detach()
+                    yield sink.drain()
+
+                    if bundle.pdf is not None:
+                        archive.writestr(f"{label}/zreport_{day}.pdf", bundle.pdf)
+                        yield sink.drain()
+
+        # Central directory, written when the archive closes
+        yield sink.drain()
+    finally:
+        # Client gone or a report failed: drop whatever has not started
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,165 @@
+# services/zreport_snapshots.py
+
+import logging
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.models import Sale, Tenant, ZReportSnapshot
+from schemas.manager_closeout import ZReportOut
+from services.pdf_renderer import render_pdf
+from services.zreport import build_z_report, zreport_csv, zreport_html
+
+logger = logging.getLogger(__name__)
+
+
+class ZReportBundle:
+    """A report plus whatever exports were frozen alongside it."""
+
+    __slots__ = ("report", "csv", "pdf", "snapshot_id")
+
+    def __init__(self, report: ZReportOut, csv=None, pdf=None, snapshot_id=None):
+        self.report = report
+        self.csv = csv
+        self.pdf = pdf
+        self.snapshot_id = snapshot_id
+
+
+def is_closed_day(report_date: date) -> bool:
+    return report_date < date.today()
+
+
+def get_snapshot(db: Session, tenant_id, report_date: date):
+    """The frozen report for a closed day, unless a late write made it stale."""
+    return (
+        db.query(ZReportSnapshot)
+        .filter(
+            ZReportSnapshot.tenant_id == tenant_id,
+            ZReportSnapshot.report_date == report_date,
+            ZReportSnapshot.stale.is_(False),
+        )
+        .first()
+    )
+
+
+def freeze_day(
+    db: Session, tenant_id, report_date: date, with_pdf: bool = False
+) -> ZReportBundle:
+    """
+    Compute a closed day's report and store it with its CSV (and PDF when
+    asked) in zreport_snapshots, replacing a stale copy. Caller commits.
+
+    A late write landing while the report is computed bumps the snapshot's
+    version; the stored copy is then left stale for the next freeze, and
+    the returned bundle has no snapshot_id.
+    """
+    if not is_closed_day(report_date):
+        raise ValueError(f"{report_date} is not a closed business day")
+
+    # Read before the report, so any write the report misses moves it
+    version = db.execute(
+        select(ZReportSnapshot.version).where(
+            ZReportSnapshot.tenant_id == tenant_id,
+            ZReportSnapshot.report_date == report_date,
+        )
+    ).scalar_one_or_none()
+    report = build_z_report(db, tenant_id, report_date)
+    csv = zreport_csv(report)
+    pdf = render_pdf(zreport_html(report)) if with_pdf else None
+
+    values = {
+        "tenant_id": tenant_id,
+        "report_date": report_date,
+        "report": report.model_dump(mode="json"),
+        "csv": csv,
+        "pdf": pdf,
+        "frozen_at": datetime.utcnow(),
+        "stale": False,
+    }
+    stmt = insert(ZReportSnapshot).values(**values)
+    snapshot_id = db.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_zreport_snapshots_tenant_date",
+            set_={k: stmt.excluded[k] for k in values if k != "tenant_id"},
+            where=ZReportSnapshot.version.is_not_distinct_from(version),
+        ).returning(ZReportSnapshot.id)
+    ).scalar_one_or_none()
+    if snapshot_id is None:
+        logger.info(
+            f"Z-report {report_date} for tenant {tenant_id} changed while freezing"
+        )
+    return ZReportBundle(report, csv, pdf, snapshot_id)
+
+
+def load_z_report(db: Session, tenant_id, report_date: date) -> ZReportBundle:
+    """
+    Frozen snapshot for closed days (freezing it on first access), live
+    computation for today.
+    """
+    if not is_closed_day(report_date):
+        return ZReportBundle(build_z_report(db, tenant_id, report_date))
+
+    snapshot = get_snapshot(db, tenant_id, report_date)
+    if snapshot is not None:
+        return ZReportBundle(
+            ZReportOut.model_validate(snapshot.report),
+            snapshot.csv,
+            snapshot.pdf,
+            snapshot.id,
+        )
+
+    bundle = freeze_day(db, tenant_id, report_date)
+    db.commit()
+    return bundle
+
+
+def store_pdf(db: Session, snapshot_id: int, pdf: bytes) -> None:
+    db.query(ZReportSnapshot).filter(
+        ZReportSnapshot.id == snapshot_id, ZReportSnapshot.stale.is_(False)
+    ).update({"pdf": pdf}, synchronize_session=False)
+    db.commit()
+
+
+def freeze_closed_days(
+    db: Session, days_back: int = 7, with_pdf: bool = True, tenant_id=None
+) -> int:
+    """
+    Closeout job: freeze every missing or stale report for each tenant over
+    the last `days_back` closed days. Commits per report; returns the count.
+    """
+    today = date.today()
+    days = [today - timedelta(days=n) for n in range(1, days_back + 1)]
+    tenants = db.query(Tenant.id)
+    if tenant_id is not None:
+        tenants = tenants.filter(Tenant.id == tenant_id)
+
+    frozen = 0
+    for (tid,) in tenants.all():
+        fresh = {
+            d
+            for (d,) in db.query(ZReportSnapshot.report_date).filter(
+                ZReportSnapshot.tenant_id == tid,
+                ZReportSnapshot.report_date.in_(days),
+                ZReportSnapshot.stale.is_(False),
+            )
+        }
+        first_sale = (
+            db.query(Sale.timestamp)
+            .filter(Sale.tenant_id == tid, Sale.deleted_at.is_(None))
+            .order_by(Sale.timestamp)
+            .limit(1)
+            .scalar()
+        )
+        for day in days:
+            if day in fresh or first_sale is None or day < first_sale.date():
+                continue
+            try:
+                bundle = freeze_day(db, tid, day, with_pdf=with_pdf)
+                db.commit()
+                frozen += bundle.snapshot_id is not None
+            except Exception:
+                db.rollback()
+                logger.exception(f"Freezing Z-report {day} for tenant {tid} failed")
+    return frozen
@@ -1,8 +1,22 @@
 # tests/conftest.py
 
+import os
+import uuid
+from decimal import Decimal
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
 from main import app
+from app.models.models import Product, Sale, SaleItem, Tenant, User
+
+# Tests that depend on Postgres behaviour (triggers, sequences, SKIP LOCKED,
+# COPY) run against a scratch database migrated to head, e.g.
+#   TEST_DATABASE_URL=postgresql+psycopg2://localhost/anchor_test pytest
+# and are skipped when it is not set.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
 
 
 @pytest.fixture(scope="module")
@@ -12,3 +26,110 @@ def client():
     """
     with TestClient(app) as c:
         yield c
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(TEST_DATABASE_URL)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_sessions(pg_engine):
+    """Session factory for tests that need several concurrent sessions."""
+    return sessionmaker(bind=pg_engine, autoflush=False, autocommit=False)
+
+
+@pytest.fixture
+def pg_db(pg_sessions):
+    db = pg_sessions()
+    yield db
+    db.rollback()
+    db.close()
+
+
+@pytest.fixture
+def pg_session_local(monkeypatch, pg_sessions):
+    """Point code that opens its own SessionLocal() at the test database."""
+    monkeypatch.setattr("app.db.database.SessionLocal", pg_sessions)
+    return pg_sessions
+
+
+@pytest.fixture
+def tenant_id(pg_engine):
+    """A tenant of its own per test, so tests can share one database."""
+    tenant = uuid.uuid4()
+    with pg_engine.begin() as conn:
+        conn.execute(Tenant.__table__.insert().values(id=tenant, name=f"test-{tenant}"))
+    return tenant
+
+
+@pytest.fixture
+def make_user(pg_sessions, tenant_id):
+    """Commit a user of the test's tenant and return its id."""
+
+    def make(role: str = "cashier", **fields) -> int:
+        values = {
+            "username": f"test-{uuid.uuid4().hex[:12]}",
+            "password_hash": "!",
+            "role": role,
+            "tenant_id": tenant_id,
+        }
+        values.update(fields)
+        with pg_sessions() as db:
+            user = User(**values)
+            db.add(user)
+            db.commit()
+            return user.id
+
+    return make
+
+
+@pytest.fixture
+def make_product(pg_sessions, tenant_id):
+    """Commit a product for the test's tenant and return its id."""
+
+    def make(stock: int = 0, **fields) -> int:
+        values = {
+            "name": "Test Product",
+            "sku": f"T-{uuid.uuid4().hex[:12]}",
+            "price": Decimal("10.00"),
+            "category": "Test",
+            "stock_quantity": stock,
+            "tenant_id": tenant_id,
+        }
+        values.update(fields)
+        with pg_sessions() as db:
+            product = Product(**values)
+            db.add(product)
+            db.commit()
+            return product.id
+
+    return make
+
+
+@pytest.fixture
+def make_sale(pg_sessions, tenant_id):
+    """Commit a sale of `items` ((product_id, quantity, price) tuples); returns its id."""
+
+    def make(items=(), payment_type: str = "cash", **fields) -> int:
+        values = {
+            "payment_type": payment_type,
+            "total_amount": sum(Decimal(str(p)) * q for _, q, p in items),
+            "tenant_id": tenant_id,
+        }
+        values.update(fields)
+        with pg_sessions() as db:
+            sale = Sale(**values)
+            sale.items = [
+                SaleItem(product_id=product_id, quantity=quantity, price=price)
+                for product_id, quantity, price in items
+            ]
+            db.add(sale)
+            db.commit()
+            return sale.id
+
+    return make
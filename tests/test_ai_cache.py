@@ -0,0 +1,85 @@
+from services.ai_cache import AnswerCache, is_near_duplicate, normalize_prompt
+from services.llm_stub import StubOpenAI
+
+
+def test_normalization_ignores_case_punctuation_and_filler():
+    assert normalize_prompt("What sold best this week?") == normalize_prompt(
+        "sold best, this week"
+    )
+
+
+def test_word_order_is_kept():
+    assert not is_near_duplicate(
+        normalize_prompt("sales greater than returns"),
+        normalize_prompt("returns greater than sales"),
+    )
+
+
+def test_typos_are_near_duplicates_but_different_periods_are_not():
+    assert is_near_duplicate(
+        normalize_prompt("top selling products this week"),
+        normalize_prompt("top sellng products this week"),
+    )
+    assert not is_near_duplicate(
+        normalize_prompt("sales this week"), normalize_prompt("sales last week")
+    )
+    assert not is_near_duplicate(
+        normalize_prompt("top 5 products"), normalize_prompt("top 10 products")
+    )
+
+
+def test_words_with_digits_must_match_exactly():
+    assert not is_near_duplicate(
+        normalize_prompt("sales for store1"), normalize_prompt("sales for store2")
+    )
+    assert not is_near_duplicate(
+        normalize_prompt("stock of sku1042"), normalize_prompt("stock of sku1043")
+    )
+    assert is_near_duplicate(
+        normalize_prompt("stock of sku1042 todya"),
+        normalize_prompt("stock of sku1042 today"),
+    )
+
+
+def test_near_duplicate_prompt_is_served_from_cache():
+    cache = AnswerCache()
+    cache.put("t1", "sql", "Top sellers this week?", "w1", "Vodka", ["SELECT 1"])
+    hit = cache.get("t1", "sql", "top selers this week", "w1")
+    assert hit.answer == "Vodka" and hit.sql == ["SELECT 1"]
+
+
+def test_new_watermark_tenant_or_mode_misses():
+    cache = AnswerCache()
+    cache.put("t1", "sql", "top sellers", "w1", "Vodka")
+    assert cache.get("t1", "sql", "top sellers", "w2") is None
+    assert cache.get("t2", "sql", "top sellers", "w1") is None
+    assert cache.get("t1", "auto", "top sellers", "w1") is None
+
+
+def test_expired_and_evicted_answers_are_dropped():
+    cache = AnswerCache(max_entries=1, ttl_seconds=0)
+    cache.put("t1", "auto", "top sellers", "w1", "Vodka")
+    assert cache.get("t1", "auto", "top sellers", "w1") is None
+
+    cache = AnswerCache(max_entries=1)
+    cache.put("t1", "auto", "top sellers", "w1", "Vodka")
+    cache.put("t1", "auto", "slow movers", "w1", "Gin")
+    assert cache.get("t1", "auto", "top sellers", "w1") is None
+    assert cache.get("t1", "auto", "slow movers", "w1").answer == "Gin"
+
+
+def test_stub_client_answers_only_on_a_miss():
+    client, cache = StubOpenAI(), AnswerCache()
+
+    def ask(prompt):
+        hit = cache.get("t1", "auto", prompt, "w1")
+        if hit:
+            return hit.answer
+        messages = [{"role": "user", "content": prompt}]
+        answer = client.chat.completions.create(model="stub", messages=messages)
+        answer = answer.choices[0].message.content
+        cache.put("t1", "auto", prompt, "w1", answer)
+        return answer
+
+    assert ask("What sold best?") == ask("what sold best")
+    assert client.calls == 1
@@ -0,0 +1,58 @@
+from services import ai_functions, analytics_queries
+from services.ai_functions import call_ai_function, function_definitions
+
+
+def test_schemas_are_generated_from_signatures():
+    schemas = {f["name"]: f for f in function_definitions()}
+    params = schemas["get_top_margin_products"]["parameters"]
+    assert params["properties"]["days"] == {
+        "type": "integer",
+        "description": "How many days back to look",
+        "default": 30,
+    }
+    assert params["required"] == []
+    assert "db" not in params["properties"]
+    assert "tenant_id" not in params["properties"]
+
+
+def test_calls_are_tenant_scoped_and_arguments_coerced(monkeypatch):
+    calls = []
+
+    def category_sales(db, tenant_id, days=None):
+        calls.append((tenant_id, days))
+        return [
+            {
+                "category": "Whiskey",
+                "total_units_sold": 12,
+                "total_revenue": 480.0,
+                "avg_price": 40.0,
+            }
+        ]
+
+    monkeypatch.setattr(ai_functions, "category_sales", category_sales)
+    answer = call_ai_function(
+        "get_top_category", None, "tenant-a", {"days": "7", "bogus": 1}
+    )
+    assert "Whiskey" in answer
+    assert calls == [("tenant-a", 7)]
+
+
+def test_unknown_function_returns_none():
+    assert call_ai_function("drop_tables", None, "tenant-a", {}) is None
+
+
+def test_aggregates_are_reused_until_the_watermark_moves(monkeypatch):
+    analytics_queries.analytics_cache.clear()
+    watermark, runs = ["w1"], []
+    monkeypatch.setattr(analytics_queries, "data_watermark", lambda db, t: watermark[0])
+
+    @analytics_queries.cached_aggregate
+    def totals(db, tenant_id, days=None):
+        runs.append(days)
+        return [{"total": len(runs)}]
+
+    assert totals(None, "tenant-a", days=7) == totals(None, "tenant-a", days=7)
+    totals(None, "tenant-b", days=7)
+    watermark[0] = "w2"
+    totals(None, "tenant-a", days=7)
+    assert runs == [7, 7, 7]
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from app.models.models import Sale
+from services.analytics_queries import data_watermark
+from services.purge import soft_delete
+
+
+def test_watermark_moves_when_an_older_sale_is_deleted(
+    pg_db, pg_session_local, tenant_id, make_product, make_sale
+):
+    product_id = make_product()
+    older = make_sale([(product_id, 1, "5.00")], timestamp=datetime(2020, 1, 1))
+    make_sale([(product_id, 1, "5.00")])
+    before = data_watermark(pg_db, tenant_id)
+
+    soft_delete(pg_db, pg_db.get(Sale, older), "sale")
+    assert data_watermark(pg_db, tenant_id) != before
+
+
+def test_watermark_is_stable_without_writes(pg_db, tenant_id, make_product, make_sale):
+    make_sale([(make_product(), 1, "5.00")])
+    assert data_watermark(pg_db, tenant_id) == data_watermark(pg_db, tenant_id)
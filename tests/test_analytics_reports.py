@@ -0,0 +1,60 @@
+import uuid
+from datetime import date, datetime
+
+from app.models.models import Product, Return, Sale, SaleItem, Tenant
+from services.analytics_reports import kpi_summary
+
+
+def test_kpi_summary_only_counts_the_tenants_data(
+    pg_db, tenant_id, make_product, make_sale
+):
+    day = datetime(2021, 3, 2, 12)
+    product_id = make_product(category="Ours")
+    sale_id = make_sale([(product_id, 2, "5.00")], timestamp=day)
+    pg_db.add(
+        Return(
+            product_id=product_id,
+            sale_id=sale_id,
+            quantity=1,
+            reason="damaged",
+            timestamp=day,
+            tenant_id=tenant_id,
+        )
+    )
+
+    # A busier tenant on the same day
+    other = uuid.uuid4()
+    pg_db.add(Tenant(id=other, name=f"test-{other}"))
+    pg_db.flush()
+    theirs = Product(
+        name="Theirs", sku=f"T-{other.hex[:12]}", price=50, category="Theirs"
+    )
+    theirs.tenant_id = other
+    pg_db.add(theirs)
+    pg_db.flush()
+    pg_db.add(
+        Sale(
+            total_amount=500,
+            payment_type="cash",
+            timestamp=day,
+            tenant_id=other,
+            items=[SaleItem(product_id=theirs.id, quantity=10, price=50)],
+        )
+    )
+    pg_db.add(
+        Return(
+            product_id=theirs.id,
+            quantity=10,
+            reason="damaged",
+            timestamp=day,
+            tenant_id=other,
+        )
+    )
+    pg_db.commit()
+
+    kpis = kpi_summary(pg_db, tenant_id, date(2021, 3, 2), date(2021, 3, 3))
+    assert kpis["total_sales"] == 10.0
+    assert kpis["total_transactions"] == 1
+    assert kpis["avg_basket_size"] == 2.0
+    assert kpis["return_rate"] == 50.0
+    assert kpis["top_category"] == "Ours"
@@ -0,0 +1,94 @@
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.models.models import CashierSession, Sale
+from services import cash_drawer
+
+
+def _open(db, cashier_id, tenant_id, opened_at=None, opening_cash="100.00"):
+    session = CashierSession(
+        cashier_id=cashier_id,
+        tenant_id=tenant_id,
+        opened_at=opened_at or datetime.utcnow(),
+        opening_cash=Decimal(opening_cash),
+    )
+    db.add(session)
+    db.commit()
+    return session.id
+
+
+def _ring(db, cashier_id, tenant_id, amount, payment_type="cash"):
+    sale = Sale(
+        total_amount=Decimal(amount),
+        payment_type=payment_type,
+        cashier_id=cashier_id,
+        tenant_id=tenant_id,
+    )
+    db.add(sale)
+    db.flush()
+    cash_drawer.record_sale(db, sale)
+    db.commit()
+    return sale
+
+
+def test_expected_cash_is_float_plus_cash_sales_less_cash_refunds(
+    pg_db, tenant_id, make_user
+):
+    cashier = make_user()
+    session_id = _open(pg_db, cashier, tenant_id)
+
+    _ring(pg_db, cashier, tenant_id, "30.00")
+    _ring(pg_db, cashier, tenant_id, "50.00", payment_type="card")
+    voided = _ring(pg_db, cashier, tenant_id, "12.50")
+    cash_drawer.reverse_sale(pg_db, voided)
+    cash_drawer.record_refund(pg_db, cashier, tenant_id, Decimal("5.00"), "cash")
+    # Goes back to the card, not out of the drawer
+    cash_drawer.record_refund(pg_db, cashier, tenant_id, Decimal("20.00"), "card")
+    pg_db.commit()
+
+    session = pg_db.get(CashierSession, session_id)
+    pg_db.refresh(session)
+    assert (session.cash_total, session.card_total, session.refund_total) == (
+        Decimal("30.00"),
+        Decimal("50.00"),
+        Decimal("25.00"),
+    )
+    assert session.cash_refund_total == Decimal("5.00")
+    assert (session.sale_count, session.refund_count) == (2, 2)
+    assert cash_drawer.expected_cash(session) == Decimal("125.00")
+    assert cash_drawer.expected_cash(cash_drawer.session_payload(session)) == Decimal(
+        "125.00"
+    )
+
+
+def test_sales_go_to_the_latest_of_two_open_drawers(pg_db, tenant_id, make_user):
+    cashier = make_user()
+    _open(pg_db, cashier, tenant_id, opened_at=datetime.utcnow() - timedelta(hours=1))
+    latest = _open(pg_db, cashier, tenant_id)
+
+    assert cash_drawer.open_session_id(pg_db, cashier, tenant_id) == latest
+    assert _ring(pg_db, cashier, tenant_id, "1.00").cashier_session_id == latest
+
+
+def test_concurrent_terminals_lose_no_increments(
+    pg_db, pg_sessions, tenant_id, make_user
+):
+    cashier = make_user()
+    session_id = _open(pg_db, cashier, tenant_id)
+    terminals, sales_each = 4, 10
+
+    def terminal():
+        with pg_sessions() as db:
+            for _ in range(sales_each):
+                _ring(db, cashier, tenant_id, "2.00")
+
+    threads = [threading.Thread(target=terminal) for _ in range(terminals)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    session = pg_db.get(CashierSession, session_id)
+    assert session.sale_count == terminals * sales_each
+    assert session.cash_total == Decimal("2.00") * terminals * sales_each
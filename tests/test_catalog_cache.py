@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.models.models import Product
+from services.catalog_cache import CatalogCache
+
+
+def _rename(db, product_id, name):
+    db.execute(update(Product).where(Product.id == product_id).values(name=name))
+
+
+def test_refresh_applies_updates_and_deletes(
+    pg_sessions, pg_db, tenant_id, make_product
+):
+    cache = CatalogCache(max_age_seconds=3600)
+    kept, deleted = make_product(name="Kept"), make_product(name="Deleted")
+    assert [r.name for r in cache.products(pg_db, tenant_id)] == ["Deleted", "Kept"]
+    pg_db.commit()
+
+    with pg_sessions() as writer:
+        _rename(writer, kept, "Kept v2")
+        writer.execute(
+            update(Product)
+            .where(Product.id == deleted)
+            .values(deleted_at=datetime.utcnow())
+        )
+        writer.commit()
+    cache.mark_stale(tenant_id)
+
+    assert [r.name for r in cache.products(pg_db, tenant_id)] == ["Kept v2"]
+    assert cache.get(pg_db, tenant_id, deleted) is None
+
+
+def test_change_committed_after_a_later_one_is_not_skipped(
+    pg_sessions, pg_db, tenant_id, make_product
+):
+    cache = CatalogCache(max_age_seconds=3600)
+    slow_id, fast_id = make_product(name="Slow"), make_product(name="Fast")
+    cache.products(pg_db, tenant_id)
+    pg_db.commit()
+
+    # The slow writer draws its change_seq first but commits last
+    slow = pg_sessions()
+    _rename(slow, slow_id, "Slow v2")
+    with pg_sessions() as fast:
+        _rename(fast, fast_id, "Fast v2")
+        fast.commit()
+
+    cache.mark_stale(tenant_id)
+    assert cache.get(pg_db, tenant_id, fast_id).name == "Fast v2"
+    pg_db.commit()
+
+    slow.commit()
+    slow.close()
+    cache.mark_stale(tenant_id)
+    assert cache.get(pg_db, tenant_id, slow_id).name == "Slow v2"
+
+
+def test_refresh_publishes_a_new_view_instead_of_editing(
+    pg_sessions, pg_db, tenant_id, make_product
+):
+    cache = CatalogCache(max_age_seconds=3600)
+    product_id = make_product(name="Before")
+    before = cache._fresh(pg_db, tenant_id)
+    pg_db.commit()
+
+    with pg_sessions() as writer:
+        _rename(writer, product_id, "After")
+        writer.commit()
+    cache.mark_stale(tenant_id)
+    after = cache._fresh(pg_db, tenant_id)
+
+    assert after is not before
+    assert before.by_id[product_id].name == "Before"
+    assert after.by_sku[before.by_id[product_id].sku].name == "After"
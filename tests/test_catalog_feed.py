@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import update
+
+from app.models.models import Product
+from services.catalog_feed import parse_watermark, product_changes
+
+
+def _sync(db, tenant_id, since="0", limit=1000):
+    """Follow the feed until caught up; returns ({id: name}, watermark)."""
+    seen = {}
+    while True:
+        page = product_changes(db, tenant_id, since, limit)
+        db.commit()
+        for row in page["rows"]:
+            seen[row[0]] = row[1]
+        since = page["watermark"]
+        if not page["has_more"]:
+            return seen, since
+
+
+def test_parse_watermark():
+    assert parse_watermark("0") == (0, 0)
+    assert parse_watermark("812:41") == (812, 41)
+    for bad in ("812", "a:b", "-1:3"):
+        with pytest.raises(ValueError):
+            parse_watermark(bad)
+
+
+def test_feed_pages_through_every_change_once(pg_db, tenant_id, make_product):
+    ids = [make_product(name=f"P{i}") for i in range(5)]
+
+    first = product_changes(pg_db, tenant_id, "0", limit=2)
+    assert first["has_more"] and len(first["rows"]) == 2
+    rest, watermark = _sync(pg_db, tenant_id, first["watermark"], limit=2)
+    assert sorted([r[0] for r in first["rows"]] + list(rest)) == ids
+
+    again = product_changes(pg_db, tenant_id, watermark, limit=2)
+    assert (again["rows"], again["deleted"], again["has_more"]) == ([], [], False)
+
+
+def test_change_committed_after_a_later_one_is_not_skipped(
+    pg_sessions, pg_db, tenant_id, make_product
+):
+    slow_id, fast_id = make_product(name="Slow"), make_product(name="Fast")
+    _, watermark = _sync(pg_db, tenant_id)
+
+    # The slow writer starts first and commits last
+    slow = pg_sessions()
+    slow.execute(update(Product).where(Product.id == slow_id).values(name="Slow v2"))
+    with pg_sessions() as fast:
+        fast.execute(
+            update(Product).where(Product.id == fast_id).values(name="Fast v2")
+        )
+        fast.commit()
+
+    # Held back while an older writer is still running
+    seen, watermark = _sync(pg_db, tenant_id, watermark)
+    assert seen == {}
+
+    slow.commit()
+    slow.close()
+    seen, _ = _sync(pg_db, tenant_id, watermark)
+    assert seen == {slow_id: "Slow v2", fast_id: "Fast v2"}
@@ -0,0 +1,95 @@
+import io
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.models.models import InventoryEvent, Product, Tenant
+from services.catalog_import import _clean_row, import_catalog_csv
+
+
+def _csv(*lines):
+    return io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def test_clean_row_validates_and_normalises():
+    row = {"name": " Mug ", "sku": "M-1", "price": "$4.5", "stock_quantity": "3"}
+    assert _clean_row(row) == ["Mug", "M-1", "4.50", None, 3, None]
+
+    with pytest.raises(ValueError, match="price must be a number"):
+        _clean_row({"name": "Mug", "sku": "M-1", "price": "cheap"})
+    with pytest.raises(ValueError, match="sku is required"):
+        _clean_row({"name": "Mug", "sku": " ", "price": "1"})
+    with pytest.raises(ValueError, match="low_stock_threshold cannot be negative"):
+        _clean_row(
+            {"name": "Mug", "sku": "M-1", "price": "1", "low_stock_threshold": "-1"}
+        )
+
+
+def test_missing_required_column_is_refused(pg_db, tenant_id):
+    with pytest.raises(ValueError, match="missing required columns: price"):
+        import_catalog_csv(pg_db, _csv("name,sku", "Mug,M-1"), tenant_id)
+
+
+def test_import_upserts_by_sku_and_reports_bad_rows(
+    pg_db, pg_engine, tenant_id, make_product
+):
+    prefix = uuid.uuid4().hex[:8]
+    existing = f"{prefix}-OLD"
+    make_product(stock=7, sku=existing, name="Old name")
+
+    other_tenant = uuid.uuid4()
+    with pg_engine.begin() as conn:
+        conn.execute(
+            Tenant.__table__.insert().values(
+                id=other_tenant, name=f"test-{other_tenant}"
+            )
+        )
+    foreign = f"{prefix}-FOREIGN"
+    make_product(sku=foreign, tenant_id=other_tenant)
+
+    result = import_catalog_csv(
+        pg_db,
+        _csv(
+            "Name,SKU,Price,Stock_Quantity",
+            f"New mug,{prefix}-NEW,4.00,5",
+            f"Renamed,{existing},9.99,100",
+            f"Broken,{prefix}-BAD,free,1",
+            f"Taken,{foreign},1.00,1",
+            f"New mug v2,{prefix}-NEW,4.50,6",
+        ),
+        tenant_id,
+    )
+    pg_db.commit()
+
+    assert (result["rows_read"], result["inserted"], result["updated"]) == (5, 1, 1)
+    assert [(e["line"], e["sku"]) for e in result["errors"]] == [
+        (2, f"{prefix}-NEW"),
+        (4, f"{prefix}-BAD"),
+        (5, foreign),
+    ]
+
+    products = {
+        p.sku: p
+        for p in pg_db.scalars(select(Product).where(Product.sku.like(f"{prefix}-%")))
+    }
+    # Last occurrence wins; existing stock belongs to the ledger, not the file
+    assert (
+        products[f"{prefix}-NEW"].name,
+        products[f"{prefix}-NEW"].stock_quantity,
+    ) == (
+        "New mug v2",
+        6,
+    )
+    assert (products[existing].name, products[existing].stock_quantity) == (
+        "Renamed",
+        7,
+    )
+    assert products[foreign].tenant_id == other_tenant
+
+    opening = pg_db.scalars(
+        select(InventoryEvent).where(
+            InventoryEvent.product_id == products[f"{prefix}-NEW"].id
+        )
+    ).one()
+    assert (opening.change, opening.source) == (6, "adjustment")
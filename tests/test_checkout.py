@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.models import Product, Sale, Tenant
+from app.models.schemas import SaleCreate
+from routes.sales import checkout
+
+
+def _checkout(db, user, product_id):
+    sale = SaleCreate(
+        total_amount=10,
+        payment_type="cash",
+        items=[{"product_id": product_id, "quantity": 1, "price": 10}],
+    )
+    return checkout(sale, db=db, user=user)
+
+
+def test_checkout_only_sells_the_tenants_live_products(
+    pg_db, tenant_id, make_user, make_product
+):
+    user = {"id": make_user(), "tenant_id": tenant_id}
+    other_tenant = uuid.uuid4()
+    pg_db.add(Tenant(id=other_tenant, name=f"test-{other_tenant}"))
+    pg_db.commit()
+    foreign = make_product(stock=5, tenant_id=other_tenant)
+    deleted = make_product(stock=5, deleted_at=datetime.utcnow())
+
+    for product_id in (foreign, deleted):
+        with pytest.raises(HTTPException) as refused:
+            _checkout(pg_db, user, product_id)
+        assert refused.value.status_code == 404
+
+    pg_db.expire_all()
+    assert pg_db.get(Product, foreign).stock_quantity == 5
+    assert pg_db.query(Sale).filter(Sale.tenant_id == tenant_id).count() == 0
+
+    live = make_product(stock=5)
+    _checkout(pg_db, user, live)
+    assert pg_db.get(Product, live).stock_quantity == 4
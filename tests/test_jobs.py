@@ -0,0 +1,134 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.models import Job
+from services import jobs
+from services.jobs import (
+    JOB_MAX_ATTEMPTS,
+    claim_next,
+    delete_expired_jobs,
+    enqueue,
+    job_handler,
+    requeue_stale_jobs,
+    run_job,
+)
+
+# Above anything other tests leave queued, so claim_next takes ours first
+TOP = 1000
+
+
+@pytest.fixture
+def queue(pg_db, pg_session_local, tenant_id):
+    """Enqueue jobs for the test's tenant; removes them afterwards."""
+
+    def add(kind="test", priority=TOP, **fields):
+        job = enqueue(pg_db, kind, tenant_id=tenant_id, priority=priority)
+        if fields:
+            pg_db.query(Job).filter(Job.id == job.id).update(fields)
+            pg_db.commit()
+        return job.id
+
+    yield add
+    pg_db.rollback()
+    pg_db.query(Job).filter(Job.tenant_id == tenant_id).delete()
+    pg_db.commit()
+
+
+def _job(db, job_id):
+    db.expire_all()
+    return db.get(Job, job_id)
+
+
+def test_claims_go_by_priority_and_never_twice(pg_db, pg_sessions, queue):
+    low = queue(priority=TOP + 1)
+    high = queue(priority=TOP + 2)
+
+    with pg_sessions() as other:
+        first = claim_next(pg_db, "w1")
+        second = claim_next(other, "w2")
+        assert (first.id, second.id) == (high, low)
+
+    job = _job(pg_db, high)
+    assert (job.status, job.worker, job.attempts) == ("running", "w1", 1)
+
+
+def test_silent_jobs_are_requeued_then_failed(pg_db, queue):
+    long_ago = datetime.utcnow() - timedelta(seconds=jobs.JOB_TIMEOUT_SECONDS + 60)
+    retry = queue(status="running", worker="gone", attempts=1, heartbeat_at=long_ago)
+    spent = queue(
+        status="running",
+        worker="gone",
+        attempts=JOB_MAX_ATTEMPTS,
+        heartbeat_at=long_ago,
+    )
+    alive = queue(status="running", worker="busy", heartbeat_at=datetime.utcnow())
+
+    requeue_stale_jobs(pg_db)
+    assert (_job(pg_db, retry).status, _job(pg_db, retry).worker) == ("queued", None)
+    assert _job(pg_db, spent).status == "failed"
+    assert _job(pg_db, alive).status == "running"
+
+
+def test_finished_jobs_expire_after_the_ttl(pg_db, queue):
+    now = datetime.utcnow()
+    old = queue(status="done", finished_at=now - timedelta(hours=1000))
+    recent = queue(status="done", finished_at=now)
+    waiting = queue()
+
+    delete_expired_jobs(pg_db)
+    assert _job(pg_db, old) is None
+    assert _job(pg_db, recent) is not None
+    assert _job(pg_db, waiting) is not None
+
+
+def test_heartbeat_runs_while_the_handler_is_busy(pg_db, queue, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 0.05)
+    job_id = queue(kind="test_slow")
+    seen = []
+
+    @job_handler("test_slow")
+    def slow(db, ctx):
+        before = _job(pg_db, job_id).heartbeat_at
+        time.sleep(0.3)
+        seen.append(_job(pg_db, job_id).heartbeat_at > before)
+        return {"ok": True}
+
+    run_job(pg_db, claim_next(pg_db, "w1"))
+    assert seen == [True]
+    assert not any(t.name == f"job-{job_id}-heartbeat" for t in threading.enumerate())
+    assert _job(pg_db, job_id).status == "done"
+
+
+def test_a_requeued_run_cannot_overwrite_the_new_one(pg_db, pg_sessions, queue):
+    job_id = queue(kind="test_late")
+    release = threading.Event()
+
+    @job_handler("test_late")
+    def late(db, ctx):
+        release.wait(5)
+        return {"from": ctx.worker}
+
+    job = claim_next(pg_db, "w1")
+    runner = threading.Thread(target=run_job, args=(pg_db, job))
+    runner.start()
+
+    # w1 looks dead: its job goes back on the queue and w2 takes it
+    with pg_sessions() as other:
+        other.query(Job).filter(Job.id == job_id).update(
+            {"status": "queued", "worker": None}
+        )
+        other.commit()
+        assert claim_next(other, "w2").id == job_id
+    release.set()
+    runner.join()
+
+    job = _job(pg_db, job_id)
+    assert (job.status, job.worker, job.attempts, job.result) == (
+        "running",
+        "w2",
+        2,
+        None,
+    )
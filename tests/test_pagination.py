@@ -0,0 +1,20 @@
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(["beer", "Bud Light 12pk", 42])
+    assert decode_cursor(cursor, 3) == ["beer", "Bud Light 12pk", 42]
+
+
+def test_missing_cursor_starts_from_first_page():
+    assert decode_cursor(None, 3) is None
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", 3)
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor([1, 2]), 3)
@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+
+from passlib.context import CryptContext
+from sqlalchemy import delete
+
+from app.auth.hashing import BCRYPT_ROUNDS, PasswordHasher, rehash_password
+from app.models.models import User
+
+# Cheapest bcrypt cost, standing in for a hash from before a rounds increase
+old_context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4)
+
+
+def test_outdated_hash_is_upgraded_on_verify():
+    hasher = PasswordHasher(workers=1)
+    try:
+        valid, new_hash = asyncio.run(
+            hasher.verify_and_update("s3cret", old_context.hash("s3cret"))
+        )
+        assert valid
+        assert new_hash and f"${BCRYPT_ROUNDS:02d}$" in new_hash
+
+        valid, again = asyncio.run(hasher.verify_and_update("s3cret", new_hash))
+        assert (valid, again) == (True, None)
+    finally:
+        hasher.shutdown()
+
+
+def _user(db, tenant_id):
+    user = User(
+        username=f"test-{uuid.uuid4().hex[:12]}",
+        password_hash=old_context.hash("s3cret"),
+        role="cashier",
+        tenant_id=tenant_id,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_rehash_stores_the_new_hash(pg_db, pg_sessions, tenant_id):
+    user = _user(pg_db, tenant_id)
+    rehash_password(pg_db, user, "$2b$12$new")
+
+    with pg_sessions() as other:
+        assert other.get(User, user.id).password_hash == "$2b$12$new"
+
+
+def test_rehash_failure_does_not_raise(pg_db, pg_sessions, tenant_id):
+    user = _user(pg_db, tenant_id)
+    user_id = user.id
+    with pg_sessions() as other:
+        other.execute(delete(User).where(User.id == user_id))
+        other.commit()
+
+    rehash_password(pg_db, user, "$2b$12$new")
+    # The session is usable again after the failed commit
+    assert pg_db.get(User, user_id) is None
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.pdf_renderer import PdfRenderer, content_key
+
+
+def test_identical_documents_share_a_key():
+    assert content_key("<p>42</p>") == content_key("<p>42</p>")
+    assert content_key("<p>42</p>") != content_key("<p>43</p>")
+
+
+def test_cached_document_is_served_without_rendering():
+    renderer = PdfRenderer(workers=1)
+    renderer.put(content_key("<p>hi</p>"), b"%PDF-cached")
+    assert asyncio.run(renderer.render("<p>hi</p>")) == b"%PDF-cached"
+    assert renderer._executor is None
+
+
+def test_memory_cache_evicts_oldest_past_byte_budget():
+    renderer = PdfRenderer(cache_max_bytes=10)
+    renderer.put("a", b"123456")
+    renderer.put("b", b"123456")
+    assert renderer.get("a") is None
+    assert renderer.get("b") == b"123456"
+
+
+def test_disk_tier_survives_a_new_renderer(tmp_path):
+    PdfRenderer(cache_dir=str(tmp_path)).put("k", b"%PDF-disk")
+    assert PdfRenderer(cache_dir=str(tmp_path)).get("k") == b"%PDF-disk"
+
+
+def test_cancelled_caller_leaves_the_render_shared_and_cached(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    renders = []
+
+    def slow_render(html):
+        renders.append(html)
+        started.set()
+        release.wait(5)
+        return b"%PDF-slow"
+
+    monkeypatch.setattr("services.pdf_renderer.render_pdf", slow_render)
+    renderer = PdfRenderer(max_pending=1)
+    renderer._executor = ThreadPoolExecutor(1)
+
+    async def scenario():
+        first = asyncio.ensure_future(renderer.render("<p>x</p>"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        first.cancel()
+        await asyncio.sleep(0)
+        # Still rendering: counted, and joined rather than started again
+        assert renderer._pending == 1
+        second = asyncio.ensure_future(renderer.render("<p>x</p>"))
+        release.set()
+        return await second
+
+    assert asyncio.run(scenario()) == b"%PDF-slow"
+    assert renders == ["<p>x</p>"]
+    assert renderer._pending == 0 and renderer._inflight == {}
+    assert renderer.get(content_key("<p>x</p>")) == b"%PDF-slow"
+
+
+def test_disk_tier_drops_files_unused_past_the_max_age(tmp_path):
+    renderer = PdfRenderer(cache_dir=str(tmp_path), dir_max_age_seconds=60)
+    renderer.put("old", b"%PDF-old")
+    renderer.put("new", b"%PDF-new")
+    hour_ago = time.time() - 3600
+    os.utime(tmp_path / "old.pdf", (hour_ago, hour_ago))
+
+    fresh = PdfRenderer(cache_dir=str(tmp_path), dir_max_age_seconds=60)
+    assert fresh.get("old") is None
+    assert fresh.prune_disk() == 1
+    assert sorted(os.listdir(tmp_path)) == ["new.pdf"]
+
+
+def test_disk_tier_prunes_least_recently_used_past_the_byte_budget(tmp_path):
+    renderer = PdfRenderer(cache_dir=str(tmp_path), dir_max_bytes=10)
+    for age, key in enumerate(["c", "b", "a"]):
+        renderer.put(key, b"123456")
+        at = time.time() - 100 * (age + 1)
+        os.utime(tmp_path / f"{key}.pdf", (at, at))
+    # Reading "a" makes it the most recently used
+    assert PdfRenderer(cache_dir=str(tmp_path)).get("a") == b"123456"
+
+    assert renderer.prune_disk() == 2
+    assert os.listdir(tmp_path) == ["a.pdf"]
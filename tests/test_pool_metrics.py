@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db.pool_metrics import InstrumentedQueuePool, pool_stats
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+        pool_pre_ping=True,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_checkouts_overflow_and_timeouts_are_counted(engine):
+    first, second = engine.connect(), engine.connect()
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 2
+    assert stats["overflow"] == 1
+    assert stats["max_connections"] == 2
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    first.close()
+    second.close()
+
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 2
+    assert stats["overflow_checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["connects"] == 2
+    assert stats["max_wait_ms"] >= 50
+
+
+def test_counters_survive_dispose(engine):
+    engine.connect().close()
+    engine.dispose()
+    engine.connect().close()
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 2
+    assert stats["connects"] == 2
@@ -0,0 +1,57 @@
+from app.auth.principal_cache import Principal, PrincipalCache
+
+
+def _cache(**kwargs):
+    cache = PrincipalCache(**kwargs)
+    cache._subscribed = True  # no LISTEN thread in unit tests
+    return cache
+
+
+def _loader(calls, user_id=1, exp=None):
+    def load():
+        calls.append(user_id)
+        return Principal(user_id, "casey", "admin", "tenant-a"), exp
+
+    return load
+
+
+def test_principal_supports_attribute_and_item_access():
+    principal = Principal(7, "casey", "cashier", "tenant-a")
+    assert principal.role == principal["role"] == "cashier"
+
+
+def test_second_resolve_is_served_from_cache():
+    cache, calls = _cache(), []
+    cache.resolve("oauth2", "token", _loader(calls))
+    cache.resolve("oauth2", "token", _loader(calls))
+    assert calls == [1]
+
+
+def test_schemes_do_not_share_entries():
+    cache, calls = _cache(), []
+    cache.resolve("oauth2", "token", _loader(calls))
+    cache.resolve("api_key", "token", _loader(calls))
+    assert calls == [1, 1]
+
+
+def test_invalidate_user_forces_reload():
+    cache, calls = _cache(), []
+    cache.resolve("oauth2", "token", _loader(calls))
+    cache.invalidate_user(1)
+    cache.resolve("oauth2", "token", _loader(calls))
+    assert calls == [1, 1]
+
+
+def test_expired_token_is_not_served():
+    cache, calls = _cache(), []
+    cache.resolve("oauth2", "token", _loader(calls, exp=0))
+    cache.resolve("oauth2", "token", _loader(calls, exp=0))
+    assert calls == [1, 1]
+
+
+def test_oldest_entry_is_evicted_past_max_entries():
+    cache, calls = _cache(max_entries=1), []
+    cache.resolve("oauth2", "a", _loader(calls, user_id=1))
+    cache.resolve("oauth2", "b", _loader(calls, user_id=2))
+    cache.resolve("oauth2", "a", _loader(calls, user_id=1))
+    assert calls == [1, 2, 1]
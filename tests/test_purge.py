@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+import services.job_handlers  # noqa: F401  (registers the purge handler)
+from app.models.models import Job, Product, Sale, SaleItem
+from services.analytics_reports import sales_summary
+from services.jobs import run_job
+from services.purge import PURGE_JOB, queue_missing_purges, soft_delete
+
+
+def _run_purge(db, job_id):
+    # Claim exactly this job, leaving other tests' queued jobs alone
+    job = db.get(Job, job_id)
+    job.status, job.worker, job.attempts = "running", "test", 1
+    db.commit()
+    run_job(db, job)
+    db.expire_all()
+    return db.get(Job, job_id)
+
+
+def test_soft_deleted_sale_leaves_aggregates_then_is_purged(
+    pg_db, pg_session_local, tenant_id, make_product, make_sale
+):
+    product_id = make_product(stock=10)
+    now = datetime.utcnow()
+    kept = make_sale([(product_id, 1, "5.00")], timestamp=now)
+    deleted = make_sale([(product_id, 2, "5.00")], timestamp=now)
+
+    job = soft_delete(pg_db, pg_db.get(Sale, deleted), "sale")
+    assert (job.kind, job.params) == (
+        PURGE_JOB,
+        {"entity": "sale", "entity_id": deleted},
+    )
+    (day,) = sales_summary(
+        pg_db, tenant_id, now - timedelta(days=1), now + timedelta(days=1)
+    )
+    assert (day["total_sales_count"], day["total_sales_value"]) == (1, 5.0)
+
+    job = _run_purge(pg_db, job.id)
+    assert (job.status, job.result["rows_deleted"]) == ("done", 2)
+    assert pg_db.get(Sale, deleted) is None
+    assert pg_db.get(Sale, kept) is not None
+    assert (
+        pg_db.scalar(
+            select(func.count())
+            .select_from(SaleItem)
+            .where(SaleItem.sale_id == deleted)
+        )
+        == 0
+    )
+
+
+def test_purge_refuses_a_live_row(pg_db, pg_session_local, make_product):
+    product_id = make_product()
+    job = soft_delete(pg_db, pg_db.get(Product, product_id), "product")
+    product = pg_db.get(Product, product_id)
+    product.deleted_at = None
+    pg_db.commit()
+
+    job = _run_purge(pg_db, job.id)
+    assert job.status == "failed"
+    assert "not deleted" in job.error
+    assert pg_db.get(Product, product_id) is not None
+
+
+@pytest.mark.parametrize("previous_status", ["failed", None])
+def test_sweep_requeues_purges_without_an_active_job(
+    pg_db, make_product, previous_status
+):
+    product_id = make_product()
+    job = soft_delete(pg_db, pg_db.get(Product, product_id), "product")
+    if previous_status:
+        job.status = previous_status
+    else:
+        pg_db.delete(job)
+    pg_db.commit()
+
+    def queued():
+        return pg_db.scalar(
+            select(func.count())
+            .select_from(Job)
+            .where(
+                Job.kind == PURGE_JOB,
+                Job.status == "queued",
+                Job.params == {"entity": "product", "entity_id": product_id},
+            )
+        )
+
+    queue_missing_purges(pg_db)
+    assert queued() == 1
+    queue_missing_purges(pg_db)
+    assert queued() == 1
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from services import schema_cache
+from services.schema_cache import SchemaCache
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/store.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num TEXT)"))
+        conn.execute(text("INSERT INTO alembic_version VALUES ('rev1')"))
+        conn.execute(text("CREATE TABLE sales (id INTEGER PRIMARY KEY, total REAL)"))
+        conn.execute(text("CREATE TABLE users (id INTEGER, password_hash TEXT)"))
+    yield engine
+    engine.dispose()
+
+
+def test_tables_are_reflected_once_and_only_when_asked(engine, tmp_path):
+    cache = SchemaCache(cache_dir=str(tmp_path / "schema"))
+    info = cache.table_info(engine, ["sales"])
+    assert list(info) == ["sales"]
+    assert "CREATE TABLE sales" in info["sales"]
+
+    cache.table_info(engine, ["sales"])
+    assert cache.reflections == 1
+
+
+def test_disk_cache_survives_a_restart(engine, tmp_path):
+    SchemaCache(cache_dir=str(tmp_path / "schema")).table_info(engine, ["sales"])
+
+    restarted = SchemaCache(cache_dir=str(tmp_path / "schema"))
+    assert "total" in restarted.table_info(engine, ["sales"])["sales"]
+    assert restarted.reflections == 0
+
+
+def test_migration_invalidates_cached_tables(engine, tmp_path):
+    cache = SchemaCache(cache_dir=str(tmp_path / "schema"), check_seconds=0)
+    cache.table_info(engine, ["sales"])
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE sales ADD COLUMN tip REAL"))
+        conn.execute(text("UPDATE alembic_version SET version_num = 'rev2'"))
+
+    assert "tip" in cache.table_info(engine, ["sales"])["sales"]
+    assert cache.reflections == 2
+
+
+def test_slow_reflection_only_blocks_its_own_database(engine, tmp_path, monkeypatch):
+    other = create_engine(f"sqlite:///{tmp_path}/other.db")
+    with other.begin() as conn:
+        conn.execute(text("CREATE TABLE sales (id INTEGER PRIMARY KEY)"))
+    reflecting, release = threading.Event(), threading.Event()
+    describe = schema_cache.describe_tables
+
+    def slow_for_store(bind, table_names):
+        if bind is engine:
+            reflecting.set()
+            release.wait(5)
+        return describe(bind, table_names)
+
+    monkeypatch.setattr(schema_cache, "describe_tables", slow_for_store)
+    cache = SchemaCache(cache_dir=None)
+    slow = threading.Thread(target=cache.table_info, args=(engine, ["sales"]))
+    slow.start()
+    try:
+        assert reflecting.wait(5)
+        # Answered while the other database is still being reflected
+        assert list(cache.table_info(other, ["sales"])) == ["sales"]
+        assert slow.is_alive()
+    finally:
+        release.set()
+        slow.join()
+        other.dispose()
+    assert cache.reflections == 2
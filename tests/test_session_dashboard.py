@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from services.session_dashboard import session_metrics
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def _session(**counters):
+    session = {
+        "opened_at": NOW - timedelta(hours=2),
+        "opening_cash": "100.00",
+        "cash_total": "300.00",
+        "card_total": "100.00",
+        "sale_count": 20,
+        "refund_total": "35.00",
+        "cash_refund_total": "20.00",
+    }
+    session.update(counters)
+    return session
+
+
+def test_velocity_is_per_hour_open():
+    metrics = session_metrics(_session(), now=NOW)
+    assert metrics["sales_per_hour"] == 10
+    assert metrics["revenue_per_hour"] == 200
+
+
+def test_expected_cash_counts_float_sales_and_cash_refunds():
+    metrics = session_metrics(_session(), now=NOW)
+    assert metrics["expected_cash_in_drawer"] == 380
+
+
+def test_projection_extends_cash_pace_to_shift_end():
+    metrics = session_metrics(_session(), now=NOW, shift_hours=8)
+    assert metrics["projected_cash_total"] == 1200
+    # 280 net cash in two hours, at the same pace for six more
+    assert metrics["projected_cash_in_drawer"] == 1220
+    assert metrics["projected_over_short"] == 1120
+
+
+def test_projection_runs_short_of_the_float_when_refunds_outpace_sales():
+    session = _session(cash_total="10.00", cash_refund_total="30.00")
+    metrics = session_metrics(session, now=NOW, shift_hours=4)
+    assert metrics["expected_cash_in_drawer"] == 80
+    assert metrics["projected_over_short"] == -40
+
+
+def test_accepts_iso_timestamps_from_notifications():
+    opened = (NOW - timedelta(hours=2)).isoformat(sep=" ")
+    assert session_metrics(_session(opened_at=opened), now=NOW)["hours_open"] == 2
@@ -0,0 +1,107 @@
+import uuid
+
+import pytest
+
+from services.sql_guard import (
+    SqlGuardError,
+    check_query,
+    guarded_sql,
+    run_guarded_query,
+)
+
+TENANT = uuid.uuid4()
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT name FROM products;",
+        "with t as (select * from sales) select count(*) from t",
+        "SELECT name FROM products WHERE name LIKE '%drop table%'",
+        "SELECT 1 -- update later",
+        "SELECT EXTRACT(year FROM timestamp), count(*) FROM sales GROUP BY 1",
+        "SELECT timestamp AT TIME ZONE 'UTC' FROM sales",
+    ],
+)
+def test_read_only_selects_pass(sql):
+    assert not check_query(sql).endswith(";")
+
+
+def test_the_checked_query_is_what_runs():
+    assert check_query("select name -- drop\nfrom products;") == (
+        "SELECT name FROM products"
+    )
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "DELETE FROM sales",
+        "SELECT 1; DROP TABLE sales",
+        "SELECT * INTO backup FROM sales",
+        "SELECT * FROM sales FOR UPDATE",
+        "WITH d AS (DELETE FROM sales RETURNING *) SELECT * FROM d",
+        "SELECT * FROM public.users",
+        'SELECT * FROM "public"."sales"',
+        "SELECT query FROM pg_stat_activity",
+        "SELECT pg_sleep(60)",
+        "SELECT set_config('statement_timeout', '0', true)",
+        "SELECT query_to_xml('select * from users', true, true, '')",
+        "SELECT pg_catalog.now()",
+        "WITH u AS (SELECT * FROM users) SELECT * FROM u",
+        # A CTE only shadows a table where it is in scope
+        "WITH pg_stat_activity AS (SELECT * FROM pg_stat_activity) "
+        "SELECT query FROM pg_stat_activity",
+        "WITH a AS (SELECT * FROM pg_roles), pg_roles AS (SELECT 1) SELECT * FROM a",
+        "WITH users AS (SELECT * FROM users) SELECT * FROM users",
+        # Escapes a regex cannot see through
+        'SELECT * FROM U&"\\0070ublic".users',
+        "SELECT E'\\'', (SELECT hashed_password FROM public.users LIMIT 1), '' AS a",
+        "SELECT * FROM sales UNION SELECT * FROM sales FOR SHARE",
+        "SELECT 1 FROM sales WHERE",
+        "",
+    ],
+)
+def test_writes_and_escapes_are_refused(sql):
+    with pytest.raises(SqlGuardError):
+        check_query(sql)
+
+
+def test_agent_tables_are_narrowed_to_the_tenant():
+    sql = guarded_sql("SELECT count(*) FROM sale_items", TENANT, max_rows=50)
+    assert sql.startswith("WITH products AS NOT MATERIALIZED")
+    assert f"tenant_id = '{TENANT}'::uuid" in sql
+    assert sql.rstrip().endswith("AS guarded LIMIT 51")
+
+
+def test_tenant_must_be_a_uuid():
+    with pytest.raises(ValueError):
+        guarded_sql("SELECT 1", "x' OR true --")
+
+
+def test_scoped_queries_need_a_tenant():
+    with pytest.raises(SqlGuardError):
+        run_guarded_query("SELECT 1", tenant_id=None)
+
+
+def test_guarded_queries_only_see_the_tenants_rows(pg_engine, tenant_id, make_product):
+    make_product(name="Ours")
+    result = run_guarded_query(
+        "SELECT name FROM products", tenant_id=tenant_id, engine=pg_engine
+    )
+    assert result.rows == [("Ours",)]
+
+
+def test_unscoped_queries_still_cannot_reach_other_tables(pg_engine):
+    # The outer "users" is not the CTE, so the static check refuses it;
+    # had it not, the empty search_path would resolve it to nothing
+    with pytest.raises(Exception, match="users"):
+        run_guarded_query(
+            "SELECT * FROM (WITH users AS (SELECT 1) SELECT * FROM users) a, users",
+            tenant_scoped=False,
+            engine=pg_engine,
+        )
+    result = run_guarded_query(
+        "SELECT count(*) FROM sales", tenant_scoped=False, engine=pg_engine
+    )
+    assert result.columns == ["count"]
@@ -0,0 +1,14 @@
+from services.stock_alerts import crossing_state
+
+
+def test_drop_to_threshold_is_low():
+    assert crossing_state(before=12, after=10, threshold=10) == "low"
+
+
+def test_recovery_above_threshold_is_restocked():
+    assert crossing_state(before=3, after=24, threshold=10) == "restocked"
+
+
+def test_moves_on_one_side_do_not_alert():
+    assert crossing_state(before=30, after=20, threshold=10) is None
+    assert crossing_state(before=5, after=2, threshold=10) is None
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+from sqlalchemy import event, func, select, text
+
+from app.models.models import InventoryEvent, Product
+from services import stock_ledger
+from services.stock_ledger import StockConflictError, record_stock_change
+
+
+@pytest.fixture
+def interfere(pg_engine):
+    """
+    Commit a competing stock change from another connection just before the
+    next `times` compare-and-swap updates reach the database.
+    """
+    state = {"left": 0, "busy": False}
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if (
+            state["left"]
+            and not state["busy"]
+            and statement.startswith("UPDATE products")
+        ):
+            state["left"] -= 1
+            state["busy"] = True
+            try:
+                with pg_engine.begin() as other:
+                    other.execute(
+                        text(
+                            "UPDATE products SET stock_quantity = stock_quantity + 1, "
+                            "version = version + 1 WHERE id = :id"
+                        ),
+                        {"id": state["product_id"]},
+                    )
+            finally:
+                state["busy"] = False
+
+    event.listen(pg_engine, "before_cursor_execute", before_execute)
+
+    def arm(product_id, times):
+        state.update(product_id=product_id, left=times)
+
+    yield arm
+    event.remove(pg_engine, "before_cursor_execute", before_execute)
+
+
+def test_lost_race_is_retried_against_the_fresh_row(pg_db, make_product, interfere):
+    product_id = make_product(stock=10)
+    version = pg_db.get(Product, product_id).version
+    interfere(product_id, times=1)
+
+    record_stock_change(pg_db, pg_db.get(Product, product_id), -3, "sale")
+    pg_db.commit()
+
+    # The competing +1 survives alongside our -3
+    pg_db.expire_all()
+    product = pg_db.get(Product, product_id)
+    assert product.stock_quantity == 8
+    assert product.version == version + 2
+
+
+def test_gives_up_after_max_retries(pg_db, make_product, interfere):
+    product_id = make_product(stock=10)
+    interfere(product_id, times=stock_ledger.MAX_STOCK_RETRIES)
+
+    with pytest.raises(StockConflictError):
+        record_stock_change(pg_db, pg_db.get(Product, product_id), -3, "sale")
+    pg_db.rollback()
+
+    assert pg_db.get(Product, product_id).stock_quantity == 10 + (
+        stock_ledger.MAX_STOCK_RETRIES
+    )
+
+
+def test_concurrent_writers_lose_no_updates(pg_sessions, make_product):
+    product_id = make_product(stock=100)
+    workers, per_worker = 6, 5
+    failures = []
+
+    def sell():
+        db = pg_sessions()
+        try:
+            for _ in range(per_worker):
+                while True:
+                    try:
+                        product = db.get(Product, product_id)
+                        record_stock_change(db, product, -1, "sale")
+                        db.commit()
+                        break
+                    except StockConflictError:
+                        db.rollback()
+        except Exception as e:  # pragma: no cover - surfaced below
+            failures.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=sell) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not failures
+    with pg_sessions() as db:
+        assert db.get(Product, product_id).stock_quantity == 100 - workers * per_worker
+        ledger = db.scalar(
+            select(func.sum(InventoryEvent.change)).where(
+                InventoryEvent.product_id == product_id
+            )
+        )
+        assert ledger == -workers * per_worker
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.models.models import InventoryEvent, Product, StockSnapshot
+from services.stock_ledger import (
+    record_stock_change,
+    shrink_report,
+    stock_as_of,
+    take_stock_snapshots,
+)
+
+DAY = datetime(2020, 3, 2)
+
+
+def _change(db, product_id, change, source="adjustment", at=None, **kwargs):
+    product = db.get(Product, product_id)
+    event = record_stock_change(db, product, change, source, **kwargs)
+    db.flush()
+    if at is not None:
+        db.execute(
+            update(InventoryEvent)
+            .where(InventoryEvent.id == event.id)
+            .values(created_at=at)
+        )
+    db.commit()
+    return event
+
+
+def _snapshot(db, tenant_id, at):
+    take_stock_snapshots(db, tenant_id=tenant_id)
+    db.execute(
+        update(StockSnapshot)
+        .where(StockSnapshot.tenant_id == tenant_id)
+        .values(taken_at=at)
+    )
+    db.commit()
+
+
+def test_every_change_moves_stock_and_appends_a_ledger_row(pg_db, make_product):
+    product_id = make_product(stock=10)
+    _change(pg_db, product_id, -3, "sale", reference_id=42)
+
+    assert pg_db.get(Product, product_id).stock_quantity == 7
+    event = pg_db.scalars(
+        select(InventoryEvent).where(InventoryEvent.product_id == product_id)
+    ).one()
+    assert (event.change, event.source, event.reference_id) == (-3, "sale", 42)
+
+
+def test_snapshot_records_the_last_ledger_row_it_covers(pg_db, tenant_id, make_product):
+    product_id = make_product()
+    event = _change(pg_db, product_id, 5)
+    _snapshot(pg_db, tenant_id, DAY)
+
+    snapshot = pg_db.scalars(
+        select(StockSnapshot).where(StockSnapshot.product_id == product_id)
+    ).one()
+    assert (snapshot.quantity, snapshot.last_event_id) == (5, event.id)
+
+
+def test_stock_as_of_replays_from_the_nearest_snapshot(pg_db, tenant_id, make_product):
+    product_id = make_product()
+    _change(pg_db, product_id, 10, at=DAY + timedelta(hours=1))
+    _snapshot(pg_db, tenant_id, DAY + timedelta(hours=2))
+    _change(pg_db, product_id, -4, "sale", at=DAY + timedelta(hours=3))
+
+    def quantity(at):
+        (row,) = stock_as_of(pg_db, tenant_id, at, product_ids=[product_id])
+        return row["quantity"]
+
+    # Forward from the snapshot, and backward from it
+    assert quantity(DAY + timedelta(hours=3, minutes=1)) == 6
+    assert quantity(DAY + timedelta(hours=2, minutes=30)) == 10
+    assert quantity(DAY + timedelta(minutes=30)) == 0
+
+
+def test_shrink_report_splits_movement_by_source(pg_db, tenant_id, make_product):
+    product_id = make_product()
+    _change(pg_db, product_id, 20, at=DAY - timedelta(days=1))
+    _change(pg_db, product_id, -3, "sale", at=DAY + timedelta(hours=1))
+    _change(pg_db, product_id, 1, "return", at=DAY + timedelta(hours=2))
+    _change(pg_db, product_id, 5, at=DAY + timedelta(hours=3))
+    _change(pg_db, product_id, -2, at=DAY + timedelta(hours=4))
+
+    (row,) = shrink_report(pg_db, tenant_id, DAY, DAY + timedelta(days=1))
+    assert row["opening_stock"] == 20
+    assert (row["sold"], row["returned"], row["received"], row["shrink"]) == (
+        3,
+        1,
+        5,
+        2,
+    )
+    assert row["closing_stock"] == 21
@@ -0,0 +1,98 @@
+import pytest
+
+from services import langchain_agent, tenant_router
+from services.tenant_router import TenantAgentRegistry
+
+
+@pytest.fixture(autouse=True)
+def tenant_databases(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        tenant_router,
+        "TENANT_DATABASES",
+        {
+            "store1": f"sqlite:///{tmp_path}/store1.db",
+            "store2": f"sqlite:///{tmp_path}/store2.db",
+            "store3": f"sqlite:///{tmp_path}/store2.db",
+        },
+    )
+
+
+def _registry(builds, **kwargs):
+    def build(engine):
+        builds.append(engine.url.database.rsplit("/", 1)[-1])
+        return object()
+
+    return TenantAgentRegistry(build_agent=build, engine_options={}, **kwargs)
+
+
+def test_repeat_questions_reuse_engine_and_agent():
+    builds = []
+    registry = _registry(builds)
+    assert registry.agent_for("store1") is registry.agent_for("store1")
+    assert registry.engine_for("store1") is registry.engine_for("store1")
+    assert builds == ["store1.db"]
+
+
+def test_stores_on_the_same_database_share_an_entry():
+    builds = []
+    registry = _registry(builds)
+    assert registry.agent_for("store2") is registry.agent_for("store3")
+    assert builds == ["store2.db"]
+
+
+def test_stores_without_a_database_of_their_own_get_no_agent():
+    builds = []
+    registry = _registry(builds)
+    with pytest.raises(KeyError):
+        registry.agent_for("store9")
+    assert builds == []
+
+
+def test_least_recently_used_database_is_evicted(tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        tenant_router.TENANT_DATABASES, "store4", f"sqlite:///{tmp_path}/store4.db"
+    )
+    builds = []
+    registry = _registry(builds, max_entries=2)
+    registry.agent_for("store1")
+    registry.agent_for("store2")
+    registry.agent_for("store1")
+    registry.agent_for("store4")  # evicts store2
+    registry.agent_for("store2")
+    assert builds == ["store1.db", "store2.db", "store4.db", "store2.db"]
+
+
+def test_idle_databases_release_connections_but_keep_agent():
+    builds = []
+    registry = _registry(builds, idle_seconds=0)
+    agent = registry.agent_for("store1")
+    assert registry.release_idle() == 1
+    assert registry.release_idle() == 0
+    assert registry.agent_for("store1") is agent
+    assert builds == ["store1.db"]
+
+
+def test_store_agents_use_the_shared_builder_unscoped(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        langchain_agent,
+        "build_sql_agent",
+        lambda engine, tenant_scoped: calls.append((engine, tenant_scoped)),
+    )
+    tenant_router.build_store_agent("engine")
+    assert calls == [("engine", False)]
+
+
+def test_questions_go_to_the_store_database_when_it_has_one(monkeypatch):
+    def answering(name):
+        return lambda inputs: {"output": name, "intermediate_steps": []}
+
+    registry = TenantAgentRegistry(
+        build_agent=lambda engine: answering(engine.url.database.rsplit("/", 1)[-1]),
+        engine_options={},
+    )
+    monkeypatch.setattr(langchain_agent, "agent_registry", registry)
+    monkeypatch.setattr(langchain_agent, "get_sql_agent", lambda: answering("shared"))
+
+    assert langchain_agent.ask_sql_agent("sales?", "store1") == ("store1.db", [])
+    assert langchain_agent.ask_sql_agent("sales?", "store9") == ("shared", [])
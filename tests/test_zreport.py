@@ -0,0 +1,136 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event, text, update
+
+from app.models.models import CashierSession, Sale, ZReportSnapshot
+from services import zreport_snapshots
+from services.zreport import _sales_totals, build_z_report, day_bounds
+from services.zreport_snapshots import freeze_day, load_z_report
+
+DAY = date(2020, 5, 4)
+NOON = datetime(2020, 5, 4, 12)
+
+
+def test_z_report_totals_skip_deleted_and_other_days(
+    pg_db, tenant_id, make_product, make_sale
+):
+    mug, cup = make_product(name="Mug"), make_product(name="Cup")
+    make_sale([(mug, 2, "5.00")], timestamp=NOON)
+    make_sale([(cup, 1, "20.00")], payment_type="card", timestamp=NOON)
+    make_sale([(cup, 1, "7.00")], timestamp=NOON - timedelta(days=1))
+    deleted = make_sale([(cup, 9, "10.00")], timestamp=NOON)
+    pg_db.execute(
+        update(Sale).where(Sale.id == deleted).values(deleted_at=datetime.utcnow())
+    )
+    pg_db.commit()
+
+    report = build_z_report(pg_db, tenant_id, DAY)
+    assert (report.total_sales, report.total_cash, report.total_card) == (
+        Decimal("30.00"),
+        Decimal("10.00"),
+        Decimal("20.00"),
+    )
+    assert [(t.name, t.units_sold) for t in report.top_sellers] == [
+        ("Mug", 2),
+        ("Cup", 1),
+    ]
+
+
+def test_day_totals_are_answered_from_the_live_sales_index(pg_db, tenant_id):
+    start, end = day_bounds(DAY)
+    pg_db.execute(text("SET LOCAL enable_seqscan = off"))
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    bind = pg_db.connection()
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        _sales_totals(pg_db, tenant_id, start, end)
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+
+    (statement, parameters) = statements[-1]
+    cursor = bind.connection.cursor()
+    cursor.execute("EXPLAIN " + statement, parameters)
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+    assert "Index Only Scan using ix_sales_tenant_timestamp" in plan
+
+
+def _snapshot(db, tenant_id):
+    db.expire_all()
+    return (
+        db.query(ZReportSnapshot)
+        .filter(
+            ZReportSnapshot.tenant_id == tenant_id,
+            ZReportSnapshot.report_date == DAY,
+        )
+        .one()
+    )
+
+
+def test_late_sale_marks_the_snapshot_stale_until_refrozen(
+    pg_db, tenant_id, make_product, make_sale
+):
+    mug = make_product()
+    make_sale([(mug, 1, "5.00")], timestamp=NOON)
+    assert load_z_report(pg_db, tenant_id, DAY).report.total_sales == Decimal("5.00")
+    assert not _snapshot(pg_db, tenant_id).stale
+
+    make_sale([(mug, 1, "3.00")], timestamp=NOON)
+    assert _snapshot(pg_db, tenant_id).stale
+
+    bundle = load_z_report(pg_db, tenant_id, DAY)
+    assert bundle.report.total_sales == Decimal("8.00")
+    assert bundle.snapshot_id is not None
+    assert not _snapshot(pg_db, tenant_id).stale
+
+
+def test_write_during_a_freeze_keeps_the_snapshot_stale(
+    pg_db, tenant_id, make_product, make_sale, monkeypatch
+):
+    mug = make_product()
+    make_sale([(mug, 1, "5.00")], timestamp=NOON)
+    freeze_day(pg_db, tenant_id, DAY)
+    pg_db.commit()
+    make_sale([(mug, 1, "3.00")], timestamp=NOON)
+
+    def build_then_write(db, tid, report_date):
+        report = build_z_report(db, tid, report_date)
+        make_sale([(mug, 1, "2.00")], timestamp=NOON)
+        return report
+
+    monkeypatch.setattr(zreport_snapshots, "build_z_report", build_then_write)
+    bundle = freeze_day(pg_db, tenant_id, DAY)
+    pg_db.commit()
+
+    assert bundle.snapshot_id is None
+    snapshot = _snapshot(pg_db, tenant_id)
+    assert snapshot.stale
+    assert snapshot.report["total_sales"] == "5.00"
+
+
+def test_only_report_columns_of_a_session_mark_the_snapshot_stale(
+    pg_db, tenant_id, make_user
+):
+    session = CashierSession(
+        cashier_id=make_user(),
+        opened_at=NOON,
+        opening_cash=Decimal("100.00"),
+        tenant_id=tenant_id,
+    )
+    pg_db.add(session)
+    pg_db.commit()
+    freeze_day(pg_db, tenant_id, DAY)
+    pg_db.commit()
+
+    session.cash_total = Decimal("40.00")
+    session.sale_count = 3
+    pg_db.commit()
+    assert not _snapshot(pg_db, tenant_id).stale
+
+    session.closing_cash = Decimal("140.00")
+    pg_db.commit()
+    assert _snapshot(pg_db, tenant_id).stale
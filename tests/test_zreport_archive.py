@@ -0,0 +1,58 @@
+import io
+import uuid
+import zipfile
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth.dependencies import check_tenant_access
+from app.auth.principal_cache import Principal
+from app.models.models import Tenant, TenantGrant, ZReportSnapshot
+from services import zreport_archive
+from services.zreport_snapshots import freeze_day
+
+DAY = date(2020, 6, 1)
+
+
+def test_archive_serves_the_frozen_csv_and_pdf(
+    pg_db, pg_sessions, tenant_id, make_product, make_sale, monkeypatch
+):
+    make_sale([(make_product(), 1, "5.00")], timestamp=datetime(2020, 6, 1, 12))
+    snapshot_id = freeze_day(pg_db, tenant_id, DAY).snapshot_id
+    pg_db.query(ZReportSnapshot).filter(ZReportSnapshot.id == snapshot_id).update(
+        {"csv": "frozen,csv\n", "pdf": b"%PDF-frozen"}
+    )
+    pg_db.commit()
+
+    def no_render(html):
+        raise AssertionError("frozen PDF was rendered again")
+
+    monkeypatch.setattr(zreport_archive, "SessionLocal", pg_sessions)
+    monkeypatch.setattr(zreport_archive.pdf_renderer, "render_blocking", no_render)
+    data = b"".join(
+        zreport_archive.stream_zreport_archive(
+            [(tenant_id, "store")], DAY, DAY, include_pdf=True
+        )
+    )
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.read(f"store/zreport_{DAY}.csv") == b"frozen,csv\n"
+        assert archive.read(f"store/zreport_{DAY}.pdf") == b"%PDF-frozen"
+
+
+def test_other_stores_need_a_grant(pg_db, tenant_id, make_user):
+    other = uuid.uuid4()
+    pg_db.add(Tenant(id=other, name=f"test-{other}"))
+    pg_db.commit()
+    user_id = make_user(role="admin")
+    user = Principal(user_id, "manager", "admin", tenant_id)
+
+    check_tenant_access(pg_db, user, {tenant_id})
+    with pytest.raises(HTTPException) as denied:
+        check_tenant_access(pg_db, user, {tenant_id, other})
+    assert denied.value.status_code == 403
+
+    pg_db.add(TenantGrant(user_id=user_id, tenant_id=other))
+    pg_db.commit()
+    check_tenant_access(pg_db, user, {tenant_id, other})